@@ -0,0 +1,293 @@
+"""
+Кеш ответа GET /api/pages/<id>/ — готовый вывод PageDetailSerializer.
+
+Ключ page-detail:v2:<id>, время жизни PAGE_CACHE_TIMEOUT. Изменения состава
+и порядка элементов инвалидируют кеш сразу: сигналы моделей (Page,
+ContentOnPage.save, сохранение объекта контента — страницы ищутся через
+where_used) и content.signals.pages_changed для bulk-операций, удаления
+объектов контента и сохранения/удаления обёрток Contents.
+Инвалидация сразу и ещё раз после коммита транзакции удаляет ключ и
+меняет поколение страницы (page-detail:gen:<id>, случайный токен без срока
+жизни). Рендер запоминает поколение до чтения из БД и пишет его в запись;
+запись другого поколения считается отсутствующей — рендер, прочитавший
+строки до изменения и закончивший после инвалидации, устаревший состав в
+кеш не вернёт. Счётчики
+просмотров (UPDATE … F()) кеш не сбрасывают и отстают не более чем на TTL.
+
+Промах рендерит один запрос на страницу (single-flight): потоки процесса
+ждут рендер лидера (threading.Event), процессы — через короткую блокировку
+в общем кеше (cache.add ключа page-detail:lock:<id> с токеном владельца,
+снимается только владельцем): остальные опрашивают
+кеш до PAGE_CACHE_WAIT секунд и только потом рендерят сами. После TTL
+ответ ещё PAGE_CACHE_STALE секунд отдаётся устаревшим (stale-while-
+revalidate), пока его пересобирает тот единственный запрос, что взял
+блокировку. Инвалидация удаляет запись целиком — устаревший состав после
+изменения не отдаётся.
+
+Пакетный рендер (render_pages) — 2 + число типов контента запроса на
+любую пачку страниц; его использует прогрев кеша (warm_pages).
+"""
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.signals import post_delete, post_save
+
+from content.models import ContentOnPage, Page, get_content_models
+from content.signals import pages_changed
+from content.where_used import page_ids_for_objects
+from monitoring.metrics import PAGE_CACHE_REQUESTS, SERIALIZER_SECONDS
+
+KEY_PREFIX = "page-detail:v2:"
+LOCK_PREFIX = "page-detail:lock:"
+GENERATION_PREFIX = "page-detail:gen:"
+# блокировка рендера живёт дольше любого разумного рендера, но истекает, если владелец упал
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+
+def page_key(page_id: int) -> str:
+    return f"{KEY_PREFIX}{page_id}"
+
+
+def lock_key(page_id: int) -> str:
+    return f"{LOCK_PREFIX}{page_id}"
+
+
+def generation_key(page_id: int) -> str:
+    return f"{GENERATION_PREFIX}{page_id}"
+
+
+def timeout() -> int:
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 300)
+
+
+def stale_timeout() -> int:
+    return getattr(settings, "PAGE_CACHE_STALE", 60)
+
+
+def wait_timeout() -> float:
+    return getattr(settings, "PAGE_CACHE_WAIT", 2.0)
+
+
+def page_detail_queryset():
+    """Страницы с предзагрузкой элементов и generic-объектов (пакетно по типам)."""
+    return Page.objects.prefetch_related(
+        Prefetch(
+            "content_items",
+            queryset=ContentOnPage.objects.select_related(
+                "content__content_type"
+            ).prefetch_related("content__content_object").order_by("order")
+        )
+    )
+
+
+def render_pages(page_ids: Iterable[int]) -> Dict[int, dict]:
+    """{page_id: данные PageDetailSerializer} для существующих страниц из page_ids."""
+    from api.serializers import PageDetailSerializer
+
+    rendered = {}
+    for page in page_detail_queryset().filter(pk__in=list(page_ids)):
+        with SERIALIZER_SECONDS.time(view="api:page-detail"):
+            rendered[page.pk] = PageDetailSerializer(page).data
+    return rendered
+
+
+class _Flight:
+    """Рендер страницы, идущий в этом процессе: остальные потоки ждут done."""
+
+    __slots__ = ("done", "ok", "data")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.data: Optional[dict] = None
+
+
+_flights: Dict[int, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _is_fresh(entry: Optional[dict]) -> bool:
+    return entry is not None and entry["fresh_until"] > time.time()
+
+
+def page_generations(page_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """{page_id: поколение}; читать до рендера и передавать в store_pages."""
+    page_ids = list(page_ids)
+    found = cache.get_many([generation_key(pk) for pk in page_ids])
+    return {pk: found.get(generation_key(pk)) for pk in page_ids}
+
+
+def _get_entries(page_ids: Iterable[int]) -> Dict[int, dict]:
+    """Записи кеша текущего поколения (запись и поколение — одно обращение к кешу)."""
+    page_ids = list(page_ids)
+    found = cache.get_many([page_key(pk) for pk in page_ids] + [generation_key(pk) for pk in page_ids])
+    entries = {}
+    for pk in page_ids:
+        entry = found.get(page_key(pk))
+        if entry is not None and entry["generation"] == found.get(generation_key(pk)):
+            entries[pk] = entry
+    return entries
+
+
+def _acquire(lock: str) -> Optional[str]:
+    """Токен владельца блокировки или None, если её держит другой."""
+    token = uuid.uuid4().hex
+    return token if cache.add(lock, token, LOCK_TIMEOUT) else None
+
+
+def _release(lock: str, token: str) -> None:
+    # после LOCK_TIMEOUT блокировка могла истечь и достаться другому — его не трогаем
+    if cache.get(lock) == token:
+        cache.delete(lock)
+
+
+def get_page_data(page_id: int) -> Optional[dict]:
+    """Данные страницы из кеша или свежий рендер (с записью в кеш); None — страницы нет."""
+    if timeout() <= 0:
+        return render_pages([page_id]).get(page_id)
+    entry = _get_entries([page_id]).get(page_id)
+    if _is_fresh(entry):
+        PAGE_CACHE_REQUESTS.inc(result="hit")
+        return entry["data"]
+    if entry is not None:
+        # устаревший ответ: пересобирает один запрос, остальные отдают прежний
+        token = _acquire(lock_key(page_id))
+        if token is not None:
+            try:
+                return _render(page_id, "refresh")
+            finally:
+                _release(lock_key(page_id), token)
+        PAGE_CACHE_REQUESTS.inc(result="stale")
+        return entry["data"]
+    return _single_flight(page_id)
+
+
+def _single_flight(page_id: int) -> Optional[dict]:
+    with _flights_lock:
+        flight = _flights.get(page_id)
+        leader = flight is None
+        if leader:
+            flight = _flights[page_id] = _Flight()
+    if not leader:
+        if flight.done.wait(wait_timeout()) and flight.ok:
+            PAGE_CACHE_REQUESTS.inc(result="coalesced")
+            return flight.data
+        # лидер завис или упал — рендерим сами
+        return _render(page_id, "timeout")
+    try:
+        flight.data = _render_locked(page_id)
+        flight.ok = True
+        return flight.data
+    finally:
+        with _flights_lock:
+            _flights.pop(page_id, None)
+        flight.done.set()
+
+
+def _render_locked(page_id: int) -> Optional[dict]:
+    """Рендер под блокировкой в общем кеше; если её держит другой процесс — ждём его результат."""
+    lock = lock_key(page_id)
+    token = _acquire(lock)
+    if token is not None:
+        try:
+            return _render(page_id, "miss")
+        finally:
+            _release(lock, token)
+    deadline = time.monotonic() + wait_timeout()
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = _get_entries([page_id]).get(page_id)
+        if entry is not None:
+            PAGE_CACHE_REQUESTS.inc(result="coalesced")
+            return entry["data"]
+        if cache.get(lock) is None:
+            # владелец закончил без записи (страницы нет) или упал
+            return _render(page_id, "miss")
+    return _render(page_id, "timeout")
+
+
+def _render(page_id: int, result: str) -> Optional[dict]:
+    PAGE_CACHE_REQUESTS.inc(result=result)
+    generations = page_generations([page_id])
+    data = render_pages([page_id]).get(page_id)
+    if data is not None:
+        store_pages({page_id: data}, generations)
+    return data
+
+
+def cached_page_ids(page_ids: Iterable[int]) -> List[int]:
+    """Страницы со свежей (не устаревшей) записью текущего поколения в кеше."""
+    page_ids = list(page_ids)
+    entries = _get_entries(page_ids)
+    return [pk for pk in page_ids if _is_fresh(entries.get(pk))]
+
+
+def store_pages(rendered: Dict[int, dict], generations: Optional[Dict[int, Optional[str]]] = None) -> None:
+    """
+    Записывает отрендеренные страницы. generations — page_generations(), прочитанные
+    до рендера: страницы, инвалидированные с тех пор, не записываются (без него —
+    текущие поколения).
+    """
+    current = page_generations(rendered)
+    generations = current if generations is None else generations
+    fresh_until = time.time() + timeout()
+    entries = {
+        page_key(pk): {"data": data, "fresh_until": fresh_until, "generation": generations.get(pk)}
+        for pk, data in rendered.items()
+        if generations.get(pk) == current[pk]
+    }
+    if entries:
+        cache.set_many(entries, timeout() + stale_timeout())
+
+
+def _bump(page_ids: List[int]) -> None:
+    cache.set_many({generation_key(pk): uuid.uuid4().hex for pk in page_ids}, None)
+    cache.delete_many([page_key(pk) for pk in page_ids])
+
+
+def invalidate_pages(page_ids: Iterable[int]) -> None:
+    page_ids = sorted(set(page_ids))
+    if not page_ids:
+        return
+    _bump(page_ids)
+    # повторно после коммита: между инвалидацией и коммитом рендер мог прочитать строки до изменения
+    transaction.on_commit(lambda: _bump(page_ids))
+
+
+# ---------------- Сигналы ----------------
+def _page_saved_or_deleted(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages([instance.pk])
+
+
+def _item_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages([instance.page_id])
+
+
+def _content_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(page_ids_for_objects([instance]))
+
+
+def _pages_changed(sender, page_ids, **kwargs):
+    invalidate_pages(page_ids)
+
+
+def connect_signals():
+    post_save.connect(_page_saved_or_deleted, sender=Page, dispatch_uid="page_cache_page_save")
+    post_delete.connect(_page_saved_or_deleted, sender=Page, dispatch_uid="page_cache_page_delete")
+    # только save: приёмник post_delete отключил бы быстрое каскадное удаление элементов;
+    # bulk-удаления сообщают о себе через pages_changed
+    post_save.connect(_item_saved, sender=ContentOnPage, dispatch_uid="page_cache_item_save")
+    for model in get_content_models().values():
+        # удаления объектов и обёрток приходят через pages_changed (content.signals)
+        post_save.connect(_content_saved, sender=model, dispatch_uid=f"page_cache_save_{model._meta.label}")
+    pages_changed.connect(_pages_changed, dispatch_uid="page_cache_pages_changed")
@@ -0,0 +1,85 @@
+"""
+Лёгкое чтение счётчиков просмотров: GET /api/counters/?page=<id> или ?items=type:id,...
+
+Ответ — только тройки [type, id, counter] без тел и метаданных. Счётчики
+читаются одним запросом на тип контента по покрывающему индексу (id, counter),
+к ним добавляются ещё не перенесённые в БД приращения бэкенда счётчиков
+(content.counters). Состав страницы — один запрос к элементам. Готовый
+ответ и его ETag кешируются на COUNTERS_CACHE_TIMEOUT секунд (ключ —
+страница или список объектов), поэтому частый опрос одних и тех же
+счётчиков стоит одного обращения к кешу и 304 без тела.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+
+from content.counters import get_counter_backend
+from content.models import ContentOnPage, Page, get_content_models
+
+KEY_PREFIX = "counters:v1:"
+Item = Tuple[str, int]
+
+
+def timeout() -> int:
+    return getattr(settings, "COUNTERS_CACHE_TIMEOUT", 5)
+
+
+def page_items(page_id: int) -> Optional[List[Item]]:
+    """[(type, id), ...] элементов страницы в порядке order; None — страницы нет."""
+    rows = (
+        ContentOnPage.objects.filter(page_id=page_id)
+        .order_by("order")
+        .values_list("content__content_type_id", "content___object_id")
+    )
+    items = [(ContentType.objects.get_for_id(ct_id).model, object_id) for ct_id, object_id in rows]
+    if not items and not Page.objects.filter(pk=page_id).exists():
+        return None
+    return items
+
+
+def read_counters(items: List[Item]) -> List[list]:
+    """[[type, id, counter], ...] в порядке items; несуществующие объекты пропускаются."""
+    models = get_content_models()
+    backend = get_counter_backend()
+    ids_by_type: Dict[str, List[int]] = {}
+    for model_name, pk in items:
+        ids_by_type.setdefault(model_name, []).append(pk)
+    values: Dict[Item, int] = {}
+    for model_name, ids in ids_by_type.items():
+        stored = dict(models[model_name].objects.filter(pk__in=ids).order_by().values_list("pk", "counter"))
+        deltas = backend.live_deltas(model_name, stored) if stored else {}
+        values.update({(model_name, pk): counter + deltas.get(pk, 0) for pk, counter in stored.items()})
+    return [[model_name, pk, values[(model_name, pk)]] for model_name, pk in items if (model_name, pk) in values]
+
+
+def _entry(counters: List[list]) -> dict:
+    body = json.dumps(counters, separators=(",", ":")).encode("utf-8")
+    return {"counters": counters, "etag": f'"{hashlib.sha1(body).hexdigest()[:20]}"'}
+
+
+def get_page_counters(page_id: int) -> Optional[dict]:
+    """{"counters", "etag"} счётчиков элементов страницы; None — страницы нет."""
+    key = f"{KEY_PREFIX}page:{page_id}"
+    entry = cache.get(key)
+    if entry is None:
+        items = page_items(page_id)
+        if items is None:
+            return None
+        entry = _entry(read_counters(items))
+        cache.set(key, entry, timeout())
+    return entry
+
+
+def get_item_counters(items: List[Item]) -> dict:
+    """{"counters", "etag"} счётчиков явного списка объектов."""
+    signature = ",".join(f"{model_name}:{pk}" for model_name, pk in items)
+    key = f"{KEY_PREFIX}items:{hashlib.sha1(signature.encode()).hexdigest()}"
+    entry = cache.get(key)
+    if entry is None:
+        entry = _entry(read_counters(items))
+        cache.set(key, entry, timeout())
+    return entry
@@ -0,0 +1,262 @@
+"""
+Нагрузочный генератор для /api/pages/ и /api/pages/<pk>/.
+
+Популярность страниц — Zipf, параллелизм — пул потоков с keep-alive
+соединениями. После прогона сравнивает прирост счётчиков (значение в БД
+плюс ещё не перенесённые приращения бэкенда счётчиков, live_deltas) с числом
+реально выполненных просмотров (дрейф точности счётчиков): каждый успешный
+GET детальной страницы должен увеличить счётчик каждого объекта на ней на 1.
+
+Каждый запрос идёт с собственным User-Agent — для фильтра повторов
+(content.dedup) это разные клиенты, и просмотры не подавляются. Бэкенд
+счётчиков и фильтр повторов из настроек попадают в отчёт.
+"""
+import http.client
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+
+from content.counters import get_counter_backend
+from content.distributions import ZipfSampler
+from content.models import ContentOnPage, Contents, Page, get_content_models
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def latency_summary(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else None,
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1] if ordered else None,
+    }
+
+
+class CounterProbe:
+    """
+    Сумма счётчиков всех объектов на заданных страницах и ожидаемый прирост на просмотр.
+    Счётчик объекта — counter в БД плюс live_deltas бэкенда счётчиков.
+    """
+
+    def __init__(self, page_ids: List[int]):
+        self.page_ids = page_ids
+        self.models = get_content_models()
+        self.backend = get_counter_backend()
+        # число различных существующих объектов на странице — столько инкрементов даёт один просмотр
+        self.per_view: Dict[int, int] = {page_id: 0 for page_id in page_ids}
+        self.object_ids: Dict[str, List[int]] = {}
+        for model_name, model in self.models.items():
+            ct = ContentType.objects.get_for_model(model)
+            rows = (
+                ContentOnPage.objects.filter(
+                    page_id__in=page_ids,
+                    content__content_type=ct,
+                    content___object_id__in=model.objects.values("pk"),
+                )
+                .values_list("page_id", "content___object_id")
+                .distinct()
+            )
+            ids = set()
+            for page_id, object_id in rows:
+                self.per_view[page_id] += 1
+                ids.add(object_id)
+            self.object_ids[model_name] = sorted(ids)
+
+    def total(self) -> int:
+        total = 0
+        for model_name, model in self.models.items():
+            ct = ContentType.objects.get_for_model(model)
+            ids = Contents.objects.filter(content_type=ct, page_items__page_id__in=self.page_ids).values("_object_id")
+            total += model.objects.filter(pk__in=ids).aggregate(s=Sum("counter"))["s"] or 0
+            if self.object_ids[model_name]:
+                total += sum(self.backend.live_deltas(model_name, self.object_ids[model_name]).values())
+        return total
+
+
+def counter_settings() -> Dict:
+    """Бэкенд счётчиков и фильтр повторов просмотров из настроек (для отчёта)."""
+    return {
+        "counter_backend": getattr(settings, "CONTENT_COUNTER_BACKEND", "content.counters.DatabaseCounterBackend"),
+        "view_dedup": getattr(settings, "VIEW_DEDUP_BACKEND", "") or None,
+        "view_dedup_proxy_hops": getattr(settings, "VIEW_DEDUP_PROXY_HOPS", 0),
+    }
+
+
+class LoadTest:
+    """
+    Прогон нагрузки: concurrency потоков, всего requests запросов (или duration секунд).
+    list_ratio — доля запросов к списку страниц, остальные — к детальным по Zipf.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        page_ids: List[int],
+        concurrency: int = 8,
+        requests: Optional[int] = 1000,
+        duration: Optional[float] = None,
+        zipf: float = 1.1,
+        list_ratio: float = 0.1,
+        timeout: float = 10.0,
+        seed: Optional[int] = None,
+    ):
+        if not page_ids:
+            raise ValueError("Нет страниц для нагрузки")
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.page_ids = list(page_ids)
+        random.Random(seed).shuffle(self.page_ids)  # популярные страницы — случайные, а не первые по id
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.zipf = zipf
+        self.list_ratio = list_ratio
+        self.timeout = timeout
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._deadline: Optional[float] = None
+        self.latencies: Dict[str, List[float]] = {"list": [], "detail": []}
+        self.errors: Dict[str, int] = {}
+        self.detail_views: Dict[int, int] = {}
+
+    def _next_ticket(self) -> bool:
+        with self._lock:
+            if self.requests is not None and self._issued >= self.requests:
+                return False
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                return False
+            self._issued += 1
+            return True
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _worker(self, worker_id: int) -> None:
+        rng = random.Random(None if self.seed is None else self.seed + worker_id)
+        pick = ZipfSampler(len(self.page_ids), self.zipf, rng)
+        conn = self._connect()
+        latencies: Dict[str, List[float]] = {"list": [], "detail": []}
+        errors: Dict[str, int] = {}
+        views: Dict[int, int] = {}
+        sent = 0
+        try:
+            while self._next_ticket():
+                if rng.random() < self.list_ratio:
+                    kind, page_id = "list", None
+                    path = f"{self.prefix}/api/pages/?page={rng.randint(1, 5)}"
+                else:
+                    kind, page_id = "detail", self.page_ids[pick()]
+                    path = f"{self.prefix}/api/pages/{page_id}/"
+                # свой User-Agent на каждый запрос: фильтр повторов не принимает просмотры за повтор
+                sent += 1
+                headers = {"Accept": "application/json", "User-Agent": f"loadtest/{worker_id}.{sent}"}
+                started = time.perf_counter()
+                try:
+                    conn.request("GET", path, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException) as exc:
+                    errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+                    conn.close()
+                    conn = self._connect()
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                if status == 200:
+                    latencies[kind].append(elapsed)
+                    if page_id is not None:
+                        views[page_id] = views.get(page_id, 0) + 1
+                elif not (kind == "list" and status == 404):  # несуществующая страница пагинации — не ошибка
+                    errors[f"HTTP {status}"] = errors.get(f"HTTP {status}", 0) + 1
+        finally:
+            conn.close()
+            with self._lock:
+                for kind, values in latencies.items():
+                    self.latencies[kind].extend(values)
+                for key, count in errors.items():
+                    self.errors[key] = self.errors.get(key, 0) + count
+                for page_id, count in views.items():
+                    self.detail_views[page_id] = self.detail_views.get(page_id, 0) + count
+
+    def run(self, settle: float = 30.0, poll: float = 0.5) -> Dict:
+        """
+        Выполняет прогон и ждёт (до settle секунд), пока счётчики догонят
+        просмотры (очередь Celery разберётся). Возвращает отчёт.
+        """
+        probe = CounterProbe(self.page_ids)
+        before = probe.total()
+
+        threads = [threading.Thread(target=self._worker, args=(i,), daemon=True) for i in range(self.concurrency)]
+        started = time.monotonic()
+        if self.duration:
+            self._deadline = started + self.duration
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        expected = sum(probe.per_view[page_id] * views for page_id, views in self.detail_views.items())
+        settle_deadline = time.monotonic() + settle
+        actual = probe.total() - before
+        while actual < expected and time.monotonic() < settle_deadline:
+            time.sleep(poll)
+            actual = probe.total() - before
+        settled_after = round(time.monotonic() - (settle_deadline - settle), 3)
+
+        completed = sum(len(values) for values in self.latencies.values())
+        return {
+            "config": {
+                "concurrency": self.concurrency,
+                "requests": self.requests,
+                "duration": self.duration,
+                "zipf": self.zipf,
+                "list_ratio": self.list_ratio,
+                "pages": len(self.page_ids),
+                **counter_settings(),
+            },
+            "elapsed_s": round(elapsed, 3),
+            "completed": completed,
+            "throughput_rps": round(completed / elapsed, 1) if elapsed else None,
+            "errors": self.errors,
+            "latency": {
+                "all": latency_summary(self.latencies["list"] + self.latencies["detail"]),
+                "list": latency_summary(self.latencies["list"]),
+                "detail": latency_summary(self.latencies["detail"]),
+            },
+            "counters": {
+                "detail_views": sum(self.detail_views.values()),
+                "expected_increments": expected,
+                "actual_increments": actual,
+                "drift": actual - expected,
+                "drift_pct": round((actual - expected) / expected * 100, 3) if expected else 0.0,
+                "settled_after_s": settled_after,
+            },
+        }
+
+
+def target_pages(limit: Optional[int] = None) -> List[int]:
+    """id страниц для нагрузки (по умолчанию — все)."""
+    qs = Page.objects.order_by("pk").values_list("pk", flat=True)
+    return list(qs[:limit] if limit else qs)
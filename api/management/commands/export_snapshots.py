@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.snapshots import export_snapshots, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Статические снимки /api/pages/<id>/ (JSON и .json.gz) для раздачи nginx: "
+        "только изменившиеся с прошлого прогона страницы, в пуле процессов, манифест заменяется атомарно"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help=f"Каталог снимков (по умолчанию SNAPSHOT_DIR: {snapshot_dir()})")
+        parser.add_argument("--workers", type=int, default=4, help="Процессов (1 — в текущем процессе)")
+        parser.add_argument("--batch-size", type=int, default=100, help="Страниц на один рендер")
+        parser.add_argument("--full", action="store_true", help="Перерендерить все страницы")
+        parser.add_argument("--json", dest="json_path", default=None, help="Сохранить отчёт в JSON")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size и --workers должны быть положительными")
+        report = export_snapshots(
+            directory=options["dir"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            full=options["full"],
+            log=self.stderr.write,
+        )
+        self.stdout.write(
+            f"Страниц в снимке {report['pages']}: отрендерено {report['rendered']} "
+            f"(записано {report['written']}, без изменений {report['unchanged']}), "
+            f"удалено {report['removed']} за {report['seconds']} с"
+        )
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
@@ -0,0 +1,99 @@
+import json
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+
+from api.loadtest import LoadTest, target_pages
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузка на /api/pages/ и /api/pages/<pk>/ с Zipf-популярностью страниц: "
+        "throughput, p50/p95/p99 и дрейф счётчиков просмотров"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Адрес запущенного сервера")
+        parser.add_argument("--serve", action="store_true",
+                            help="Поднять сервер в этом процессе (Celery в eager-режиме, брокер не нужен)")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=1000, help="Всего запросов (0 — ограничение по --duration)")
+        parser.add_argument("--duration", type=float, default=None, help="Длительность прогона, с")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Показатель Zipf популярности страниц")
+        parser.add_argument("--list-ratio", type=float, default=0.1, help="Доля запросов к списку страниц")
+        parser.add_argument("--pages", type=int, default=None, help="Ограничить число страниц")
+        parser.add_argument("--settle", type=float, default=30.0, help="Сколько ждать догоняющих счётчиков, с")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--json", dest="json_path", default=None, help="Сохранить отчёт в JSON")
+
+    def handle(self, *args, **options):
+        if not options["requests"] and not options["duration"]:
+            raise CommandError("Укажите --requests или --duration")
+
+        server = None
+        base_url = options["base_url"]
+        if options["serve"]:
+            from config.celery import app as celery_app
+
+            celery_app.conf.task_always_eager = True
+            server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+            server.set_app(get_internal_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            self.stderr.write(f"Локальный сервер: {base_url}")
+
+        try:
+            load = LoadTest(
+                base_url,
+                target_pages(options["pages"]),
+                concurrency=options["concurrency"],
+                requests=options["requests"] or None,
+                duration=options["duration"],
+                zipf=options["zipf"],
+                list_ratio=options["list_ratio"],
+                seed=options["seed"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        try:
+            report = load.run(settle=options["settle"])
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        self._print(report)
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+
+    def _print(self, report):
+        config = report["config"]
+        self.stdout.write(
+            f"Счётчики: {config['counter_backend']}, фильтр повторов: {config['view_dedup'] or 'выключен'}"
+            f" (VIEW_DEDUP_PROXY_HOPS={config['view_dedup_proxy_hops']}; настройки этого процесса)"
+        )
+        self.stdout.write(
+            f"Запросов: {report['completed']} за {report['elapsed_s']} с — {report['throughput_rps']} rps"
+        )
+        for kind, stats in report["latency"].items():
+            if stats["count"]:
+                self.stdout.write(
+                    f"  {kind:<6} n={stats['count']:<7} p50={stats['p50_ms']:.1f} мс "
+                    f"p95={stats['p95_ms']:.1f} мс p99={stats['p99_ms']:.1f} мс max={stats['max_ms']:.1f} мс"
+                )
+        if report["errors"]:
+            self.stdout.write(self.style.WARNING(f"Ошибки: {report['errors']}"))
+        counters = report["counters"]
+        style = self.style.SUCCESS if counters["drift"] == 0 else self.style.WARNING
+        self.stdout.write(style(
+            f"Счётчики: ожидалось +{counters['expected_increments']}, фактически +{counters['actual_increments']} "
+            f"(дрейф {counters['drift']:+d}, {counters['drift_pct']:+.3f}%, ожидание {counters['settled_after_s']} с)"
+        ))
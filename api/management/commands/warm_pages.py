@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.warming import top_pages, warm_pages
+
+
+def parse_ids(value: str):
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise CommandError(f"Некорректный список id страниц: {value}")
+    if not ids:
+        raise CommandError("Пустой список id страниц")
+    return ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогрев кеша /api/pages/<id>/: top-N страниц по просмотрам контента или явный список, "
+        "пачками в пуле процессов с ограничением скорости"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=1000, help="Сколько самых просматриваемых страниц прогреть")
+        parser.add_argument("--pages", default=None, help="Явный список id через запятую (вместо --top)")
+        parser.add_argument("--workers", type=int, default=4, help="Процессов (1 — в текущем процессе)")
+        parser.add_argument("--batch-size", type=int, default=50, help="Страниц на один рендер")
+        parser.add_argument("--rate", type=float, default=200.0,
+                            help="Предел страниц в секунду на все процессы (0 — без ограничения)")
+        parser.add_argument("--force", action="store_true", help="Перерендерить уже закешированные страницы")
+        parser.add_argument("--json", dest="json_path", default=None, help="Сохранить отчёт в JSON")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size и --workers должны быть положительными")
+        page_ids = parse_ids(options["pages"]) if options["pages"] else top_pages(options["top"])
+
+        report = warm_pages(
+            page_ids,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            rate=options["rate"] or None,
+            force=options["force"],
+            log=self.stderr.write,
+        )
+        self.stdout.write(
+            f"Прогрето {report['warmed']} из {report['requested']} "
+            f"(уже в кеше {report['skipped']}, не найдено {report['missing']}) "
+            f"за {report['seconds']} с, {report['pages_per_second']} стр/с, процессов {report['workers']}"
+        )
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
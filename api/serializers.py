@@ -1,5 +1,6 @@
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
-from content.models import Page, ContentOnPage, Video, Audio, Text
+from content.models import Page, ContentOnPage, Video, Audio, Text, get_content_models
 
 # Сериализатор для контента
 class BaseContentSerializer(serializers.Serializer):
@@ -60,4 +61,128 @@ class PageDetailSerializer(serializers.ModelSerializer):
     def get_contents(self, obj):
         # берем контент в порядке order
         items = obj.get_ordered_items()
+        # generic-объекты пакетно: один запрос на тип контента (повторно не грузятся, если уже предзагружены)
+        prefetch_related_objects(items, "content__content_object")
+        # объект удалён в обход ORM, обёртку ещё не убрал sweep_orphans — пропускаем
+        items = [item for item in items if item.content.content_object is not None]
         return BaseContentSerializer(items, many=True).data
+
+
+# Сериализаторы полнотекстового поиска
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255, trim_whitespace=True)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+
+class SearchPageSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    rank = serializers.FloatField(required=False)
+
+
+class SearchHitSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    type = serializers.CharField()
+    title = serializers.CharField()
+    rank = serializers.FloatField()
+    pages = SearchPageSerializer(many=True)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    query = serializers.CharField()
+    results = SearchHitSerializer(many=True)
+    pages = SearchPageSerializer(many=True)
+
+
+# Сериализатор перемещения элемента страницы
+class MoveItemSerializer(serializers.Serializer):
+    before = serializers.IntegerField(required=False, help_text="id элемента, перед которым встать")
+    after = serializers.IntegerField(required=False, help_text="id элемента, после которого встать")
+
+    def validate(self, attrs):
+        if ("before" in attrs) == ("after" in attrs):
+            raise serializers.ValidationError("Укажите ровно одно из полей: before или after")
+        return attrs
+
+
+class MovedItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentOnPage
+        fields = ("id", "page", "order")
+
+
+# Сериализаторы пакетной сборки страницы
+class PageContentItemSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=sorted(get_content_models()))
+    id = serializers.IntegerField(min_value=1)
+    alias = serializers.SlugField(max_length=150, required=False, allow_null=True, allow_blank=True)
+
+
+class ComposedItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    type = serializers.CharField()
+    object_id = serializers.IntegerField()
+    order = serializers.IntegerField()
+    alias = serializers.CharField(allow_null=True)
+
+
+class PageCompositionSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    deleted = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+    items = ComposedItemSerializer(many=True)
+
+
+# Сериализаторы клонирования страницы
+class ClonePageSerializer(serializers.Serializer):
+    count = serializers.IntegerField(required=False, default=1, min_value=0, max_value=100)
+    title = serializers.CharField(required=False, max_length=255)
+    targets = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=1000,
+        help_text="id существующих страниц, в конец которых дописать элементы",
+    )
+
+    def validate(self, attrs):
+        if not attrs["count"] and not attrs["targets"]:
+            raise serializers.ValidationError("Нужно указать count > 0 или targets")
+        return attrs
+
+
+class ClonedPagesSerializer(serializers.Serializer):
+    pages = serializers.ListField(child=serializers.IntegerField())
+    targets = serializers.ListField(child=serializers.IntegerField())
+    items = serializers.IntegerField()
+
+
+# Сериализаторы лёгкого чтения счётчиков
+class CounterQuerySerializer(serializers.Serializer):
+    page = serializers.IntegerField(required=False, min_value=1)
+    items = serializers.CharField(required=False, help_text="type:id через запятую, например video:1,text:7")
+
+    MAX_ITEMS = 500
+
+    def validate_items(self, value):
+        models = get_content_models()
+        items = {}
+        for token in filter(None, (part.strip() for part in value.split(","))):
+            model_name, _, pk = token.partition(":")
+            if model_name not in models or not pk.isdigit() or int(pk) < 1:
+                raise serializers.ValidationError(f"Ожидается type:id, получено {token!r}")
+            items[(model_name, int(pk))] = None
+        if not items:
+            raise serializers.ValidationError("Пустой список")
+        if len(items) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"Не больше {self.MAX_ITEMS} объектов")
+        return list(items)
+
+    def validate(self, attrs):
+        if ("page" in attrs) == ("items" in attrs):
+            raise serializers.ValidationError("Укажите ровно один параметр: page или items")
+        return attrs
+
+
+class CountersSerializer(serializers.Serializer):
+    counters = serializers.ListField(
+        child=serializers.ListField(), help_text="[type, id, counter] в порядке страницы или запроса"
+    )
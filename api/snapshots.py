@@ -0,0 +1,189 @@
+"""
+Статические снимки /api/pages/<id>/ для раздачи nginx без Django.
+
+Раскладка в SNAPSHOT_DIR:
+    pages/<id>/<hash>.json, <hash>.json.gz — неизменяемые версии (hash — sha256 содержимого,
+                                              .gz — для gzip_static);
+    pages/<id>.json, pages/<id>.json.gz    — символические ссылки на текущую версию;
+    manifest.json                          — {id: {"hash", "path"}} и время начала экспорта.
+
+Файлы и ссылки пишутся под временными именами и ставятся os.replace:
+читатель видит либо прежнюю, либо новую версию целиком. Манифест
+заменяется последним. От каждой страницы хранятся текущая и предыдущая
+версии (клиенты, прочитавшие прежний манифест, дочитают свои файлы).
+
+Инкрементальный прогон рендерит только страницы с content_changed_at не
+раньше начала предыдущего прогона (с запасом OVERLAP на транзакции,
+закоммиченные позже отметки), новые страницы и убирает удалённые.
+Рендер — тот же PageDetailSerializer пачками (api.cache.render_pages) в
+пуле процессов. Счётчики просмотров в снимке — на момент рендера.
+"""
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections
+from django.utils import timezone
+
+from api.cache import render_pages
+from content.models import Page
+
+MANIFEST = "manifest.json"
+OVERLAP = timedelta(seconds=60)
+
+
+def snapshot_dir() -> str:
+    return str(getattr(settings, "SNAPSHOT_DIR", "snapshots"))
+
+
+def encode(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), cls=DjangoJSONEncoder).encode("utf-8")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as stream:
+        stream.write(data)
+    os.replace(tmp, path)
+
+
+def _link_atomic(target: str, link: str) -> None:
+    tmp = f"{link}.tmp-{os.getpid()}"
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    os.symlink(target, tmp)
+    os.replace(tmp, link)
+
+
+def load_manifest(directory: str) -> Dict:
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as stream:
+            return json.load(stream)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_page(directory: str, page_id: int, body: bytes, previous: Optional[str]) -> Dict[str, str]:
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    versions = os.path.join(directory, "pages", str(page_id))
+    version = os.path.join(versions, f"{digest}.json")
+    if not os.path.exists(version):
+        os.makedirs(versions, exist_ok=True)
+        _write_atomic(f"{version}.gz", gzip.compress(body, compresslevel=9, mtime=0))
+        _write_atomic(version, body)
+    for suffix in ("", ".gz"):
+        _link_atomic(f"{page_id}/{digest}.json{suffix}", os.path.join(directory, "pages", f"{page_id}.json{suffix}"))
+    # хранятся текущая и предыдущая версии
+    keep = {f"{name}.json{suffix}" for name in (digest, previous) if name for suffix in ("", ".gz")}
+    for name in os.listdir(versions):
+        if name not in keep and ".tmp-" not in name:
+            os.unlink(os.path.join(versions, name))
+    return {"hash": digest, "path": f"pages/{page_id}/{digest}.json"}
+
+
+def _export_batch(directory: str, page_ids: List[int], previous: Dict[int, str], close: bool = True) -> Dict:
+    written = unchanged = 0
+    entries: Dict[int, Dict[str, str]] = {}
+    try:
+        rendered = render_pages(page_ids)
+    finally:
+        if close:
+            connection.close()
+    for page_id, data in rendered.items():
+        entry = _write_page(directory, page_id, encode(data), previous.get(page_id))
+        if entry["hash"] == previous.get(page_id):
+            unchanged += 1
+        else:
+            written += 1
+        entries[page_id] = entry
+    return {"entries": entries, "written": written, "unchanged": unchanged}
+
+
+def _remove_page(directory: str, page_id: int) -> None:
+    for suffix in ("", ".gz"):
+        link = os.path.join(directory, "pages", f"{page_id}.json{suffix}")
+        if os.path.lexists(link):
+            os.unlink(link)
+    shutil.rmtree(os.path.join(directory, "pages", str(page_id)), ignore_errors=True)
+
+
+def _init_process():
+    # соединения родителя закрыты до fork; дочерний процесс откроет свои
+    connections.close_all()
+
+
+def pages_to_render(manifest: Dict, existing: Iterable[int], full: bool = False) -> List[int]:
+    existing = set(existing)
+    if full or not manifest.get("exported_at"):
+        return sorted(existing)
+    since = datetime.fromisoformat(manifest["exported_at"]) - OVERLAP
+    changed = set(Page.objects.filter(content_changed_at__gte=since).values_list("pk", flat=True))
+    known = {int(pk) for pk in manifest.get("pages", {})}
+    return sorted(changed | (existing - known))
+
+
+def export_snapshots(
+    directory: Optional[str] = None,
+    workers: int = 4,
+    batch_size: int = 100,
+    full: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """Инкрементальный (full — полный) экспорт снимков. Возвращает счётчики и время."""
+    directory = directory or snapshot_dir()
+    log = log or (lambda message: None)
+    os.makedirs(os.path.join(directory, "pages"), exist_ok=True)
+    started_at = timezone.now()
+    started = time.perf_counter()
+
+    manifest = load_manifest(directory)
+    pages: Dict[int, Dict[str, str]] = {int(pk): entry for pk, entry in manifest.get("pages", {}).items()}
+    existing = set(Page.objects.values_list("pk", flat=True))
+    to_render = pages_to_render(manifest, existing, full=full)
+    log(f"К рендеру: {len(to_render)} из {len(existing)} страниц")
+
+    batches = [to_render[start:start + batch_size] for start in range(0, len(to_render), batch_size)]
+    # прежние хеши — только своей пачки, чтобы не передавать весь манифест в каждую задачу
+    hashes = [{pk: pages[pk]["hash"] for pk in batch if pk in pages} for batch in batches]
+    if workers <= 1 or len(batches) <= 1:
+        results = [_export_batch(directory, batch, previous, close=False) for batch, previous in zip(batches, hashes)]
+    else:
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(min(workers, len(batches)), mp_context=context, initializer=_init_process) as pool:
+            results = list(pool.map(_export_batch, [directory] * len(batches), batches, hashes))
+
+    rendered = set()
+    for result in results:
+        pages.update(result["entries"])
+        rendered.update(result["entries"])
+    # удалённые страницы: нет в БД или пропали между выборкой id и рендером
+    removed = (set(pages) - existing) | (set(to_render) - rendered)
+    for pk in removed:
+        pages.pop(pk, None)
+
+    _write_atomic(os.path.join(directory, MANIFEST), encode({
+        "exported_at": started_at.isoformat(),
+        "pages": {str(pk): pages[pk] for pk in sorted(pages)},
+    }))
+    # файлы удалённых страниц — после замены манифеста
+    for pk in removed:
+        _remove_page(directory, pk)
+
+    return {
+        "pages": len(pages),
+        "rendered": len(rendered),
+        "written": sum(result["written"] for result in results),
+        "unchanged": sum(result["unchanged"] for result in results),
+        "removed": len(removed),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
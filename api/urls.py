@@ -1,9 +1,19 @@
 from django.urls import path
-from api.views import PageListAPIView, PageDetailAPIView
+from api.views import (
+    PageListAPIView, PageDetailAPIView, SearchAPIView,
+    PageItemMoveAPIView, PageContentsAPIView, PageCloneAPIView,
+    ContentPagesAPIView, CountersAPIView,
+)
 
 app_name = "api"
 
 urlpatterns = [
     path("pages/", PageListAPIView.as_view(), name="page-list"),
     path("pages/<int:pk>/", PageDetailAPIView.as_view(), name="page-detail"),
+    path("pages/<int:pk>/contents/", PageContentsAPIView.as_view(), name="page-contents"),
+    path("pages/<int:pk>/clone/", PageCloneAPIView.as_view(), name="page-clone"),
+    path("pages/<int:page_pk>/items/<int:pk>/move/", PageItemMoveAPIView.as_view(), name="page-item-move"),
+    path("content/<str:type>/<int:pk>/pages/", ContentPagesAPIView.as_view(), name="content-pages"),
+    path("search/", SearchAPIView.as_view(), name="search"),
+    path("counters/", CountersAPIView.as_view(), name="counters"),
 ]
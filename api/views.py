@@ -1,10 +1,33 @@
-from rest_framework import generics
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from django.db.models import Count, Prefetch, F
+from django.db.models import Count, F
 from django.contrib.contenttypes.models import ContentType
-from content.models import Page, ContentOnPage, BaseContent, Video, Audio, Text
-from .serializers import PageListSerializer, PageDetailSerializer
+from content.models import Page, ContentOnPage, BaseContent, Video, Audio, Text, get_content_models
+from content.cloning import clone_page
+from content.composition import compose_page
+from content.search import search_content
+from content.counters import get_counter_backend
+from content.dedup import client_key, get_view_dedup
+from content.purge import surrogate_key
+from content.where_used import pages_queryset
+from monitoring.metrics import PAGE_CONTENT_TYPES, PAGE_ITEMS
+from .cache import get_page_data, page_detail_queryset
+from .counters import get_item_counters, get_page_counters, timeout as counters_timeout
+from .serializers import (
+    PageListSerializer, PageDetailSerializer,
+    SearchQuerySerializer, SearchResultSerializer,
+    MoveItemSerializer, MovedItemSerializer,
+    PageContentItemSerializer, PageCompositionSerializer,
+    ClonePageSerializer, ClonedPagesSerializer,
+    CounterQuerySerializer, CountersSerializer,
+)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -45,15 +68,15 @@ class PageListAPIView(generics.ListAPIView):
         ).order_by("-created_at").only('id', 'title', 'created_at')
 
 
-from content.tasks import increment_page_content_counters  # Celery task
-
-
 class PageDetailAPIView(generics.RetrieveAPIView):
     """
     API endpoint для получения детальной информации о странице.
     
     Оптимизации:
-        - Prefetch related для загрузки всех связанных данных за минимальное количество SQL запросов
+        - Готовый ответ берётся из кеша (api.cache), без SQL; кеш сбрасывается при изменении страницы
+        - Surrogate-Key и s-maxage (CDN_PAGE_MAX_AGE) для CDN, очистка через outbox изменений
+        - Prefetch related для загрузки всех связанных данных за минимальное количество SQL запросов:
+          2 + число типов контента на странице (generic-объекты грузятся пакетно по типам)
         - Сериализация контента с правильным порядком
         - Увеличение счетчиков контента в фоне через Celery
     """
@@ -63,27 +86,196 @@ class PageDetailAPIView(generics.RetrieveAPIView):
         """
         Оптимизированный queryset для детальной страницы с предзагрузкой.
         """
-        return Page.objects.prefetch_related(
-            Prefetch(
-                'content_items',
-                queryset=ContentOnPage.objects.select_related(
-                    'content__content_type'
-                ).order_by('order')
-            )
-        )
+        return page_detail_queryset()
 
     def retrieve(self, request, *args, **kwargs):
         """
         Обработчик GET запроса для детальной страницы.
-        Запускает Celery задачу для увеличения счетчиков.
+        Учитывает просмотр через бэкенд счётчиков (content.counters).
         """
-        instance = self.get_object()
+        data = get_page_data(self.kwargs["pk"])
+        if data is None:
+            raise NotFound()
+
+        # просмотр всех объектов страницы (повтор тем же клиентом в пределах окна не учитывается);
+        # бэкенд может подставить живые значения счётчиков
+        dedup = get_view_dedup()
+        repeat = dedup is not None and dedup.seen(client_key(request), data["id"])
+        data = get_counter_backend().record_view(data, count=not repeat)
+
+        PAGE_ITEMS.observe(len(data["contents"]))
+        PAGE_CONTENT_TYPES.observe(len({item["type"] for item in data["contents"]}))
+        response = Response(data)
+        # ключ для точечной очистки CDN (content.outbox → content.purge)
+        response["Surrogate-Key"] = surrogate_key(data["id"])
+        if settings.CDN_PAGE_MAX_AGE:
+            patch_cache_control(response, public=True, max_age=0, s_maxage=settings.CDN_PAGE_MAX_AGE)
+        return response
+
+
+class CountersAPIView(generics.GenericAPIView):
+    """
+    Живые счётчики просмотров без тел контента:
+    GET /api/counters/?page=<id> или ?items=video:1,text:7
+
+    Оптимизации:
+        - Только тройки [type, id, counter]: один запрос на тип по индексу (id, counter)
+        - Ответ и ETag кешируются на COUNTERS_CACHE_TIMEOUT секунд
+        - If-None-Match с текущим ETag — 304 без тела
+    """
+    serializer_class = CountersSerializer
+
+    def get(self, request, *args, **kwargs):
+        params = CounterQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if "page" in params.validated_data:
+            entry = get_page_counters(params.validated_data["page"])
+            if entry is None:
+                raise NotFound()
+        else:
+            entry = get_item_counters(params.validated_data["items"])
+
+        if entry["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(self.get_serializer({"counters": entry["counters"]}).data)
+        response["ETag"] = entry["etag"]
+        patch_cache_control(response, max_age=counters_timeout())
+        return response
+
+
+class ContentPagesAPIView(generics.ListAPIView):
+    """
+    Where-used: страницы, на которых размещён объект контента.
+    GET /api/content/<type>/<id>/pages/, type — video/audio/text.
+
+    Оптимизации:
+        - Подзапрос по покрывающему индексу ContentOnPage(content, page)
+          и индексу Contents(content_type, _object_id)
+        - Дубликаты обёрток Contents не размножают страницы (IN по подзапросу)
+    """
+    serializer_class = PageListSerializer
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        model = get_content_models().get(self.kwargs["type"])
+        if model is None:
+            raise NotFound("Неизвестный тип контента")
+        ct = ContentType.objects.get_for_model(model)
+        return pages_queryset(ct.pk, self.kwargs["pk"]).order_by("-created_at").only("id", "title", "created_at")
+
+
+class SearchAPIView(generics.GenericAPIView):
+    """
+    Полнотекстовый поиск по всем видам контента: GET /api/search/?q=...
+
+    Оптимизации:
+        - Поиск по теневому индексу (tsvector + GIN на PostgreSQL, FTS5 на SQLite), без LIKE
+        - Гидрация найденных объектов одним запросом на тип контента
+        - Страницы, содержащие найденное, выбираются одним запросом и ранжируются суммой рангов
+    """
+    serializer_class = SearchResultSerializer
 
-        # Запуск фоновой задачи для увеличения счетчиков всех контентов страницы
-        increment_page_content_counters.delay(instance.id)
+    def get(self, request, *args, **kwargs):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data["q"]
 
-        serializer = self.get_serializer(instance)
+        data = search_content(query, limit=params.validated_data["limit"])
+        serializer = self.get_serializer({"query": query, **data})
         return Response(serializer.data)
+
+
+class PageItemMoveAPIView(generics.GenericAPIView):
+    """
+    Перемещение элемента страницы: POST /api/pages/<page_pk>/items/<pk>/move/
+    с телом {"before": <id>} или {"after": <id>}.
+
+    Оптимизации:
+        - Разреженная нумерация order: перемещение обновляет одну строку
+        - Перенумерация страницы — только в фоне, когда промежутки исчерпаны
+    """
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = MovedItemSerializer
+
+    def get_queryset(self):
+        return ContentOnPage.objects.filter(page_id=self.kwargs["page_pk"]).only("id", "page_id", "order")
+
+    def post(self, request, *args, **kwargs):
+        params = MoveItemSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+
+        item = self.get_object()
+        target_id = params.validated_data.get("before", params.validated_data.get("after"))
+        target = get_object_or_404(self.get_queryset(), pk=target_id)
+        if "before" in params.validated_data:
+            item.move_before(target)
+        else:
+            item.move_after(target)
+        return Response(self.get_serializer(item).data)
+
+
+class PageContentsAPIView(generics.GenericAPIView):
+    """
+    Пакетная сборка страницы: PUT/PATCH /api/pages/<pk>/contents/
+    с упорядоченным списком [{"type": "video", "id": 42, "alias": "intro"}, ...].
+
+    PUT заменяет состав страницы целиком, PATCH сохраняет неперечисленные
+    элементы после перечисленных.
+
+    Оптимизации:
+        - Минимальный дифф с текущими строками: bulk_create, bulk_update и один DELETE
+        - Валидация существования объектов — один запрос на тип контента
+        - Всё в одной транзакции
+    """
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = PageCompositionSerializer
+    queryset = Page.objects.only("id")
+
+    def put(self, request, *args, **kwargs):
+        return self._compose(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self._compose(request, partial=True)
+
+    def _compose(self, request, partial):
+        page = self.get_object()
+        items = PageContentItemSerializer(data=request.data, many=True)
+        items.is_valid(raise_exception=True)
+        try:
+            result = compose_page(page, items.validated_data, partial=partial)
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.messages)
+        return Response(self.get_serializer(result).data)
+
+
+class PageCloneAPIView(generics.GenericAPIView):
+    """
+    Клонирование страницы: POST /api/pages/<pk>/clone/
+    с телом {"count": 1, "title": "...", "targets": [<page_id>, ...]}.
+
+    Оптимизации:
+        - Элементы копируются одним INSERT … SELECT в БД
+        - Число запросов не зависит от размера страницы и числа копий
+    """
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = ClonedPagesSerializer
+    queryset = Page.objects.only("id", "title")
+
+    def post(self, request, *args, **kwargs):
+        source = self.get_object()
+        params = ClonePageSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        try:
+            result = clone_page(
+                source,
+                count=params.validated_data["count"],
+                title=params.validated_data.get("title"),
+                target_ids=params.validated_data["targets"],
+            )
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.messages)
+        return Response(self.get_serializer(result).data, status=status.HTTP_201_CREATED)
 # class PageDetailAPIView(generics.RetrieveAPIView):
 #     """
 #     API endpoint для получения детальной информации о странице.
@@ -0,0 +1,118 @@
+"""
+Прогрев кеша /api/pages/<id>/ после деплоя или сброса кеша.
+
+Страницы — явный список или top-N по сумме счётчиков просмотров их
+контента (один агрегирующий запрос). Рендер идёт пачками (render_pages:
+2 + число типов запросов на пачку) в пуле процессов; соединения с БД
+родителя закрываются до fork, каждый процесс открывает своё. Скорость
+ограничивается суммарно (rate страниц/с на все процессы — у каждой пачки
+своё время старта), чтобы прогрев сам не нагружал primary. Процессы пишут в общий кеш, поэтому с локальным
+кешем процесса (LocMemCache) прогрев выполняется в текущем процессе.
+"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+
+from api.cache import cached_page_ids, page_generations, render_pages, store_pages
+from content.models import Page, get_content_models
+
+
+def top_pages(limit: int) -> List[int]:
+    """id страниц с наибольшей суммой счётчиков размещённого контента."""
+    views = sum(
+        (Coalesce(f"content_items__content__{name}__counter", Value(0)) for name in get_content_models()),
+        Value(0),
+    )
+    return list(
+        Page.objects.annotate(views=Sum(views))
+        .filter(views__gt=0)
+        .order_by("-views", "pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+
+
+def shared_cache() -> bool:
+    """Видят ли другие процессы записи в кеш (Redis, Memcached, БД, файлы)."""
+    return not cache.__class__.__module__.endswith(("locmem", "dummy"))
+
+
+def _warm_batch(batch: List[int], not_before: float, close: bool = True) -> Dict[str, int]:
+    """Рендер одной пачки; not_before — время (time.time()), раньше которого начинать нельзя."""
+    delay = not_before - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    try:
+        generations = page_generations(batch)
+        rendered = render_pages(batch)
+        store_pages(rendered, generations)
+    finally:
+        if close:
+            connection.close()
+    return {"warmed": len(rendered), "missing": len(batch) - len(rendered)}
+
+
+def _init_process():
+    # соединения родителя закрыты до fork; дочерний процесс откроет свои
+    connections.close_all()
+
+
+def warm_pages(
+    page_ids: Sequence[int],
+    workers: int = 4,
+    batch_size: int = 50,
+    rate: Optional[float] = None,
+    force: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """
+    Рендерит страницы в кеш. Уже закешированные пропускаются (force — перерендерить).
+    rate — суммарный предел, страниц/с. Возвращает счётчики и время.
+    """
+    log = log or (lambda message: None)
+    page_ids = list(dict.fromkeys(page_ids))
+    skipped = 0
+    if not force:
+        cached = set(cached_page_ids(page_ids))
+        skipped = len(cached)
+        page_ids = [pk for pk in page_ids if pk not in cached]
+
+    if workers > 1 and not shared_cache():
+        log("Кеш локальный для процесса — прогрев в текущем процессе")
+        workers = 1
+
+    batches = [page_ids[start:start + batch_size] for start in range(0, len(page_ids), batch_size)]
+    # общий темп для всех процессов: пачка начинается не раньше, чем позволяет rate
+    # для уже отданных страниц, — без общего состояния между процессами
+    started_at = time.time()
+    schedule, offset = [], 0
+    for batch in batches:
+        schedule.append(started_at + offset / rate if rate else 0.0)
+        offset += len(batch)
+
+    started = time.perf_counter()
+    if workers <= 1 or len(batches) <= 1:
+        results = [_warm_batch(batch, not_before, close=False) for batch, not_before in zip(batches, schedule)]
+    else:
+        workers = min(workers, len(batches))
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_process) as pool:
+            results = list(pool.map(_warm_batch, batches, schedule))
+    elapsed = time.perf_counter() - started
+
+    report: Dict[str, object] = {
+        "requested": len(page_ids) + skipped,
+        "skipped": skipped,
+        "warmed": sum(result["warmed"] for result in results),
+        "missing": sum(result["missing"] for result in results),
+        "workers": max(workers, 1),
+        "seconds": round(elapsed, 3),
+    }
+    report["pages_per_second"] = round(report["warmed"] / elapsed, 1) if elapsed else None
+    return report
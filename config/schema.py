@@ -0,0 +1,47 @@
+"""
+Ленивые view схемы OpenAPI.
+
+drf_spectacular импортируется только при первом обращении к документации,
+а не при загрузке URLconf. Если при сборке образа схема сгенерирована
+(manage.py spectacular --file openapi-schema.yml), /api/schema/ отдаёт
+готовый файл без генерации на каждый запрос.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+@lru_cache(maxsize=None)
+def _spectacular_view(name: str):
+    from drf_spectacular import views
+
+    if name == "schema":
+        return views.SpectacularAPIView.as_view()
+    view_class = views.SpectacularSwaggerView if name == "swagger" else views.SpectacularRedocView
+    return view_class.as_view(url_name="schema")
+
+
+@lru_cache(maxsize=1)
+def _pregenerated_schema():
+    path = getattr(settings, "OPENAPI_SCHEMA_FILE", None)
+    if not path or not Path(path).is_file():
+        return None
+    return Path(path).read_bytes()
+
+
+def schema_view(request, *args, **kwargs):
+    # ?format=json и прочие параметры — к генератору; по умолчанию — готовый YAML
+    schema = None if request.GET else _pregenerated_schema()
+    if schema is not None:
+        return HttpResponse(schema, content_type="application/vnd.oai.openapi; charset=utf-8")
+    return _spectacular_view("schema")(request, *args, **kwargs)
+
+
+def swagger_view(request, *args, **kwargs):
+    return _spectacular_view("swagger")(request, *args, **kwargs)
+
+
+def redoc_view(request, *args, **kwargs):
+    return _spectacular_view("redoc")(request, *args, **kwargs)
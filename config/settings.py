@@ -27,12 +27,141 @@ INSTALLED_APPS = [
 
     'content',
     'api',
+    'monitoring',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Схема OpenAPI, сгенерированная при сборке образа (manage.py spectacular --file ...);
+# если файла нет, /api/schema/ генерирует её на лету
+OPENAPI_SCHEMA_FILE = os.getenv("OPENAPI_SCHEMA_FILE", str(BASE_DIR / "openapi-schema.yml"))
+
+# ---------------- SEARCH ----------------
+# Конфигурация текстового поиска PostgreSQL (to_tsvector/websearch_to_tsquery)
+CONTENT_SEARCH_CONFIG = os.getenv("CONTENT_SEARCH_CONFIG", "russian")
+
+# ---------------- METRICS ----------------
+# Каталог снимков метрик процессов (gunicorn/Celery prefork): /metrics суммирует их.
+# Не задан — метрики только текущего процесса.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+# Очереди Celery, длина которых отдаётся в /metrics (через запятую; пусто — не опрашивать брокер)
+METRICS_CELERY_QUEUES = [q for q in os.getenv("METRICS_CELERY_QUEUES", "").split(",") if q]
+# Доступ к /metrics: адреса/сети (через запятую) или заголовок Authorization: Bearer <METRICS_TOKEN>
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Профилирование запроса по требованию (staff, заголовок X-Profile или ?profile=).
+# По умолчанию выключено; включается явно в dev/staging (PROFILING_ENABLED=True)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+# Каталог для сохранения профилей и списков SQL (пусто — только ответ)
+PROFILING_DIR = os.getenv("PROFILING_DIR", "")
+
+# Журнал медленных запросов: порог в мс (пусто — выключен), доля EXPLAIN ANALYZE для SELECT,
+# файл с ротацией (пусто — в stderr)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS")) if os.getenv("SLOW_QUERY_MS") else None
+SLOW_QUERY_ANALYZE_RATE = float(os.getenv("SLOW_QUERY_ANALYZE_RATE", "0"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "")
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+            'delay': True,
+        } if SLOW_QUERY_LOG else {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'monitoring.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# ---------------- CACHE ----------------
+# Общий кеш (Redis) для web и воркеров: CACHE_URL=redis://localhost:6379/1.
+# Без CACHE_URL — локальный кеш процесса (разработка, тесты).
+CACHE_URL = os.getenv("CACHE_URL", "")
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+# Время жизни закешированного ответа /api/pages/<id>/ (секунды, 0 — без кеша).
+# Состав страницы инвалидируется сразу, счётчики в ответе отстают не более чем на это время.
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "300"))
+# Сколько после истечения TTL ещё отдавать устаревший ответ, пока один запрос его пересобирает
+PAGE_CACHE_STALE = int(os.getenv("PAGE_CACHE_STALE", "60"))
+# Сколько запрос ждёт чужой рендер той же страницы (секунды), прежде чем рендерить сам
+PAGE_CACHE_WAIT = float(os.getenv("PAGE_CACHE_WAIT", "2"))
+
+# ---------------- CDN ----------------
+# s-maxage ответа /api/pages/<id>/ для CDN (0 — без Cache-Control); изменения страниц
+# попадают в outbox и очищаются задачей content.tasks.drain_page_outbox
+CDN_PAGE_MAX_AGE = int(os.getenv("CDN_PAGE_MAX_AGE", "0"))
+CDN_BASE_URL = os.getenv("CDN_BASE_URL", "")
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL", "")
+if CDN_PURGE_URL:
+    CDN_PURGE_BACKEND = "content.purge.HttpPurgeBackend"
+    CDN_PURGE_OPTIONS = {"endpoint": CDN_PURGE_URL, "token": os.getenv("CDN_PURGE_TOKEN") or None}
+else:
+    CDN_PURGE_BACKEND = os.getenv("CDN_PURGE_BACKEND", "content.purge.NullPurgeBackend")
+    CDN_PURGE_OPTIONS = {}
+
+# Каталог статических снимков /api/pages/<id>/ (manage.py export_snapshots)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", str(BASE_DIR / "snapshots"))
+
+# ---------------- СЧЁТЧИКИ ПРОСМОТРОВ ----------------
+# content.counters.DatabaseCounterBackend — задача Celery с UPDATE в БД на каждый просмотр;
+# content.counters.RedisCounterBackend — HINCRBY в Redis (COUNTER_REDIS_URL), живые значения
+# в ответе, перенос в БД задачей content.tasks.reconcile_counters раз в COUNTER_RECONCILE_INTERVAL
+CONTENT_COUNTER_BACKEND = os.getenv("CONTENT_COUNTER_BACKEND", "content.counters.DatabaseCounterBackend")
+CONTENT_COUNTER_OPTIONS = {}
+COUNTER_REDIS_URL = os.getenv("COUNTER_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+# Кеш ответа GET /api/counters/ (секунды; он же max-age для клиентов)
+COUNTERS_CACHE_TIMEOUT = int(os.getenv("COUNTERS_CACHE_TIMEOUT", "5"))
+# Повторные просмотры страницы одним клиентом в пределах окна не учитываются:
+# content.dedup.LocalViewDedup (память процесса) или content.dedup.RedisViewDedup (общий Redis);
+# пусто — выключено. Окно, ожидаемое число пар клиент–страница за сегмент окна, доля ложных повторов
+VIEW_DEDUP_BACKEND = os.getenv("VIEW_DEDUP_BACKEND", "")
+VIEW_DEDUP_OPTIONS = {
+    "window": float(os.getenv("VIEW_DEDUP_WINDOW", "1800")),
+    "capacity": int(os.getenv("VIEW_DEDUP_CAPACITY", "100000")),
+    "fpr": float(os.getenv("VIEW_DEDUP_FPR", "0.001")),
+}
+# число доверенных прокси перед приложением: адрес клиента берётся из X-Forwarded-For
+# по записи, дописанной внешним из них; 0 — REMOTE_ADDR (заголовок не учитывается)
+VIEW_DEDUP_PROXY_HOPS = int(os.getenv("VIEW_DEDUP_PROXY_HOPS", "0"))
+
+# ---------------- СЖАТИЕ ТЕКСТОВ ----------------
+# Text.body / Audio.transcript: "zlib" или "zstd" (пакет zstandard); короче порога не сжимаются
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "zlib")
+CONTENT_COMPRESSION_MIN_BYTES = int(os.getenv("CONTENT_COMPRESSION_MIN_BYTES", "512"))
+
 # ---------------- CELERY ----------------
 CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -40,8 +169,26 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Moscow'
+# Выполнять задачи синхронно в процессе web (локальная отладка и нагрузочные прогоны без брокера)
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+# Периодические задачи (celery -A config beat)
+CELERY_BEAT_SCHEDULE = {
+    'sweep-orphaned-contents': {
+        'task': 'content.tasks.sweep_orphaned_contents',
+        'schedule': float(os.getenv("SWEEP_ORPHANS_INTERVAL", "3600")),
+    },
+    'drain-page-outbox': {
+        'task': 'content.tasks.drain_page_outbox',
+        'schedule': float(os.getenv("OUTBOX_DRAIN_INTERVAL", "10")),
+    },
+    'reconcile-counters': {
+        'task': 'content.tasks.reconcile_counters',
+        'schedule': float(os.getenv("COUNTER_RECONCILE_INTERVAL", "30")),
+    },
+}
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +196,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -0,0 +1,23 @@
+"""
+Облегчённый профиль настроек для Celery-воркера:
+DJANGO_SETTINGS_MODULE=config.settings_worker celery -A config worker
+
+Воркеру нужны только модели контента и модули задач: admin, sessions,
+auth, DRF, drf_spectacular, шаблоны и middleware не загружаются, что
+ускоряет холодный старт контейнера и автомасштабирование.
+"""
+from config.settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'content',
+    'api',          # api.tasks
+    'monitoring',   # метрики задач и журнал медленных запросов
+]
+
+MIDDLEWARE = []
+TEMPLATES = []
+ROOT_URLCONF = None
+REST_FRAMEWORK = {}
+AUTH_PASSWORD_VALIDATORS = []
+STATIC_URL = None
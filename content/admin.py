@@ -1,20 +1,109 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.contrib.contenttypes.models import ContentType
 from .models import (
     Page, ContentOnPage, Contents,
     Video, Audio, Text, BaseContent
     )
+from .cloning import clone_page
+from .signals import delete_content, delete_wrappers
+
+
+# ---------------- Пагинация без COUNT(*) по всей таблице ----------------
+class EstimatedCountPaginator(Paginator):
+    """
+    Для нефильтрованного списка на PostgreSQL берёт оценку pg_class.reltuples
+    вместо COUNT(*) (полный проход по таблице на миллионах строк).
+    Небольшие таблицы и отфильтрованные списки считаются точно.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where and connections[qs.db].vendor == "postgresql":
+            with connections[qs.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [qs.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return int(row[0])
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist, время загрузки которого не растёт с размером таблицы."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # без второго COUNT(*) при поиске/фильтрах
 
 
 # ---------------- Inline ----------------
+class ContentRawIdWidget(ForeignKeyRawIdWidget):
+    """
+    Поле id обёртки без подписи: стандартный raw-id виджет на каждую строку
+    делает SELECT обёртки и разрешает GFK для подписи. Объект показывается
+    колонкой preview_object из пакетно загруженных данных.
+    """
+
+    def label_and_url_for_value(self, value):
+        return "", ""
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline-формсет, показывающий одну страницу элементов (?items_page=N).
+    Номер страницы остаётся в URL формы, поэтому POST сопоставляет формы
+    с теми же объектами.
+    """
+    per_page = 50
+    page_param = "items_page"
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_queryset"):
+            paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = paginator.get_page(self.page_number)
+            self._page_queryset = self.page.object_list
+        return self._page_queryset
+
+
 class ContentOnPageInline(admin.TabularInline):
-    """Элементы контента на странице."""
+    """Элементы контента на странице (постранично, объекты контента — одним запросом на тип)."""
     model = ContentOnPage
     extra = 1
     fields = ("order", "content", "preview_object")
     readonly_fields = ("preview_object",)
     ordering = ("order",)
+    raw_id_fields = ("content",)
+    formset = PaginatedInlineFormSet
+    template = "admin/content/paginated_tabular.html"
+
+    def get_queryset(self, request):
+        # page — для подписи строки (ContentOnPage.__str__), content_object — одним запросом на тип
+        return super().get_queryset(request).select_related("page", "content__content_type").prefetch_related(
+            "content__content_object"
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            page_number = int(request.GET.get(PaginatedInlineFormSet.page_param, 1))
+        except ValueError:
+            page_number = 1
+        return type(formset.__name__, (formset,), {"page_number": page_number})
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "content":
+            kwargs["widget"] = ContentRawIdWidget(db_field.remote_field, self.admin_site)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     def preview_object(self, obj):
         """Показывает реальный объект контента (Video, Audio, Text...)"""
@@ -27,21 +116,52 @@ class ContentOnPageInline(admin.TabularInline):
 
 # ---------------- Page ----------------
 @admin.register(Page)
-class PageAdmin(admin.ModelAdmin):
+class PageAdmin(LargeTableAdmin):
     """Страницы."""
     list_display = ("title", "created_at", "contents_count")
     search_fields = ("^title",)
     ordering = ("-created_at",)
     inlines = [ContentOnPageInline]
-
+    actions = ["clone_pages"]
+
+    def get_queryset(self, request):
+        # коррелированный подзапрос по индексу (page, order) считается только
+        # для строк текущей страницы changelist, а не GROUP BY по всей таблице
+        items = (
+            ContentOnPage.objects.filter(page=OuterRef("pk"))
+            .order_by()
+            .values("page")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return super().get_queryset(request).annotate(
+            _contents_count=Coalesce(Subquery(items, output_field=IntegerField()), 0)
+        )
+
+    @admin.display(description="Кол-во элементов", ordering="_contents_count")
     def contents_count(self, obj):
-        return obj.content_items.count()
-    contents_count.short_description = "Кол-во элементов"
+        return obj._contents_count
+
+    @admin.action(description="Клонировать выбранные страницы")
+    def clone_pages(self, request, queryset):
+        """Копии страниц создаются INSERT … SELECT, без поштучного сохранения элементов."""
+        pages = items = 0
+        for page in queryset.only("id", "title"):
+            result = clone_page(page)
+            pages += len(result["pages"])
+            items += result["items"]
+        self.message_user(request, f"Создано страниц: {pages}, элементов: {items}", messages.SUCCESS)
 
 
 # ---------------- Base Content Models ----------------
+class BaseContentAdmin(LargeTableAdmin):
+    def delete_queryset(self, request, queryset):
+        # «удалить выбранные»: страницы и поисковый индекс — пачкой, а не запросом на объект
+        delete_content(queryset)
+
+
 @admin.register(Video)
-class VideoAdmin(admin.ModelAdmin):
+class VideoAdmin(BaseContentAdmin):
     """Видео."""
     list_display = ("title", "created_at", "counter")
     search_fields = ("^title",)
@@ -49,7 +169,7 @@ class VideoAdmin(admin.ModelAdmin):
 
 
 @admin.register(Audio)
-class AudioAdmin(admin.ModelAdmin):
+class AudioAdmin(BaseContentAdmin):
     """Аудио."""
     list_display = ("title", "created_at", "counter")
     search_fields = ("^title",)
@@ -57,7 +177,7 @@ class AudioAdmin(admin.ModelAdmin):
 
 
 @admin.register(Text)
-class TextAdmin(admin.ModelAdmin):
+class TextAdmin(BaseContentAdmin):
     """Текст."""
     list_display = ("title", "created_at", "counter")
     search_fields = ("^title",)
@@ -66,10 +186,17 @@ class TextAdmin(admin.ModelAdmin):
 
 # ---------------- Contents Wrapper ----------------
 @admin.register(Contents)
-class ContentsAdmin(admin.ModelAdmin):
+class ContentsAdmin(LargeTableAdmin):
     """Обёртка для конкретного объекта контента (Video/Audio/Text/...)."""
     list_display = ("id", "content_type", "object_id", "preview_object")
-    search_fields = ("object_id", "content_type__model")
+    search_fields = ("=_object_id", "content_type__model")
+
+    def get_queryset(self, request):
+        # объекты контента строк changelist — одним запросом на тип
+        return super().get_queryset(request).prefetch_related("content_object")
+
+    def delete_queryset(self, request, queryset):
+        delete_wrappers(queryset)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """
@@ -0,0 +1,128 @@
+"""
+Серверное клонирование страниц.
+
+Элементы страницы копируются одним INSERT … SELECT прямо в БД, без
+загрузки ContentOnPage в Python и без MAX(order) на каждую строку:
+число SQL-запросов не зависит ни от размера страницы, ни от числа копий.
+
+Существующие целевые страницы блокируются (SELECT … FOR UPDATE) до вставки:
+параллельные клоны в одну страницу выполняются по очереди, и MAX(order)
+второго видит строки первого. Если order копии вышел бы за MAX_ORDER,
+исходная и переполненные целевые страницы сначала перенумеровываются с
+шагом ORDER_GAP; если места нет и после этого — клонирование отклоняется.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from content import ordering
+from content.models import ContentOnPage, Page
+from content.signals import notify_pages_changed
+
+
+def _copy_items_sql() -> str:
+    qn = connection.ops.quote_name
+    items = qn(ContentOnPage._meta.db_table)
+    pages = qn(Page._meta.db_table)
+    page_id = qn(ContentOnPage._meta.get_field("page").column)
+    content_id = qn(ContentOnPage._meta.get_field("content").column)
+    order = qn(ContentOnPage._meta.get_field("order").column)
+    alias = qn(ContentOnPage._meta.get_field("alias").column)
+    return (
+        f"INSERT INTO {items} ({page_id}, {content_id}, {order}, {alias}) "
+        f"SELECT p.id, src.{content_id}, "
+        f"src.{order} + COALESCE((SELECT MAX(e.{order}) FROM {items} e WHERE e.{page_id} = p.id), 0), "
+        f"src.{alias} "
+        f"FROM {items} src CROSS JOIN {pages} p "
+        f"WHERE src.{page_id} = %s AND p.id IN ({{targets}}) "
+        f"AND NOT EXISTS (SELECT 1 FROM {items} x "
+        f"WHERE x.{page_id} = p.id AND x.{content_id} = src.{content_id})"
+    )
+
+
+def copy_page_items(source_id: int, target_ids: List[int]) -> int:
+    """
+    Копирует элементы страницы source_id в конец каждой из страниц target_ids
+    (уже размещённый на целевой странице контент пропускается).
+    Один INSERT … SELECT. Возвращает число созданных строк.
+    """
+    target_ids = [pk for pk in target_ids if pk != source_id]
+    if not target_ids:
+        return 0
+    sql = _copy_items_sql().format(targets=", ".join(["%s"] * len(target_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [source_id, *target_ids])
+        return cursor.rowcount
+
+
+def _max_orders(page_ids: List[int]) -> Dict[int, int]:
+    rows = (
+        ContentOnPage.objects.filter(page_id__in=page_ids)
+        .values("page_id")
+        .annotate(last=Max("order"))
+        .values_list("page_id", "last")
+        .order_by()
+    )
+    return dict(rows)
+
+
+def _overflowing(source_id: int, target_ids: List[int]) -> List[int]:
+    """Целевые страницы, на которых order копии превысил бы MAX_ORDER."""
+    last = _max_orders([source_id, *target_ids])
+    source_last = last.get(source_id, 0)
+    return [pk for pk in target_ids if source_last + last.get(pk, 0) > ordering.MAX_ORDER]
+
+
+def _make_room(source_id: int, target_ids: List[int]) -> None:
+    """Перенумеровывает страницы, если копия не помещается в MAX_ORDER (редкий случай)."""
+    overflowing = _overflowing(source_id, target_ids)
+    if not overflowing:
+        return
+    for page_id in [source_id, *overflowing]:
+        ordering.rebalance_page(page_id)
+    overflowing = _overflowing(source_id, overflowing)
+    if overflowing:
+        raise ValidationError(
+            f"Недостаточно места для элементов на страницах: {', '.join(map(str, overflowing))}"
+        )
+
+
+def clone_page(
+    source: Page,
+    count: int = 1,
+    title: Optional[str] = None,
+    target_ids: Optional[Iterable[int]] = None,
+) -> Dict:
+    """
+    Клонирует страницу:
+
+    - создаёт count новых страниц с копией всех элементов source;
+    - дополнительно дописывает элементы source в существующие страницы target_ids.
+
+    Всё в одной транзакции и постоянным числом запросов: блокировка и
+    проверка целей, MAX(order) страниц, bulk_create страниц, один
+    INSERT … SELECT для всех элементов.
+    """
+    target_ids = list(dict.fromkeys(target_ids or []))
+    with transaction.atomic():
+        if target_ids:
+            found = set(
+                Page.objects.select_for_update().filter(pk__in=target_ids).order_by("pk").values_list("pk", flat=True)
+            )
+            missing = [pk for pk in target_ids if pk not in found]
+            if missing:
+                raise ValidationError(f"Страницы не найдены: {', '.join(map(str, missing))}")
+            _make_room(source.pk, [pk for pk in target_ids if pk != source.pk])
+
+        new_pages: List[Page] = []
+        if count:
+            new_pages = Page.objects.bulk_create(
+                [Page(title=title or f"{source.title} (копия)") for _ in range(count)]
+            )
+
+        items = copy_page_items(source.pk, [page.pk for page in new_pages] + target_ids)
+        if items:
+            notify_pages_changed(target_ids, sender=Page)
+    return {"pages": [page.pk for page in new_pages], "targets": target_ids, "items": items}
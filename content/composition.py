@@ -0,0 +1,156 @@
+"""
+Пакетная сборка страницы по желаемому списку элементов.
+
+Вместо поштучного сохранения через админку (clean() + exists() и MAX(order)
+на каждый элемент) вычисляется минимальный дифф с текущими строками
+ContentOnPage и применяется bulk_create/bulk_update и одним DELETE
+в одной транзакции. Вся валидация — запросами по множествам.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from content.models import ContentOnPage, Contents, Page, get_content_models
+from content.ordering import assign_orders
+from content.signals import notify_pages_changed
+
+# (content_type_id, object_id)
+ContentKey = Tuple[int, int]
+
+
+def _content_types() -> Dict[str, ContentType]:
+    models = get_content_models()
+    cts = ContentType.objects.get_for_models(*models.values())
+    return {name: cts[model] for name, model in models.items()}
+
+
+def _validate_items(items: List[Dict], cts: Dict[str, ContentType]) -> List[Tuple[ContentKey, Optional[str]]]:
+    """
+    Проверяет типы, дубликаты и существование объектов
+    (один запрос на тип контента). Возвращает [(ключ, alias), ...].
+    """
+    errors: List[str] = []
+    desired: List[Tuple[ContentKey, Optional[str]]] = []
+    seen = set()
+    ids_by_type: Dict[str, set] = {}
+    for item in items:
+        type_name = item["type"]
+        if type_name not in cts:
+            errors.append(f"Неизвестный тип контента: {type_name}")
+            continue
+        key = (cts[type_name].pk, item["id"])
+        if key in seen:
+            errors.append(f"Объект {type_name} с id={item['id']} указан несколько раз")
+            continue
+        seen.add(key)
+        ids_by_type.setdefault(type_name, set()).add(item["id"])
+        desired.append((key, item.get("alias") or None))
+
+    models = get_content_models()
+    for type_name, ids in ids_by_type.items():
+        found = set(models[type_name].objects.filter(pk__in=ids).values_list("pk", flat=True))
+        for missing in sorted(ids - found):
+            errors.append(f"Объект {models[type_name].__name__} с id={missing} не найден")
+
+    if errors:
+        raise ValidationError(errors)
+    return desired
+
+
+def _wrappers_for(keys: Iterable[ContentKey]) -> Dict[ContentKey, int]:
+    """id обёрток Contents для ключей (недостающие создаются INSERT … ON CONFLICT)."""
+    return {key: wrapper.pk for key, wrapper in Contents.objects.ensure_for_keys(keys).items()}
+
+
+def compose_page(page: Page, items: List[Dict], partial: bool = False) -> Dict:
+    """
+    Приводит элементы страницы к желаемому упорядоченному списку
+    [{"type": "video", "id": 42, "alias": "intro"}, ...].
+
+    partial=False (PUT): элементы, которых нет в списке, удаляются.
+    partial=True (PATCH): такие элементы сохраняются и следуют за
+    перечисленными в прежнем порядке.
+
+    Возвращает счётчики изменений и итоговый список элементов.
+    """
+    cts = _content_types()
+    names_by_ct = {ct.pk: name for name, ct in cts.items()}
+    desired = _validate_items(items, cts)
+
+    with transaction.atomic():
+        # сериализуем параллельные сборки одной страницы
+        Page.objects.select_for_update().filter(pk=page.pk).values_list("pk", flat=True).first()
+
+        current: Dict[ContentKey, Dict] = {}
+        duplicates: List[int] = []
+        rows = (
+            ContentOnPage.objects.filter(page=page)
+            .order_by("order", "pk")
+            .values("pk", "content_id", "order", "alias", "content__content_type_id", "content___object_id")
+        )
+        for row in rows:
+            key = (row["content__content_type_id"], row["content___object_id"])
+            if key in current:
+                # один объект через разные обёртки — лишние строки удаляем
+                duplicates.append(row["pk"])
+            else:
+                current[key] = row
+
+        aliases = dict(desired)
+        sequence = [key for key, _ in desired]
+        if partial:
+            rest = [key for key in current if key not in aliases]
+            sequence += rest
+            aliases.update({key: current[key]["alias"] for key in rest})
+
+        wrappers = _wrappers_for([key for key in sequence if key not in current])
+        orders = assign_orders([current[key]["order"] if key in current else None for key in sequence])
+
+        to_create: List[ContentOnPage] = []
+        to_update: List[ContentOnPage] = []
+        result_items: List[Tuple[ContentKey, ContentOnPage]] = []
+        unchanged = 0
+        for key, order in zip(sequence, orders):
+            alias = aliases[key]
+            row = current.get(key)
+            if row is None:
+                obj = ContentOnPage(page=page, content_id=wrappers[key], order=order, alias=alias)
+                to_create.append(obj)
+            else:
+                obj = ContentOnPage(pk=row["pk"], page=page, content_id=row["content_id"], order=order, alias=alias)
+                if row["order"] != order or row["alias"] != alias:
+                    to_update.append(obj)
+                else:
+                    unchanged += 1
+            result_items.append((key, obj))
+
+        sequence_keys = set(sequence)
+        to_delete = [row["pk"] for key, row in current.items() if key not in sequence_keys] + duplicates
+
+        if to_delete:
+            ContentOnPage.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            ContentOnPage.objects.bulk_update(to_update, ["order", "alias"], batch_size=1000)
+        if to_create:
+            ContentOnPage.objects.bulk_create(to_create, batch_size=1000)
+        if to_delete or to_update or to_create:
+            notify_pages_changed([page.pk], sender=Page)
+
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "deleted": len(to_delete),
+        "unchanged": unchanged,
+        "items": [
+            {
+                "id": obj.pk,
+                "type": names_by_ct[key[0]],
+                "object_id": key[1],
+                "order": obj.order,
+                "alias": obj.alias,
+            }
+            for key, obj in result_items
+        ],
+    }
@@ -0,0 +1,114 @@
+"""
+Формат хранения сжатого текста (CompressedTextField).
+
+Значение в колонке — байты:
+    b"\\xffz" + zlib    — сжато zlib;
+    b"\\xffs" + zstd    — сжато zstd (нужен пакет zstandard);
+    иначе               — UTF-8 как есть (короткие тексты и строки до перепаковки).
+Байт 0xFF не встречается в UTF-8, поэтому маркер однозначен. Строки,
+записанные до перехода на сжатие (text в SQLite), читаются как есть.
+
+Настройки: CONTENT_COMPRESSION ("zlib" | "zstd"), CONTENT_COMPRESSION_LEVEL,
+CONTENT_COMPRESSION_MIN_BYTES — короче этого текст не сжимается.
+"""
+import zlib
+from typing import Optional, Union
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # zstd — опционально, zlib есть всегда
+    zstandard = None
+
+MARKER = b"\xff"
+ALGORITHMS = {"zlib": b"z", "zstd": b"s"}
+
+
+class CompressedText:
+    """Сжатое значение из БД: распаковывается только при обращении к .text."""
+
+    __slots__ = ("payload", "_text")
+
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = decompress(self.payload)
+        return self._text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"<CompressedText {self.payload[:2]!r} {len(self.payload)} bytes>"
+
+    def __eq__(self, other):
+        if isinstance(other, CompressedText):
+            return self.text == other.text
+        return self.text == other
+
+    def __hash__(self):
+        return hash(self.text)
+
+
+def _algorithm(name: Optional[str]) -> str:
+    name = name or getattr(settings, "CONTENT_COMPRESSION", "zlib")
+    if name not in ALGORITHMS:
+        raise ImproperlyConfigured(f"Неизвестный алгоритм сжатия: {name}")
+    if name == "zstd" and zstandard is None:
+        raise ImproperlyConfigured("CONTENT_COMPRESSION=zstd требует пакет zstandard")
+    return name
+
+
+def compress(text: str, algorithm: Optional[str] = None, min_bytes: Optional[int] = None) -> bytes:
+    """Байты для колонки: сжатые с маркером или UTF-8, если сжатие не выгодно."""
+    raw = text.encode("utf-8")
+    if min_bytes is None:
+        min_bytes = getattr(settings, "CONTENT_COMPRESSION_MIN_BYTES", 512)
+    if len(raw) < min_bytes:
+        return raw
+    algorithm = _algorithm(algorithm)
+    level = getattr(settings, "CONTENT_COMPRESSION_LEVEL", None)
+    if algorithm == "zstd":
+        packed = zstandard.ZstdCompressor(level=level or 3).compress(raw)
+    else:
+        packed = zlib.compress(raw, level or 6)
+    stored = MARKER + ALGORITHMS[algorithm] + packed
+    return stored if len(stored) < len(raw) else raw
+
+
+def decompress(stored: bytes) -> str:
+    if not stored.startswith(MARKER):
+        return stored.decode("utf-8")
+    kind, packed = stored[1:2], stored[2:]
+    if kind == ALGORITHMS["zlib"]:
+        return zlib.decompress(packed).decode("utf-8")
+    if kind == ALGORITHMS["zstd"]:
+        if zstandard is None:
+            raise ImproperlyConfigured("Значение сжато zstd, а пакет zstandard не установлен")
+        return zstandard.ZstdDecompressor().decompress(packed).decode("utf-8")
+    raise ValueError(f"Неизвестный маркер сжатия: {stored[:2]!r}")
+
+
+def from_stored(value) -> Union[None, str, CompressedText]:
+    """Значение из БД → str (несжатое) или CompressedText (без распаковки)."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)  # memoryview (psycopg2)
+    if value.startswith(MARKER):
+        return CompressedText(value)
+    return value.decode("utf-8")
+
+
+def stored_size(value) -> int:
+    """Размер значения в колонке, байт."""
+    if value is None:
+        return 0
+    if isinstance(value, CompressedText):
+        return len(value.payload)
+    return len(value.encode("utf-8"))
@@ -0,0 +1,219 @@
+"""
+Бенчмарк конкуренции за счётчики просмотров.
+
+N потоков (или процессов) увеличивают счётчики пересекающихся наборов
+объектов через каждую из стратегий инкремента, зарегистрированных в
+COUNTER_STRATEGIES. Для каждой стратегии и уровня параллелизма считаются
+инкременты в секунду, оценка ожидания блокировок и потерянные/задвоенные
+инкременты (сверка прироста счётчиков в БД с числом выполненных операций).
+
+Ожидание блокировок оценивается как превышение латентности операции над
+медианой той же операции без конкуренции (1 поток) — на любой СУБД
+без доступа к системным представлениям.
+"""
+import multiprocessing
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connection, connections, transaction
+
+from content.models import ContentOnPage, Contents, Page, Video
+from content.signals import delete_content, delete_wrappers
+
+# (страница, id объектов Video на ней)
+Target = Tuple[int, List[int]]
+BENCH_TITLE = "counter-contention-bench"
+
+
+# ---------------- Стратегии инкремента ----------------
+def _per_object(target: Target) -> None:
+    """BaseContent.increment_counter: отдельный UPDATE … F('counter') + 1 на каждый объект."""
+    _, ids = target
+    for pk in ids:
+        Video(pk=pk).increment_counter()
+
+
+def _page_task(target: Target) -> None:
+    """content.tasks.increment_page_content_counters: один UPDATE на тип контента страницы."""
+    from content.tasks import increment_page_content_counters
+
+    increment_page_content_counters(target[0])
+
+
+def _typed_task(target: Target) -> None:
+    """api.tasks.increment_content_counters: один UPDATE на тип внутри транзакции."""
+    from api.tasks import increment_content_counters
+
+    _, ids = target
+    increment_content_counters.run(ids, ["video"] * len(ids))
+
+
+def _sorted_per_object(target: Target) -> None:
+    """Поштучные UPDATE в одной транзакции в порядке id (без взаимных блокировок)."""
+    _, ids = target
+    with transaction.atomic():
+        for pk in sorted(ids):
+            Video(pk=pk).increment_counter()
+
+
+COUNTER_STRATEGIES: Dict[str, Callable[[Target], None]] = {
+    "per_object": _per_object,
+    "page_task": _page_task,
+    "typed_task": _typed_task,
+    "sorted_per_object": _sorted_per_object,
+}
+
+
+# ---------------- Данные ----------------
+def create_targets(pages: int, per_page: int, overlap: float, seed: Optional[int] = None) -> List[Target]:
+    """
+    Создаёт страницы со скользящими окнами по общему пулу Video:
+    соседние страницы делят долю overlap своих объектов.
+    """
+    rng = random.Random(seed)
+    step = max(1, int(per_page * (1 - overlap)))
+    pool_size = step * (pages - 1) + per_page
+    videos = Video.objects.bulk_create([
+        Video(title=f"{BENCH_TITLE} {i}", video_url="https://cdn.example.com/bench.mp4") for i in range(pool_size)
+    ])
+    wrappers = Contents.objects.bulk_create([Contents(content_object=video) for video in videos])
+    page_objs = Page.objects.bulk_create([Page(title=BENCH_TITLE) for _ in range(pages)])
+
+    targets: List[Target] = []
+    items = []
+    for index, page in enumerate(page_objs):
+        window = list(range(index * step, index * step + per_page))
+        rng.shuffle(window)  # разный порядок обхода — как у реальных страниц
+        targets.append((page.pk, [videos[i].pk for i in window]))
+        items.extend(ContentOnPage(page=page, content=wrappers[i], order=n + 1) for n, i in enumerate(window))
+    ContentOnPage.objects.bulk_create(items)
+    return targets
+
+
+def drop_targets(targets: Sequence[Target]) -> None:
+    page_ids = [page_id for page_id, _ in targets]
+    video_ids = {pk for _, ids in targets for pk in ids}
+    ct = ContentType.objects.get_for_model(Video)
+    ContentOnPage.objects.filter(page_id__in=page_ids).delete()
+    Page.objects.filter(pk__in=page_ids).delete()
+    delete_wrappers(Contents.objects.filter(content_type=ct, _object_id__in=video_ids))
+    delete_content(Video.objects.filter(pk__in=video_ids))
+
+
+def read_counters(targets: Sequence[Target]) -> Dict[int, int]:
+    ids = {pk for _, ids in targets for pk in ids}
+    return dict(Video.objects.filter(pk__in=ids).values_list("pk", "counter"))
+
+
+# ---------------- Прогон ----------------
+def _worker(strategy: str, targets: Sequence[Target], operations: int, seed: int, close: bool = True) -> Dict:
+    """Выполняет operations операций стратегии над случайными страницами."""
+    rng = random.Random(seed)
+    func = COUNTER_STRATEGIES[strategy]
+    latencies: List[float] = []
+    done: Dict[int, int] = {}
+    errors: Dict[str, int] = {}
+    try:
+        for _ in range(operations):
+            index = rng.randrange(len(targets))
+            started = time.perf_counter()
+            try:
+                func(targets[index])
+            except DatabaseError as exc:  # блокировки/дедлоки СУБД — считаем, но не прерываем прогон
+                errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            done[index] = done.get(index, 0) + 1
+    finally:
+        if close:
+            connection.close()
+    return {"latencies": latencies, "done": done, "errors": errors}
+
+
+def _init_process():
+    # соединения родителя закрыты до fork; дочерний процесс откроет свои
+    connections.close_all()
+
+
+def run_level(strategy: str, targets: Sequence[Target], workers: int, operations: int,
+              mode: str = "threads", baseline_ms: Optional[float] = None, seed: int = 0) -> Dict:
+    """Один прогон стратегии при заданном параллелизме."""
+    before = read_counters(targets)
+    args = [(strategy, targets, operations, seed * 1000 + i) for i in range(workers)]
+
+    started = time.perf_counter()
+    if workers == 1 and mode == "threads":
+        # в текущем потоке: то же соединение (и та же транзакция в тестах)
+        results = [_worker(*args[0], close=False)]
+    elif mode == "processes":
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_process) as pool:
+            results = list(pool.map(_worker, *zip(*args)))
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(_worker, *zip(*args)))
+    elapsed = time.perf_counter() - started
+
+    after = read_counters(targets)
+    expected: Dict[int, int] = {}
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    for result in results:
+        latencies.extend(result["latencies"])
+        for index, count in result["done"].items():
+            for pk in targets[index][1]:
+                expected[pk] = expected.get(pk, 0) + count
+        for key, count in result["errors"].items():
+            errors[key] = errors.get(key, 0) + count
+
+    lost = duplicated = 0
+    for pk, start in before.items():
+        delta = after.get(pk, start) - start
+        want = expected.get(pk, 0)
+        lost += max(0, want - delta)
+        duplicated += max(0, delta - want)
+
+    increments = sum(expected.values())
+    median = statistics.median(latencies) if latencies else None
+    wait = None
+    if baseline_ms is not None and latencies:
+        wait = sum(max(0.0, value - baseline_ms) for value in latencies)
+    return {
+        "strategy": strategy,
+        "mode": mode,
+        "workers": workers,
+        "operations": len(latencies),
+        "increments": increments,
+        "elapsed_s": round(elapsed, 4),
+        "increments_per_s": round(increments / elapsed, 1) if elapsed else None,
+        "latency_median_ms": round(median, 3) if median is not None else None,
+        "latency_p99_ms": round(sorted(latencies)[int(0.99 * (len(latencies) - 1))], 3) if latencies else None,
+        "lock_wait_ms_total": round(wait, 1) if wait is not None else None,
+        "lock_wait_ms_per_op": round(wait / len(latencies), 3) if wait is not None and latencies else None,
+        "lost": lost,
+        "duplicated": duplicated,
+        "errors": errors,
+    }
+
+
+def run_benchmark(targets: Sequence[Target], strategies: Sequence[str], levels: Sequence[int],
+                  operations: int, mode: str = "threads", seed: int = 0) -> List[Dict]:
+    """
+    Для каждой стратегии: сначала базовая латентность (1 поток), затем все уровни
+    параллелизма. Возвращает список результатов.
+    """
+    unknown = set(strategies) - set(COUNTER_STRATEGIES)
+    if unknown:
+        raise ValueError(f"Неизвестные стратегии: {', '.join(sorted(unknown))}")
+    report = []
+    for strategy in strategies:
+        baseline = run_level(strategy, targets, 1, operations, "threads", seed=seed)
+        base_ms = baseline["latency_median_ms"]
+        for workers in levels:
+            report.append(run_level(strategy, targets, workers, operations, mode, baseline_ms=base_ms, seed=seed))
+    return report
@@ -0,0 +1,216 @@
+"""
+Бэкенды счётчиков просмотров контента.
+
+Бэкенд выбирается настройкой CONTENT_COUNTER_BACKEND (путь к классу),
+параметры конструктора — CONTENT_COUNTER_OPTIONS. Метод record_view
+получает данные ответа /api/pages/<id>/, учитывает просмотр всех объектов
+страницы (каждый — один раз) и возвращает данные с актуальными счётчиками.
+
+DatabaseCounterBackend (по умолчанию) — задача Celery
+increment_page_content_counters, UPDATE в БД на каждый просмотр; счётчик
+в ответе — значение строки, отстающее от очереди задач.
+
+RedisCounterBackend — HINCRBY в хеш <prefix><тип> (поле — id объекта)
+одним pipeline вместе с чтением ещё не перенесённых приращений; в ответе
+counter плюс приращения. Задача content.tasks.reconcile_counters
+(celery beat, раз в COUNTER_RECONCILE_INTERVAL секунд) переносит их в
+BaseContent.counter: хеш атомарно переименовывается в <ключ>:reconciling
+(новые просмотры идут в новый хеш), приращения пишутся сгруппированными
+UPDATE … counter + delta (одно значение delta — один UPDATE на пачку id)
+в одной транзакции. После коммита новые значения counter записываются в
+хеш <ключ>:base (закешированный ответ страницы их не знает), а перенесённый
+хеш удаляется — одной транзакцией MULTI. Параллельные запуски исключены
+блокировкой SET NX в Redis.
+
+Перенос идемпотентен: переименованному хешу выдаётся токен (<ключ>:run), и в
+той же транзакции БД, что и UPDATE, создаётся строка CounterTransfer с этим
+токеном. Хеш, оставшийся после сбоя, следующий запуск переносит заново, если
+токена в БД нет (UPDATE откатились или не начинались), или только дописывает
+:base и удаляет хеш, если токен есть (UPDATE уже закоммичены).
+"""
+import functools
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from content.models import CounterTransfer, get_content_models
+
+RECONCILE_BATCH = 1000
+
+
+def _viewed(data: dict) -> Dict[str, List[int]]:
+    """{model_name: [id, ...]} объектов страницы без повторов."""
+    ids: Dict[str, Dict[int, None]] = {}
+    for item in data["contents"]:
+        ids.setdefault(item["type"].lower(), {})[item["id"]] = None
+    return {model_name: list(pks) for model_name, pks in ids.items()}
+
+
+class BaseCounterBackend:
+    def record_view(self, data: dict, count: bool = True) -> dict:
+        """count=False — повторный просмотр (content.dedup): только актуальные значения."""
+        raise NotImplementedError
+
+    def live_deltas(self, model_name: str, ids: Iterable[int]) -> Dict[int, int]:
+        """Ещё не перенесённые в БД приращения объектов одного типа (к counter, прочитанному из БД)."""
+        return {}
+
+    def reconcile(self) -> Dict[str, int]:
+        """Переносит накопленные приращения в БД (если бэкенд их копит)."""
+        return {"objects": 0, "views": 0, "updates": 0}
+
+
+class DatabaseCounterBackend(BaseCounterBackend):
+    """Прежнее поведение: задача Celery увеличивает счётчики в БД."""
+
+    def record_view(self, data: dict, count: bool = True) -> dict:
+        from content.tasks import increment_page_content_counters
+
+        if count:
+            increment_page_content_counters.delay(data["id"])
+        return data
+
+
+@functools.lru_cache(maxsize=None)
+def redis_client(url: str):
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+class RedisCounterBackend(BaseCounterBackend):
+    """
+    Приращения в хешах Redis, периодический перенос в БД.
+    client — готовый клиент (например, fakeredis в тестах), иначе из url
+    (по умолчанию COUNTER_REDIS_URL).
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "counters:", client=None, lock_timeout: int = 300):
+        self.client = client if client is not None else redis_client(url or settings.COUNTER_REDIS_URL)
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+
+    def key(self, model_name: str) -> str:
+        return f"{self.prefix}{model_name}"
+
+    def pending_key(self, model_name: str) -> str:
+        return f"{self.key(model_name)}:reconciling"
+
+    def base_key(self, model_name: str) -> str:
+        return f"{self.key(model_name)}:base"
+
+    def run_key(self, model_name: str) -> str:
+        return f"{self.key(model_name)}:run"
+
+    def record_view(self, data: dict, count: bool = True) -> dict:
+        viewed = _viewed(data)
+        if not viewed:
+            return data
+        pipe = self.client.pipeline(transaction=False)
+        for model_name, ids in viewed.items():
+            for pk in ids:
+                if count:
+                    pipe.hincrby(self.key(model_name), pk, 1)
+                else:
+                    pipe.hget(self.key(model_name), pk)
+            pipe.hmget(self.pending_key(model_name), ids)
+            pipe.hmget(self.base_key(model_name), ids)
+        results = iter(pipe.execute())
+
+        live: Dict[Tuple[str, int], int] = {}
+        base: Dict[Tuple[str, int], int] = {}
+        for model_name, ids in viewed.items():
+            for pk in ids:
+                live[(model_name, pk)] = int(next(results) or 0)
+            for pk, pending in zip(ids, next(results)):
+                live[(model_name, pk)] += int(pending or 0)
+            for pk, value in zip(ids, next(results)):
+                if value is not None:
+                    base[(model_name, pk)] = int(value)
+        return self._overlay(data, live, base)
+
+    def live_deltas(self, model_name: str, ids: Iterable[int]) -> Dict[int, int]:
+        ids = list(ids)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(self.key(model_name), ids)
+        pipe.hmget(self.pending_key(model_name), ids)
+        live, pending = pipe.execute()
+        return {pk: int(a or 0) + int(b or 0) for pk, a, b in zip(ids, live, pending)}
+
+    @staticmethod
+    def _overlay(data: dict, live: Dict[Tuple[str, int], int], base: Dict[Tuple[str, int], int]) -> dict:
+        # counter в закешированном ответе мог устареть после переноса — база из Redis важнее
+        contents = []
+        for item in data["contents"]:
+            key = (item["type"].lower(), item["id"])
+            contents.append({**item, "counter": base.get(key, item["counter"]) + live.get(key, 0)})
+        # копия: исходные данные могут лежать в кеше процесса
+        return {**data, "contents": contents}
+
+    def reconcile(self) -> Dict[str, int]:
+        report = {"objects": 0, "views": 0, "updates": 0}
+        lock = f"{self.prefix}reconcile-lock"
+        if not self.client.set(lock, 1, nx=True, ex=self.lock_timeout):
+            return report
+        try:
+            for model_name, model in get_content_models().items():
+                self._reconcile_model(model_name, model, report)
+        finally:
+            self.client.delete(lock)
+        return report
+
+    def _reconcile_model(self, model_name: str, model, report: Dict[str, int]) -> None:
+        pending = self.pending_key(model_name)
+        if not self._take(model_name):
+            return
+        # токен переноса: выдаётся один раз на переименованный хеш и переживает сбой
+        self.client.set(self.run_key(model_name), uuid.uuid4().hex, nx=True)
+        token = self.client.get(self.run_key(model_name)).decode()
+        by_delta: Dict[int, List[int]] = {}
+        for pk, delta in self.client.hgetall(pending).items():
+            by_delta.setdefault(int(delta), []).append(int(pk))
+        stored: Dict[int, int] = {}
+        with transaction.atomic():
+            # строка токена и UPDATE — одна транзакция: приращения применяются ровно один раз
+            _, created = CounterTransfer.objects.get_or_create(token=token)
+            for delta, ids in by_delta.items():
+                for start in range(0, len(ids), RECONCILE_BATCH):
+                    batch = ids[start:start + RECONCILE_BATCH]
+                    if created:
+                        model.objects.filter(pk__in=batch).update(counter=F("counter") + delta)
+                        report["updates"] += 1
+                    stored.update(model.objects.filter(pk__in=batch).values_list("pk", "counter"))
+                if created:
+                    report["objects"] += len(ids)
+                    report["views"] += delta * len(ids)
+        self._finish(model_name, stored)
+        CounterTransfer.objects.filter(token=token).delete()
+
+    def _finish(self, model_name: str, stored: Dict[int, int]) -> None:
+        # новые значения из БД и удаление перенесённого хеша — атомарно (MULTI),
+        # чтобы ответы не посчитали приращения дважды или ни разу
+        pipe = self.client.pipeline(transaction=True)
+        if stored:
+            pipe.hset(self.base_key(model_name), mapping=stored)
+        pipe.delete(self.pending_key(model_name), self.run_key(model_name))
+        pipe.execute()
+
+    def _take(self, model_name: str) -> bool:
+        """Хеш прерванного запуска или текущий, переименованный в :reconciling; False — переносить нечего."""
+        pending = self.pending_key(model_name)
+        if self.client.exists(pending):
+            return True
+        # под блокировкой хеш может только появиться (HINCRBY), но не исчезнуть
+        if not self.client.exists(self.key(model_name)):
+            return False
+        self.client.rename(self.key(model_name), pending)
+        return True
+
+
+def get_counter_backend() -> BaseCounterBackend:
+    backend = import_string(getattr(settings, "CONTENT_COUNTER_BACKEND", "content.counters.DatabaseCounterBackend"))
+    return backend(**getattr(settings, "CONTENT_COUNTER_OPTIONS", {}))
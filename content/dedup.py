@@ -0,0 +1,211 @@
+"""
+Подавление повторных просмотров страницы одним клиентом (перезагрузки,
+повторы запросов) перед учётом в счётчиках.
+
+Повтор определяется вращающимся фильтром Блума фиксированного размера:
+время делится на сегменты длиной window / (generations - 1), у каждого
+сегмента свой фильтр на m бит (m и число хешей k — из capacity, ожидаемого
+числа пар клиент–страница за сегмент, и целевой доли ложных срабатываний
+fpr). Просмотр записывается в фильтр текущего сегмента и считается повтором,
+если пара есть в любом из generations последних фильтров — то есть повтор
+подавляется не меньше window секунд. Старые фильтры выбрасываются целиком,
+память — generations × m бит независимо от трафика.
+
+Ложное срабатывание фильтра засчитывает новый просмотр как повтор
+(счётчик недосчитает); оценка доли — по заполненности фильтров, отдаётся
+в /metrics (view_dedup_false_positive_rate) и командой view_dedup_stats.
+Счётчики пропущенных и подавленных просмотров — view_dedup_events_total.
+
+LocalViewDedup — фильтры в памяти процесса (каждый процесс web — свой);
+RedisViewDedup — битовые строки в общем Redis (SETBIT/GETBIT одной
+транзакцией MULTI, сегмент истекает по TTL). Включается настройкой
+VIEW_DEDUP_BACKEND (путь к классу), параметры — VIEW_DEDUP_OPTIONS.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from content.counters import redis_client
+from monitoring.metrics import REGISTRY, VIEW_DEDUP_EVENTS
+
+
+def client_address(request) -> str:
+    """
+    Адрес клиента. Начало X-Forwarded-For задаёт сам клиент, поэтому доверяем
+    только записям, добавленным нашими прокси: при VIEW_DEDUP_PROXY_HOPS = n
+    адрес — n-я запись с конца (её дописал внешний из n прокси), без прокси — REMOTE_ADDR.
+    """
+    hops = getattr(settings, "VIEW_DEDUP_PROXY_HOPS", 0)
+    forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def client_key(request) -> str:
+    """Клиент: пользователь или адрес (client_address) + User-Agent."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"a{client_address(request)}|{request.META.get('HTTP_USER_AGENT', '')}"
+
+
+def bloom_size(capacity: int, fpr: float) -> Tuple[int, int]:
+    """(m бит, k хешей) фильтра на capacity элементов с долей ложных срабатываний fpr."""
+    m = math.ceil(-capacity * math.log(fpr) / math.log(2) ** 2)
+    k = max(1, round(m / capacity * math.log(2)))
+    return m, k
+
+
+class BaseViewDedup:
+    def __init__(self, window: float = 1800, generations: int = 3, capacity: int = 100_000, fpr: float = 0.001):
+        if generations < 2:
+            raise ValueError("generations >= 2")
+        self.window = window
+        self.generations = generations
+        self.segment = window / (generations - 1)
+        self.bits, self.hashes = bloom_size(capacity, fpr)
+
+    def positions(self, element: str) -> List[int]:
+        # двойное хеширование (Кирш–Митценмахер): k позиций из двух 64-битных хешей
+        digest = hashlib.blake2b(element.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def current_segment(self) -> int:
+        return int(time.time() // self.segment)
+
+    def seen(self, client: str, page_id: int) -> bool:
+        """Записывает просмотр; True — повтор в пределах окна (учитывать не нужно)."""
+        repeat = self._check_and_add(self.positions(f"{client}:{page_id}"), self.current_segment())
+        VIEW_DEDUP_EVENTS.inc(result="suppressed" if repeat else "passed")
+        return repeat
+
+    def false_positive_rate(self) -> float:
+        """Оценка доли ложных срабатываний проверки по заполненности живых фильтров."""
+        miss = 1.0
+        for fill in self._fill_ratios(self.current_segment()):
+            miss *= 1 - fill ** self.hashes
+        return 1 - miss
+
+    def stats(self) -> Dict[str, object]:
+        segment = self.current_segment()
+        return {
+            "window_s": self.window,
+            "generations": self.generations,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "memory_bytes": self.generations * math.ceil(self.bits / 8),
+            "fill": [round(fill, 6) for fill in self._fill_ratios(segment)],
+            "false_positive_rate": self.false_positive_rate(),
+        }
+
+    def _check_and_add(self, positions: List[int], segment: int) -> bool:
+        raise NotImplementedError
+
+    def _fill_ratios(self, segment: int) -> List[float]:
+        raise NotImplementedError
+
+
+class LocalViewDedup(BaseViewDedup):
+    """Фильтры в памяти процесса."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._filters: Dict[int, bytearray] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, segment: int) -> List[bytearray]:
+        for old in [s for s in self._filters if s <= segment - self.generations]:
+            del self._filters[old]
+        return [self._filters[s] for s in range(segment - self.generations + 1, segment + 1) if s in self._filters]
+
+    def _check_and_add(self, positions: List[int], segment: int) -> bool:
+        with self._lock:
+            live = self._live(segment)
+            repeat = any(all(bloom[p >> 3] & (1 << (p & 7)) for p in positions) for bloom in live)
+            current = self._filters.setdefault(segment, bytearray(math.ceil(self.bits / 8)))
+            for p in positions:
+                current[p >> 3] |= 1 << (p & 7)
+            return repeat
+
+    def _fill_ratios(self, segment: int) -> List[float]:
+        with self._lock:
+            return [bin(int.from_bytes(bloom, "little")).count("1") / self.bits for bloom in self._live(segment)]
+
+
+class RedisViewDedup(BaseViewDedup):
+    """Фильтры — битовые строки <prefix><сегмент> в Redis, общие для всех процессов."""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "view-dedup:", client=None, **options):
+        super().__init__(**options)
+        self.client = client if client is not None else redis_client(url or settings.COUNTER_REDIS_URL)
+        self.prefix = prefix
+
+    def key(self, segment: int) -> str:
+        return f"{self.prefix}{segment}"
+
+    def _check_and_add(self, positions: List[int], segment: int) -> bool:
+        pipe = self.client.pipeline(transaction=True)
+        previous = range(segment - self.generations + 1, segment)
+        for s in previous:
+            for p in positions:
+                pipe.getbit(self.key(s), p)
+        for p in positions:
+            # SETBIT возвращает прежнее значение бита — проверка текущего сегмента без лишних команд
+            pipe.setbit(self.key(segment), p, 1)
+        pipe.expire(self.key(segment), math.ceil(self.segment * self.generations))
+        results = pipe.execute()[:-1]
+        k = len(positions)
+        return any(all(results[i:i + k]) for i in range(0, len(results), k))
+
+    def _fill_ratios(self, segment: int) -> List[float]:
+        keys = [self.key(s) for s in range(segment - self.generations + 1, segment + 1)]
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(key)
+            pipe.bitcount(key)
+        results = pipe.execute()
+        return [count / self.bits for exists, count in zip(results[::2], results[1::2]) if exists]
+
+
+_instance: Dict[str, BaseViewDedup] = {}
+
+
+def get_view_dedup() -> Optional[BaseViewDedup]:
+    """Фильтр повторов из VIEW_DEDUP_BACKEND (один на процесс) или None, если выключен."""
+    path = getattr(settings, "VIEW_DEDUP_BACKEND", "")
+    if not path:
+        return None
+    if path not in _instance:
+        _instance.clear()
+        _instance[path] = import_string(path)(**getattr(settings, "VIEW_DEDUP_OPTIONS", {}))
+    return _instance[path]
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    if setting.startswith("VIEW_DEDUP"):
+        _instance.clear()
+
+
+def false_positive_rate_metric():
+    """Оценка доли ложных срабатываний (gauge для /metrics)."""
+    dedup = get_view_dedup()
+    if dedup is None:
+        return []
+    return [
+        "# HELP view_dedup_false_positive_rate Оценка доли новых просмотров, ошибочно принятых за повтор",
+        "# TYPE view_dedup_false_positive_rate gauge",
+        f"view_dedup_false_positive_rate {dedup.false_positive_rate():.6g}",
+    ]
+
+
+REGISTRY.collectors.append(false_positive_rate_metric)
@@ -0,0 +1,60 @@
+"""
+Распределения для синтетических данных и нагрузочных тестов.
+
+Все сэмплеры работают за O(1) памяти и времени на значение — без таблиц
+весов на миллионы элементов.
+"""
+import math
+import random
+from typing import Optional
+
+
+class ZipfSampler:
+    """
+    Ранги 0..n-1 с приблизительно Zipf-распределением (вес ранга k ~ 1/(k+1)^s).
+
+    Используется обратная функция распределения ограниченного закона Парето —
+    непрерывное приближение дискретного Zipf. При s=0 распределение равномерное.
+    """
+
+    def __init__(self, n: int, s: float = 1.0, rng: Optional[random.Random] = None):
+        if n < 1:
+            raise ValueError("n должно быть положительным")
+        self.n = n
+        self.s = s
+        self.rng = rng or random.Random()
+        if s != 1:
+            self._a = n ** (1 - s) - 1
+            self._inv = 1 / (1 - s)
+
+    def __call__(self) -> int:
+        u = self.rng.random()
+        if self.s == 1:
+            x = self.n ** u
+        else:
+            x = (self._a * u + 1) ** self._inv
+        return min(self.n - 1, max(0, int(x) - 1))
+
+
+class ScatteredZipfSampler(ZipfSampler):
+    """
+    Zipf по рангам, но популярные ранги разбросаны по диапазону 0..n-1
+    мультипликативной перестановкой: «горячие» объекты не идут подряд
+    (и не оказываются все одного типа, если id выдавались по типам).
+    """
+
+    def __init__(self, n: int, s: float = 1.0, rng: Optional[random.Random] = None):
+        super().__init__(n, s, rng)
+        step = max(1, int(n * 0.6180339887))
+        while math.gcd(step, n) != 1:
+            step += 1
+        self._step = step
+
+    def __call__(self) -> int:
+        return (super().__call__() * self._step) % self.n
+
+
+def lognormal_size(rng: random.Random, mean: float, sigma: float, maximum: int) -> int:
+    """Размер (≥ 1, ≤ maximum) с логнормальным распределением и заданным средним."""
+    mu = math.log(max(mean, 1)) - sigma ** 2 / 2
+    return max(1, min(maximum, int(round(rng.lognormvariate(mu, sigma)))))
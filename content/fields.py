@@ -0,0 +1,65 @@
+"""
+CompressedTextField — TextField, который хранится сжатым (формат — content.compression).
+
+Колонка бинарная (bytea/BLOB). Из БД приходит CompressedText без
+распаковки; распаковка — при первом обращении к атрибуту модели, результат
+кешируется в экземпляре. Выборки, которым тело не нужно (списки, страницы,
+.only()/.defer()), его не распаковывают. Несжатое значение, сохранённое
+обратно без изменений, повторно не сжимается.
+"""
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from content.compression import CompressedText, compress, from_stored
+
+
+class CompressedTextAttribute(DeferredAttribute):
+    """Ленивая распаковка при чтении атрибута (data-дескриптор: __dict__ его не перекрывает)."""
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[self.field.attname] = value.text
+        return value
+
+
+class CompressedTextField(models.TextField):
+    descriptor_class = CompressedTextAttribute
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        return from_stored(value)
+
+    def to_python(self, value):
+        if isinstance(value, CompressedText):
+            return value.text
+        if isinstance(value, (bytes, memoryview)):
+            value = from_stored(value)
+            return value.text if isinstance(value, CompressedText) else value
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # сырое значение: нетронутый CompressedText уходит в БД как есть
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, CompressedText):
+            return value
+        return str(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        payload = value.payload if isinstance(value, CompressedText) else compress(value)
+        return connection.Database.Binary(payload)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return "" if value is None else str(value)
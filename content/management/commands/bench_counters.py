@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.contention import COUNTER_STRATEGIES, create_targets, drop_targets, run_benchmark
+
+
+def parse_levels(value: str):
+    try:
+        levels = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise CommandError(f"Некорректный список уровней параллелизма: {value}")
+    if not levels or min(levels) < 1:
+        raise CommandError("Уровни параллелизма должны быть положительными")
+    return levels
+
+
+class Command(BaseCommand):
+    help = (
+        "Конкуренция за счётчики просмотров: N потоков/процессов увеличивают счётчики "
+        "пересекающихся наборов объектов через каждую стратегию инкремента"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategies", default=",".join(COUNTER_STRATEGIES),
+                            help=f"Через запятую, доступны: {', '.join(COUNTER_STRATEGIES)}")
+        parser.add_argument("--levels", default="1,2,4,8,16", help="Уровни параллелизма через запятую")
+        parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+        parser.add_argument("--operations", type=int, default=200, help="Операций на одного исполнителя")
+        parser.add_argument("--pages", type=int, default=20, help="Число страниц-наборов")
+        parser.add_argument("--per-page", type=int, default=50, help="Объектов на странице")
+        parser.add_argument("--overlap", type=float, default=0.5,
+                            help="Доля объектов, общих с соседней страницей (0..1)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Не удалять созданные данные")
+        parser.add_argument("--json", dest="json_path", default=None, help="Сохранить отчёт в JSON")
+
+    def handle(self, *args, **options):
+        strategies = [name.strip() for name in options["strategies"].split(",") if name.strip()]
+        unknown = set(strategies) - set(COUNTER_STRATEGIES)
+        if unknown:
+            raise CommandError(f"Неизвестные стратегии: {', '.join(sorted(unknown))}")
+        if not 0 <= options["overlap"] < 1:
+            raise CommandError("--overlap должен быть в диапазоне [0, 1)")
+        levels = parse_levels(options["levels"])
+
+        targets = create_targets(options["pages"], options["per_page"], options["overlap"], seed=options["seed"])
+        try:
+            report = run_benchmark(
+                targets, strategies, levels, options["operations"], mode=options["mode"], seed=options["seed"]
+            )
+        finally:
+            if not options["keep"]:
+                drop_targets(targets)
+
+        self._print(report)
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{'стратегия':<18} {'N':>3} {'инкр/с':>10} {'p50 мс':>8} {'p99 мс':>8} "
+            f"{'ожид. мс/оп':>11} {'потеряно':>9} {'задвоено':>9}  ошибки"
+        )
+        for row in report:
+            wait = row["lock_wait_ms_per_op"]
+            line = (
+                f"{row['strategy']:<18} {row['workers']:>3} {row['increments_per_s'] or 0:>10.1f} "
+                f"{row['latency_median_ms'] or 0:>8.2f} {row['latency_p99_ms'] or 0:>8.2f} "
+                f"{wait if wait is not None else 0:>11.3f} {row['lost']:>9} {row['duplicated']:>9}  "
+                f"{row['errors'] or ''}"
+            )
+            ok = not row["lost"] and not row["duplicated"] and not row["errors"]
+            self.stdout.write(line if ok else self.style.WARNING(line))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from content.compression import ALGORITHMS
+from content.recompress import compress_existing
+
+
+class Command(BaseCommand):
+    help = "Сжимает существующие Text.body / Audio.transcript порциями (после миграции 0008)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None, help="Ограничить число порций за запуск")
+        parser.add_argument("--pause", type=float, default=0.0, help="Пауза между порциями, с")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать")
+        parser.add_argument(
+            "--algorithm", choices=sorted(ALGORITHMS), default=None,
+            help="Пережать этим алгоритмом и уже сжатые строки (по умолчанию — CONTENT_COMPRESSION, только несжатые)",
+        )
+
+    def handle(self, *args, **options):
+        report = compress_existing(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+            algorithm=options["algorithm"],
+            log=self.stderr.write if options["verbosity"] > 1 else None,
+        )
+        verb = "Будет сжато" if options["dry_run"] else "Сжато"
+        before, after = report["bytes_before"], report["bytes_after"]
+        ratio = f"{after / before:.1%}" if before else "—"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} строк: {report['compressed']} из {report['rows']} (порций: {report['batches']}); "
+            f"объём {before} → {after} байт ({ratio})"
+        ))
+        if not report["complete"]:
+            self.stdout.write(self.style.WARNING("Достигнут --max-batches, остались необработанные строки"))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from content.transfer import export_ndjson
+
+
+class RawOutput:
+    """Поток для export_ndjson поверх OutputWrapper команды: пишет как есть, без своего перевода строки."""
+
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+
+    def write(self, text: str) -> None:
+        self.wrapper.write(text, ending="")
+
+
+class Command(BaseCommand):
+    help = "Потоковый экспорт Video/Audio/Text, Contents, Page и ContentOnPage в NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", default="-", help="Файл для записи ('-' — stdout)")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Размер пакета чтения из БД")
+
+    def handle(self, *args, **options):
+        if options["output"] == "-":
+            counts = export_ndjson(RawOutput(self.stdout), batch_size=options["batch_size"])
+        else:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                counts = export_ndjson(stream, batch_size=options["batch_size"])
+
+        summary = ", ".join(f"{label}: {count}" for label, count in counts.items()) or "нет данных"
+        sys.stderr.write(f"Экспортировано — {summary}\n")
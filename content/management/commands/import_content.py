@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from content.transfer import NDJSONImporter
+
+
+class Command(BaseCommand):
+    help = "Импорт NDJSON (из export_content) пакетами bulk_create с переназначением id"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл NDJSON ('-' — stdin)")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Размер пакета bulk_create")
+        parser.add_argument("--workers", type=int, default=1, help="Число параллельных потоков записи")
+
+    def handle(self, *args, **options):
+        importer = NDJSONImporter(
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            log=lambda message: self.stderr.write(message) if options["verbosity"] > 1 else None,
+        )
+        if options["input"] == "-":
+            result = importer.run(sys.stdin)
+        else:
+            with open(options["input"], encoding="utf-8") as stream:
+                result = importer.run(stream)
+
+        for label, count in result["created"].items():
+            self.stdout.write(f"{label}: создано {count}")
+        for label, count in result["skipped"].items():
+            self.stdout.write(self.style.WARNING(f"{label}: пропущено {count} (ссылка не найдена)"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Полная переиндексация полнотекстового поиска по Video/Audio/Text"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано документов: {total}"))
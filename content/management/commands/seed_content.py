@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.search import rebuild_index
+from content.seeding import seed
+
+
+def parse_mix(value):
+    """'video=5,audio=2,text=3' -> {"video": 5.0, "audio": 2.0, "text": 3.0}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = "Генерация синтетических данных в форме продакшена (COPY на PostgreSQL, executemany на SQLite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contents", type=int, default=100_000, help="Всего объектов контента")
+        parser.add_argument("--mix", type=parse_mix, default=None,
+                            help="Доли типов, например video=5,audio=2,text=3 (по умолчанию поровну)")
+        parser.add_argument("--pages", type=int, default=1_000, help="Число страниц")
+        parser.add_argument("--items-mean", type=float, default=50, help="Средний размер страницы")
+        parser.add_argument("--items-sigma", type=float, default=1.0, help="sigma логнормального размера страницы")
+        parser.add_argument("--items-max", type=int, default=5_000, help="Максимальный размер страницы")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Показатель Zipf переиспользования контента")
+        parser.add_argument("--body-size", type=int, default=2_000, help="Размер Text.body/Audio.transcript")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Строк в одном COPY/executemany")
+        parser.add_argument("--seed", type=int, default=None, help="Seed генератора случайных чисел")
+        parser.add_argument("--index", action="store_true", help="Перестроить поисковый индекс после генерации")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            counts = seed(
+                contents=options["contents"],
+                mix=options["mix"],
+                pages=options["pages"],
+                items_mean=options["items_mean"],
+                items_sigma=options["items_sigma"],
+                items_max=options["items_max"],
+                zipf=options["zipf"],
+                body_size=options["body_size"],
+                batch_size=options["batch_size"],
+                seed_value=options["seed"],
+                progress=self.stderr.write if options["verbosity"] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано строк: {total} за {elapsed:.1f} с ({total / max(elapsed, 1e-9):,.0f} строк/с)"
+        ))
+        if options["index"]:
+            self.stdout.write(f"Проиндексировано документов: {rebuild_index()}")
+        else:
+            self.stdout.write("Поисковый индекс не обновлялся: запустите rebuild_search_index при необходимости")
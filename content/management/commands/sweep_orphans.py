@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from content.sweeper import sweep_orphans
+
+
+class Command(BaseCommand):
+    help = "Удаляет обёртки Contents на несуществующие объекты контента и их элементы страниц"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-batches", type=int, default=None, help="Ограничить число порций за запуск")
+        parser.add_argument("--pause", type=float, default=0.0, help="Пауза между порциями, с")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать")
+
+    def handle(self, *args, **options):
+        report = sweep_orphans(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            dry_run=options["dry_run"],
+            pause=options["pause"],
+            log=self.stderr.write if options["verbosity"] > 1 else None,
+        )
+        verb = "Найдено" if options["dry_run"] else "Удалено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} обёрток: {report['contents']}, элементов страниц: {report['page_items']} "
+            f"(порций: {report['batches']})"
+        ))
+        for label, count in report["by_type"].items():
+            self.stdout.write(f"  {label}: {count}")
+        if not report["complete"]:
+            self.stdout.write(self.style.WARNING("Достигнут --max-batches, остались необработанные сироты"))
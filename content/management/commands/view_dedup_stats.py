@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.dedup import LocalViewDedup, get_view_dedup
+
+
+class Command(BaseCommand):
+    help = "Заполненность фильтра повторных просмотров и оценка доли ложных срабатываний"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Вывести отчёт в JSON")
+
+    def handle(self, *args, **options):
+        dedup = get_view_dedup()
+        if dedup is None:
+            raise CommandError("Фильтр повторов выключен (VIEW_DEDUP_BACKEND не задан)")
+        if isinstance(dedup, LocalViewDedup):
+            self.stderr.write("Фильтр в памяти процесса: оценка для web — в /metrics (view_dedup_false_positive_rate)")
+        stats = dedup.stats()
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, ensure_ascii=False, indent=2))
+            return
+        self.stdout.write(
+            f"Окно {stats['window_s']:g} с, фильтров {stats['generations']} × {stats['bits']} бит "
+            f"(k={stats['hashes']}, {stats['memory_bytes']} байт)"
+        )
+        self.stdout.write(f"Заполненность: {', '.join(f'{fill:.2%}' for fill in stats['fill']) or '—'}")
+        self.stdout.write(f"Оценка доли ложных повторов: {stats['false_positive_rate']:.4%}")
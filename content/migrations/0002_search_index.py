@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from content.search import create_search_table, drop_search_table, index_documents
+
+# поля, попадающие в "тело" документа (снимок на момент миграции)
+SEARCH_BODY_FIELDS = {"video": None, "audio": "transcript", "text": "body"}
+
+
+def create_index(apps, schema_editor):
+    create_search_table(schema_editor)
+
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    for model_name, body_field in SEARCH_BODY_FIELDS.items():
+        model = apps.get_model("content", model_name)
+        ct, _ = ContentType.objects.get_or_create(app_label="content", model=model_name)
+        fields = ["id", "title"] + ([body_field] if body_field else [])
+        rows = []
+        for values in model.objects.values_list(*fields).iterator(chunk_size=1000):
+            body = (values[2] or "") if body_field else ""
+            rows.append((ct.pk, values[0], values[1], body))
+            if len(rows) >= 1000:
+                index_documents(rows)
+                rows = []
+        index_documents(rows)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("content", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from content.ordering import ORDER_GAP
+
+
+def spread_orders(apps, schema_editor):
+    """
+    Перенумеровывает элементы каждой страницы по рангу: ROW_NUMBER() * ORDER_GAP
+    в порядке (order, id). Относительный порядок сохраняется при любых исходных
+    значениях, в том числе очень больших.
+    """
+    ContentOnPage = apps.get_model("content", "ContentOnPage")
+    qn = schema_editor.quote_name
+    table = qn(ContentOnPage._meta.db_table)
+    order = qn(ContentOnPage._meta.get_field("order").column)
+    page_id = qn(ContentOnPage._meta.get_field("page").column)
+    schema_editor.execute(
+        f"UPDATE {table} SET {order} = ranked.rn * %s "
+        f"FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {page_id} ORDER BY {order}, id) AS rn "
+        f"FROM {table}) ranked "
+        f"WHERE {table}.id = ranked.id",
+        [ORDER_GAP],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_sparse_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contentonpage',
+            index=models.Index(fields=['content', 'page'], name='content_con_content_dee071_idx'),
+        ),
+    ]
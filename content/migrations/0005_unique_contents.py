@@ -0,0 +1,119 @@
+"""
+Одна обёртка Contents на объект: удаление дублей и уникальное ограничение.
+
+Миграция неатомарная: дубли сливаются порциями в коротких транзакциях,
+на PostgreSQL уникальный индекс строится CREATE UNIQUE INDEX CONCURRENTLY
+(без блокировки записи в таблицу) и затем превращается в ограничение
+ADD CONSTRAINT … USING INDEX. Если за время построения индекса появились
+новые дубли, невалидный индекс удаляется, дубли сливаются повторно.
+"""
+from django.db import DatabaseError, migrations, models, transaction
+from django.db.models import Count, Min
+
+CONSTRAINT = "unique_content_object"
+BATCH = 1000
+ATTEMPTS = 3
+
+
+def _constraint():
+    return models.UniqueConstraint(fields=["content_type", "_object_id"], name=CONSTRAINT)
+
+
+def merge_duplicates(apps, schema_editor):
+    """Элементы страниц переводятся на самую старую обёртку, остальные обёртки удаляются."""
+    Contents = apps.get_model("content", "Contents")
+    ContentOnPage = apps.get_model("content", "ContentOnPage")
+    db = schema_editor.connection.alias
+    while True:
+        groups = list(
+            Contents.objects.using(db)
+            .values("content_type_id", "_object_id")
+            .annotate(n=Count("id"), keep=Min("id"))
+            .filter(n__gt=1)
+            .order_by()[:BATCH]
+        )
+        if not groups:
+            return
+        with transaction.atomic(using=db):
+            for group in groups:
+                duplicates = list(
+                    Contents.objects.using(db)
+                    .filter(content_type_id=group["content_type_id"], _object_id=group["_object_id"])
+                    .exclude(pk=group["keep"])
+                    .values_list("pk", flat=True)
+                )
+                items = ContentOnPage.objects.using(db).filter(content_id__in=duplicates)
+                # на странице уже есть основная обёртка (или другой дубль) — лишний элемент удаляем
+                kept_pages = set(
+                    ContentOnPage.objects.using(db).filter(content_id=group["keep"]).values_list("page_id", flat=True)
+                )
+                for item in items.order_by("order"):
+                    if item.page_id in kept_pages:
+                        item.delete()
+                    else:
+                        kept_pages.add(item.page_id)
+                        ContentOnPage.objects.using(db).filter(pk=item.pk).update(content_id=group["keep"])
+                Contents.objects.using(db).filter(pk__in=duplicates).delete()
+
+
+def add_constraint(apps, schema_editor):
+    connection = schema_editor.connection
+    Contents = apps.get_model("content", "Contents")
+    table = schema_editor.quote_name(Contents._meta.db_table)
+    name = schema_editor.quote_name(CONSTRAINT)
+
+    if connection.vendor != "postgresql":
+        # SQLite (разработка): уникальный индекс и есть ограничение; историческая
+        # модель ещё без constraints, поэтому schema_editor.add_constraint не подходит
+        merge_duplicates(apps, schema_editor)
+        schema_editor.execute(f"CREATE UNIQUE INDEX {name} ON {table} (content_type_id, object_id)")
+        return
+
+    for attempt in range(ATTEMPTS):
+        merge_duplicates(apps, schema_editor)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} (content_type_id, object_id)"
+                )
+            break
+        except DatabaseError:
+            # дубли появились во время построения — индекс остался невалидным
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            if attempt == ATTEMPTS - 1:
+                raise
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def remove_constraint(apps, schema_editor):
+    Contents = apps.get_model("content", "Contents")
+    table = schema_editor.quote_name(Contents._meta.db_table)
+    name = schema_editor.quote_name(CONSTRAINT)
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+    else:
+        schema_editor.execute(f"DROP INDEX {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("content", "0004_where_used_index"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="contents",
+                    constraint=_constraint(),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_constraint, remove_constraint),
+            ],
+        ),
+    ]
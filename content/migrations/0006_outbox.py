@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('content', '0005_unique_contents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_id', models.BigIntegerField(blank=True, null=True)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Изменение страницы (outbox)',
+                'verbose_name_plural': 'Изменения страниц (outbox)',
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+"""
+Text.body и Audio.transcript → CompressedTextField (бинарная колонка).
+
+Миграция только меняет тип колонки: существующие строки остаются UTF-8
+без маркера и читаются как есть; сжимаются они отдельно и порциями
+командой compress_content. На PostgreSQL text → bytea через
+convert_to(…, 'UTF8') одним ALTER; в SQLite колонка не меняется (BLOB и
+TEXT хранятся в ней одинаково). Откат сначала распаковывает сжатые
+строки, затем возвращает тип text.
+"""
+from django.db import migrations
+
+import content.fields
+from content.compression import from_stored
+
+COLUMNS = [("audio", "transcript"), ("text", "body")]
+BATCH = 1000
+
+
+def _fields(apps, model_name, name):
+    model = apps.get_model("content", model_name)
+    text_field = model._meta.get_field(name)
+    _, _, args, kwargs = text_field.deconstruct()
+    binary_field = content.fields.CompressedTextField(*args, **kwargs)
+    binary_field.set_attributes_from_name(name)
+    binary_field.model = model
+    return model, text_field, binary_field
+
+
+def to_binary(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    for model_name, name in COLUMNS:
+        model, text_field, binary_field = _fields(apps, model_name, name)
+        if connection.vendor == "postgresql":
+            column = qn(text_field.column)
+            schema_editor.execute(
+                f"ALTER TABLE {qn(model._meta.db_table)} ALTER COLUMN {column} "
+                f"TYPE bytea USING convert_to({column}, 'UTF8')"
+            )
+        elif connection.vendor != "sqlite":
+            schema_editor.alter_field(model, text_field, binary_field)
+
+
+def _decompress_rows(schema_editor, table, column):
+    """Сжатые значения → UTF-8 без маркера, порциями по первичному ключу."""
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    plain = str if connection.vendor == "sqlite" else (lambda text: connection.Database.Binary(text.encode("utf-8")))
+    last = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                f"SELECT id, {qn(column)} FROM {qn(table)} WHERE id > %s AND {qn(column)} IS NOT NULL "
+                f"ORDER BY id LIMIT %s",
+                [last, BATCH],
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            updates = [(plain(str(from_stored(value))), pk) for pk, value in rows if not isinstance(value, str)]
+            if updates:
+                cursor.executemany(f"UPDATE {qn(table)} SET {qn(column)} = %s WHERE id = %s", updates)
+
+
+def to_text(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    for model_name, name in COLUMNS:
+        model, text_field, binary_field = _fields(apps, model_name, name)
+        _decompress_rows(schema_editor, model._meta.db_table, text_field.column)
+        if connection.vendor == "postgresql":
+            column = qn(text_field.column)
+            schema_editor.execute(
+                f"ALTER TABLE {qn(model._meta.db_table)} ALTER COLUMN {column} "
+                f"TYPE text USING convert_from({column}, 'UTF8')"
+            )
+        elif connection.vendor != "sqlite":
+            schema_editor.alter_field(model, binary_field, text_field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_page_content_changed_at'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(to_binary, to_text)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='audio',
+                    name='transcript',
+                    field=content.fields.CompressedTextField(blank=True, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='text',
+                    name='body',
+                    field=content.fields.CompressedTextField(),
+                ),
+            ],
+        ),
+    ]
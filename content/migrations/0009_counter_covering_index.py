@@ -0,0 +1,49 @@
+"""
+Индексы (id, counter) для чтения счётчиков (GET /api/counters/).
+
+Миграция неатомарная: на PostgreSQL индексы строятся CREATE INDEX
+CONCURRENTLY — таблицы контента большие, а UPDATE счётчиков идут
+постоянно, обычный CREATE INDEX блокировал бы их на всё время построения.
+Если построение прервано, невалидный индекс нужно удалить
+(DROP INDEX CONCURRENTLY) и запустить миграцию снова. На остальных СУБД —
+обычный AddIndex.
+"""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('content', '0008_compressed_text'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='audio',
+            index=models.Index(fields=['id', 'counter'], name='content_audio_id_counter'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='text',
+            index=models.Index(fields=['id', 'counter'], name='content_text_id_counter'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='video',
+            index=models.Index(fields=['id', 'counter'], name='content_video_id_counter'),
+        ),
+    ]
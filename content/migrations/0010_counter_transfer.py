@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_counter_covering_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Перенос счётчиков',
+                'verbose_name_plural': 'Переносы счётчиков',
+            },
+        ),
+    ]
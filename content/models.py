@@ -1,11 +1,14 @@
-from typing import List, Tuple, Optional, Dict, Set
+from typing import Iterable, List, Tuple, Optional, Dict, Set
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 
+from content import ordering
+from content.fields import CompressedTextField
+
 
 # ---------------- Base Content ----------------
 class BaseContent(models.Model):
@@ -17,6 +20,11 @@ class BaseContent(models.Model):
     class Meta:
         abstract = True
         ordering = ["-created_at"]
+        indexes = [
+            # покрывающий индекс для чтения счётчиков по id (GET /api/counters/) без обращения к строке;
+            # цена — ещё одна запись в индекс на каждое увеличение counter
+            models.Index(fields=["id", "counter"], name="%(app_label)s_%(class)s_id_counter"),
+        ]
 
     def __str__(self):
         return self.title
@@ -25,32 +33,50 @@ class BaseContent(models.Model):
         """Атомарное увеличение счётчика просмотров."""
         self.__class__.objects.filter(pk=self.pk).update(counter=F("counter") + by)
 
+    def get_search_document(self) -> Tuple[str, str]:
+        """Текст для полнотекстового индекса: (заголовок, тело)."""
+        return self.title, ""
+
 
 class Video(BaseContent):
     video_url = models.URLField()
     subtitles_url = models.URLField(blank=True, null=True)
     # обратная связь к Contents
-    contents = GenericRelation("Contents", related_query_name="video")
+    contents = GenericRelation("Contents", object_id_field="_object_id", related_query_name="video")
 
     def __str__(self):
         return f"🎬 {self.title}"
 
 
 class Audio(BaseContent):
-    transcript = models.TextField(blank=True, null=True)
-    contents = GenericRelation("Contents", related_query_name="audio")
+    transcript = CompressedTextField(blank=True, null=True)
+    contents = GenericRelation("Contents", object_id_field="_object_id", related_query_name="audio")
 
     def __str__(self):
         return f"🎧 {self.title}"
 
+    def get_search_document(self) -> Tuple[str, str]:
+        return self.title, self.transcript or ""
+
 
 class Text(BaseContent):
-    body = models.TextField()
-    contents = GenericRelation("Contents", related_query_name="text")
+    body = CompressedTextField()
+    contents = GenericRelation("Contents", object_id_field="_object_id", related_query_name="text")
 
     def __str__(self):
         return f"📝 {self.title}"
 
+    def get_search_document(self) -> Tuple[str, str]:
+        return self.title, self.body or ""
+
+
+def get_content_models() -> Dict[str, type]:
+    """
+    Реестр конкретных моделей контента: {"video": Video, "audio": Audio, ...}.
+    Ключ совпадает с ContentType.model, поэтому его удобно использовать в API.
+    """
+    return {model._meta.model_name: model for model in BaseContent.__subclasses__()}
+
 
 # ---------------- Contents Manager ----------------
 class ContentsManager(models.Manager):
@@ -69,7 +95,42 @@ class ContentsManager(models.Manager):
 
     def get_or_create_for_object(self, obj):
         ct = ContentType.objects.get_for_model(obj)
-        return self.get_or_create(content_type=ct, _object_id=obj.pk)
+        key = (ct.pk, obj.pk)
+        existing = self.get_queryset().filter(content_type=ct, _object_id=obj.pk).first()
+        if existing is not None:
+            return existing, False
+        return self.ensure_for_keys([key])[key], True
+
+    def ensure_for_keys(self, keys: Iterable[Tuple[int, int]], batch_size: int = 5000) -> Dict[Tuple[int, int], "Contents"]:
+        """
+        Обёртки для ключей (content_type_id, object_id), создавая недостающие:
+        INSERT … ON CONFLICT DO NOTHING пакетами по batch_size (уникальность
+        обеспечивает unique_content_object, гонки параллельных вставок безопасны)
+        и SELECT созданных и существующих — число запросов не зависит от числа
+        объектов внутри пакета.
+        """
+        from content.where_used import keys_filter
+
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        self.bulk_create(
+            [Contents(content_type_id=ct_id, _object_id=obj_id) for ct_id, obj_id in keys],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        wrappers: Dict[Tuple[int, int], Contents] = {}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            for wrapper in self.get_queryset().filter(keys_filter(chunk, prefix="")):
+                wrappers[(wrapper.content_type_id, wrapper._object_id)] = wrapper
+        return wrappers
+
+    def ensure_for_objects(self, objs: Iterable) -> Dict[Tuple[int, int], "Contents"]:
+        """ensure_for_keys для экземпляров моделей контента любых типов."""
+        return self.ensure_for_keys(
+            (ContentType.objects.get_for_model(obj).pk, obj.pk) for obj in objs
+        )
 
 
 # ---------------- Contents ----------------
@@ -100,12 +161,12 @@ class Contents(models.Model):
     class Meta:
         verbose_name = "Контент"
         verbose_name_plural = "Контент"
-        # Обычно удобно иметь только одну запись-обёртку на реальный объект:
-        # constraints = [
-        #     models.UniqueConstraint(
-        #         fields=["content_type", "_object_id"], name="unique_content_object"
-        #     )
-        # ]
+        # Одна запись-обёртка на реальный объект (миграция 0005 убирает старые дубли)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "_object_id"], name="unique_content_object"
+            )
+        ]
         indexes = [
             models.Index(fields=["content_type", "_object_id"]),
         ]
@@ -156,6 +217,9 @@ class Contents(models.Model):
 class Page(models.Model):
     title = models.CharField(max_length=255, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # последнее изменение того, что отдаёт /api/pages/<id>/ (кроме счётчиков):
+    # сама страница, состав/порядок элементов, встроенные объекты (content.signals)
+    content_changed_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Страница"
@@ -174,7 +238,11 @@ class Page(models.Model):
         Возвращает список ContentOnPage, отсортированный по order.
         select_related('content__content_type') подгружает FK на Contents и ContentType
         (сам content_object — generic, его надо загружать отдельно).
+        Если content_items уже предзагружены (prefetch_related), повторного запроса нет.
         """
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("content_items")
+        if prefetched is not None:
+            return sorted(prefetched, key=lambda item: item.order)
         return list(self.content_items.select_related("content__content_type").order_by("order"))
 
     def get_ordered_contents(self) -> List[Optional[BaseContent]]:
@@ -199,7 +267,7 @@ class Page(models.Model):
         fetched: Dict[Tuple[int, int], BaseContent] = {}
         for ct_id, ids in ct_to_ids.items():
             try:
-                ct = ContentType.objects.get(pk=ct_id)
+                ct = ContentType.objects.get_for_id(ct_id)
             except ContentType.DoesNotExist:
                 continue
             model_class = ct.model_class()
@@ -251,14 +319,122 @@ class ContentOnPage(models.Model):
         ]
         indexes = [
             models.Index(fields=["page", "order"]),
+            # where-used: объект → страницы без обращения к таблице (покрывающий)
+            models.Index(fields=["content", "page"]),
         ]
 
     def __str__(self):
         return f"{self.page} → {self.content}"
 
     def save(self, *args, **kwargs):
-        # автозаполнение order (если 0 — считаем как "append")
+        # автозаполнение order (если 0 — считаем как "append", с шагом ORDER_GAP)
         if not self.pk and (self.order is None or self.order == 0):
-            last = ContentOnPage.objects.filter(page=self.page).aggregate(models.Max("order"))["order__max"]
-            self.order = (last or 0) + 1
+            with transaction.atomic(savepoint=False):
+                ordering.lock_page(self.page_id)
+                self.order = self._append_order()
+                super().save(*args, **kwargs)
+            return
         super().save(*args, **kwargs)
+
+    def _append_order(self) -> int:
+        last = ContentOnPage.objects.filter(page_id=self.page_id).aggregate(models.Max("order"))["order__max"]
+        value = ordering.order_between(last, None)
+        if value is None:
+            # конец страницы упёрся в MAX_ORDER — перенумеровываем сразу (редкий случай)
+            ordering.rebalance_page(self.page_id)
+            last = ContentOnPage.objects.filter(page_id=self.page_id).aggregate(models.Max("order"))["order__max"]
+            value = ordering.order_between(last, None)
+            if value is None:
+                raise ValidationError("На странице нет места для нового элемента")
+        return value
+
+    # ---- перемещение: одна запись вместо перенумерации всей страницы ----
+    def move_before(self, target: "ContentOnPage") -> int:
+        """Ставит элемент непосредственно перед target. Возвращает новый order."""
+        return self._move(target, before=True)
+
+    def move_after(self, target: "ContentOnPage") -> int:
+        """Ставит элемент непосредственно после target. Возвращает новый order."""
+        return self._move(target, before=False)
+
+    def _neighbours(self, target: "ContentOnPage", before: bool) -> Tuple[Optional[int], Optional[int]]:
+        """Границы промежутка (lo, hi) рядом с target по текущим данным."""
+        target.refresh_from_db(fields=["order"])
+        others = ContentOnPage.objects.filter(page_id=self.page_id).exclude(pk=self.pk)
+        if before:
+            lo = others.filter(order__lt=target.order).order_by("-order").values_list("order", flat=True).first()
+            return lo, target.order
+        hi = others.filter(order__gt=target.order).order_by("order").values_list("order", flat=True).first()
+        return target.order, hi
+
+    def _move(self, target: "ContentOnPage", before: bool) -> int:
+        if target.page_id != self.page_id:
+            raise ValidationError("Элементы находятся на разных страницах")
+        if target.pk == self.pk:
+            return self.order
+
+        from content.signals import notify_pages_changed
+
+        # UPDATE и запись в outbox — одна транзакция (без точки сохранения внутри чужой);
+        # блокировка страницы: параллельные перемещения в тот же промежуток идут по очереди
+        with transaction.atomic(savepoint=False):
+            ordering.lock_page(self.page_id)
+            lo, hi = self._neighbours(target, before)
+            value = ordering.order_between(lo, hi)
+            if value is None:
+                # промежуток исчерпан — перенумеровываем страницу сразу (редкий случай), один раз
+                ordering.rebalance_page(self.page_id)
+                lo, hi = self._neighbours(target, before)
+                value = ordering.order_between(lo, hi)
+                if value is None:
+                    raise ValidationError("На странице нет места для перемещения элемента")
+            ContentOnPage.objects.filter(pk=self.pk).update(order=value)
+            notify_pages_changed([self.page_id], sender=ContentOnPage)
+        self.order = value
+        if ordering.is_tight(lo, value, hi):
+            ordering.schedule_rebalance(self.page_id)
+        return value
+
+
+# ---------------- Outbox изменений ----------------
+class PageChange(models.Model):
+    """
+    Outbox изменений страниц для очистки CDN (content.outbox).
+    Пишется в той же транзакции, что и само изменение: либо page_id изменённой
+    страницы, либо (content_type, object_id) изменённого объекта контента —
+    его страницы определяются при разборе outbox, одним запросом на пачку.
+    Строки удаляются после успешной очистки.
+    """
+    page_id = models.BigIntegerField(null=True, blank=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Изменение страницы (outbox)"
+        verbose_name_plural = "Изменения страниц (outbox)"
+
+    def __str__(self):
+        if self.page_id is not None:
+            return f"page {self.page_id}"
+        return f"{self.content_type_id}:{self.object_id}"
+
+
+# ---------------- Перенос счётчиков ----------------
+class CounterTransfer(models.Model):
+    """
+    Применённый перенос приращений счётчиков из Redis (content.counters).
+    Строка с токеном переноса пишется в одной транзакции с UPDATE счётчиков:
+    если после коммита хеш в Redis не удалён (сбой), повторный запуск видит
+    токен и не прибавляет те же приращения второй раз. Строка удаляется после
+    удаления хеша.
+    """
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Перенос счётчиков"
+        verbose_name_plural = "Переносы счётчиков"
+
+    def __str__(self):
+        return self.token
@@ -0,0 +1,149 @@
+"""
+Разреженная (gap-based) нумерация элементов страницы.
+
+Элементы получают order с шагом ORDER_GAP, поэтому вставка или перемещение
+элемента между соседями — это запись одной строки (середина промежутка).
+Когда промежуток между соседями исчерпан, страница перенумеровывается
+целиком фоновой задачей rebalance_page_order.
+
+Все изменения order элементов страницы (добавление в конец, перемещение,
+перенумерация, клонирование в страницу) сначала блокируют строку Page
+(lock_page) — параллельные изменения одной страницы выполняются по очереди
+и не получают одинаковый order.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+from django.db import transaction
+
+ORDER_GAP = 1024
+# PositiveIntegerField — integer в PostgreSQL
+MAX_ORDER = 2 ** 31 - 1
+# если после вставки промежуток до соседа меньше этого — планируем ребалансировку
+MIN_GAP = 2
+
+
+def lock_page(page_id: int) -> None:
+    """SELECT … FOR UPDATE строки страницы (внутри транзакции) перед изменением order её элементов."""
+    from content.models import Page
+
+    list(Page.objects.select_for_update().filter(pk=page_id).values_list("pk", flat=True))
+
+
+def order_between(lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+    """
+    order строго между соседями lo и hi (None — край страницы).
+    Возвращает None, если свободного места нет и нужна перенумерация.
+    """
+    lo = lo or 0
+    if hi is None:
+        value = lo + ORDER_GAP
+        return value if value <= MAX_ORDER else None
+    if hi - lo < 2:
+        return None
+    return (lo + hi) // 2
+
+
+def is_tight(lo: Optional[int], value: int, hi: Optional[int]) -> bool:
+    """True, если новый order оставил слишком мало места с одной из сторон."""
+    if value - (lo or 0) < MIN_GAP:
+        return True
+    if hi is not None and hi - value < MIN_GAP:
+        return True
+    return value > MAX_ORDER - ORDER_GAP
+
+
+def rebalance_page(page_id: int) -> int:
+    """
+    Перенумеровывает элементы страницы с шагом ORDER_GAP (O(n), только в фоне
+    или когда промежуток исчерпан). Возвращает число обновлённых строк.
+    """
+    from content.models import ContentOnPage
+
+    with transaction.atomic():
+        lock_page(page_id)
+        items = list(
+            ContentOnPage.objects.select_for_update()
+            .filter(page_id=page_id)
+            .order_by("order", "pk")
+            .only("pk", "order")
+        )
+        changed = []
+        for index, item in enumerate(items, start=1):
+            order = index * ORDER_GAP
+            if item.order != order:
+                item.order = order
+                changed.append(item)
+        ContentOnPage.objects.bulk_update(changed, ["order"], batch_size=1000)
+        if changed:
+            from content.signals import notify_pages_changed
+
+            notify_pages_changed([page_id], sender=ContentOnPage)
+    return len(changed)
+
+
+def schedule_rebalance(page_id: int) -> None:
+    """Ставит фоновую перенумерацию страницы после коммита текущей транзакции."""
+    from content.tasks import rebalance_page_order
+
+    transaction.on_commit(lambda: rebalance_page_order.delay(page_id))
+
+
+def _longest_increasing(values: List[Optional[int]]) -> Set[int]:
+    """Индексы длиннейшей строго возрастающей подпоследовательности (None пропускаются)."""
+    tails: List[int] = []        # индексы последних элементов цепочек длины k+1
+    tail_values: List[int] = []  # их значения (для бинарного поиска)
+    parents: Dict[int, Optional[int]] = {}
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        pos = bisect_left(tail_values, value)
+        parents[index] = tails[pos - 1] if pos else None
+        if pos == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[pos] = index
+            tail_values[pos] = value
+    result: Set[int] = set()
+    cursor = tails[-1] if tails else None
+    while cursor is not None:
+        result.add(cursor)
+        cursor = parents[cursor]
+    return result
+
+
+def assign_orders(current: List[Optional[int]]) -> List[int]:
+    """
+    Назначает order для желаемой последовательности элементов при минимуме изменений.
+
+    current[i] — текущий order i-го элемента (None — новый элемент).
+    Элементы, образующие длиннейшую возрастающую подпоследовательность, сохраняют
+    свой order; остальные получают значения в промежутках между ними. Если места
+    не хватает — вся последовательность перенумеровывается с шагом ORDER_GAP.
+    """
+    keep = _longest_increasing(current)
+    result: List[Optional[int]] = [current[i] if i in keep else None for i in range(len(current))]
+
+    index = 0
+    while index < len(result):
+        if result[index] is not None:
+            index += 1
+            continue
+        start = index
+        while index < len(result) and result[index] is None:
+            index += 1
+        lo = result[start - 1] if start else 0
+        hi = result[index] if index < len(result) else None
+        count = index - start
+        if hi is None:
+            if lo + count * ORDER_GAP > MAX_ORDER:
+                return [(i + 1) * ORDER_GAP for i in range(len(current))]
+            step = ORDER_GAP
+        else:
+            step = (hi - lo) // (count + 1)
+            if step < 1:
+                return [(i + 1) * ORDER_GAP for i in range(len(current))]
+        for offset in range(count):
+            result[start + offset] = lo + step * (offset + 1)
+    return result
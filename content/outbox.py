@@ -0,0 +1,104 @@
+"""
+Transactional outbox изменений страниц и очистка CDN пачками.
+
+Запись: приёмники сигналов добавляют строку PageChange в той же
+транзакции, что и изменение (Page, ContentOnPage.save, pages_changed от
+bulk-операций, удаления объектов контента и сохранения/удаления обёрток
+Contents, сохранение Video/Audio/Text). Для сохранённого
+объекта контента пишется одна строка с его ключом, страницы ищутся при
+разборе; при удалении — сразу строки страниц (content.signals находит их
+до удаления обёртки, пакетные удаления — одним запросом на пачку). Изменения счётчиков (UPDATE … F()) событий не
+создают.
+
+Разбор (drain_outbox, задача content.tasks.drain_page_outbox): пачка строк
+в порядке id (на PostgreSQL — SELECT … FOR UPDATE SKIP LOCKED, несколько
+воркеров не мешают друг другу), ключи объектов → страницы одним запросом
+(where_used), дубли схлопываются, бэкенд получает один список страниц,
+строки удаляются в той же транзакции. Ошибка бэкенда откатывает
+транзакцию — пачка будет обработана повторно (at-least-once).
+"""
+from typing import Callable, Dict, Iterable, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from content.models import ContentOnPage, Page, PageChange, get_content_models
+from content.purge import BasePurgeBackend, get_backend
+from content.signals import pages_changed
+from content.where_used import pages_for_keys
+
+
+def record_pages(page_ids: Iterable[int]) -> None:
+    PageChange.objects.bulk_create([PageChange(page_id=pk) for pk in set(page_ids)])
+
+
+def record_object(obj) -> None:
+    PageChange.objects.create(content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk)
+
+
+# ---------------- Сигналы ----------------
+def _page_saved_or_deleted(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_pages([instance.pk])
+
+
+def _item_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_pages([instance.page_id])
+
+
+def _content_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_object(instance)
+
+
+def _pages_changed(sender, page_ids, **kwargs):
+    record_pages(page_ids)
+
+
+def connect_signals():
+    post_save.connect(_page_saved_or_deleted, sender=Page, dispatch_uid="outbox_page_save")
+    post_delete.connect(_page_saved_or_deleted, sender=Page, dispatch_uid="outbox_page_delete")
+    # только save: удаления элементов идут bulk-операциями и сообщают о себе через pages_changed
+    post_save.connect(_item_saved, sender=ContentOnPage, dispatch_uid="outbox_item_save")
+    for model in get_content_models().values():
+        post_save.connect(_content_saved, sender=model, dispatch_uid=f"outbox_save_{model._meta.label}")
+    pages_changed.connect(_pages_changed, dispatch_uid="outbox_pages_changed")
+
+
+# ---------------- Разбор ----------------
+def drain_outbox(
+    batch_size: int = 1000,
+    max_batches: Optional[int] = None,
+    backend: Optional[BasePurgeBackend] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """Очищает CDN по накопленным изменениям. Возвращает число событий, страниц, пачек и вызовов бэкенда."""
+    backend = backend or get_backend()
+    log = log or (lambda message: None)
+    report: Dict[str, object] = {"events": 0, "pages": 0, "batches": 0, "purges": 0, "complete": True}
+    while True:
+        if max_batches is not None and report["batches"] >= max_batches:
+            report["complete"] = not PageChange.objects.exists()
+            return report
+        with transaction.atomic():
+            rows = list(
+                PageChange.objects.select_for_update(skip_locked=True)
+                .order_by("pk")
+                .values_list("pk", "page_id", "content_type_id", "object_id")[:batch_size]
+            )
+            if not rows:
+                return report
+            page_ids = {page_id for _, page_id, _, _ in rows if page_id is not None}
+            keys = [(ct_id, obj_id) for _, page_id, ct_id, obj_id in rows if page_id is None]
+            for ids in pages_for_keys(keys).values():
+                page_ids.update(ids)
+            if page_ids:
+                backend.purge_pages(sorted(page_ids))
+                report["purges"] += 1
+            PageChange.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        report["events"] += len(rows)
+        report["pages"] += len(page_ids)
+        report["batches"] += 1
+        log(f"событий {len(rows)}, страниц {len(page_ids)}")
@@ -0,0 +1,88 @@
+"""
+Бэкенды очистки CDN для изменённых страниц.
+
+Бэкенд выбирается настройкой CDN_PURGE_BACKEND (путь к классу), параметры
+конструктора — CDN_PURGE_OPTIONS. Метод purge_pages получает уже
+схлопнутый список id страниц одной пачки outbox и очищает их одним
+запросом (или несколькими, если CDN ограничивает размер запроса).
+Ответ /api/pages/<id>/ помечен заголовком Surrogate-Key: page-<id>.
+"""
+import json
+import logging
+import urllib.request
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def surrogate_key(page_id: int) -> str:
+    return f"page-{page_id}"
+
+
+def page_url(page_id: int) -> str:
+    return getattr(settings, "CDN_BASE_URL", "") + f"/api/pages/{page_id}/"
+
+
+class BasePurgeBackend:
+    def purge_pages(self, page_ids: Sequence[int]) -> None:
+        raise NotImplementedError
+
+
+class NullPurgeBackend(BasePurgeBackend):
+    """CDN не настроен: только запись в лог."""
+
+    def purge_pages(self, page_ids: Sequence[int]) -> None:
+        logger.debug("CDN purge (null): %d страниц", len(page_ids))
+
+
+class LocalPurgeBackend(BasePurgeBackend):
+    """Заглушка для тестов и разработки: запоминает вызовы в процессе."""
+
+    calls: List[List[int]] = []
+
+    def purge_pages(self, page_ids: Sequence[int]) -> None:
+        LocalPurgeBackend.calls.append(list(page_ids))
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.calls.clear()
+
+
+class HttpPurgeBackend(BasePurgeBackend):
+    """
+    POST {"keys": [...], "urls": [...]} на endpoint CDN (или его прокси);
+    max_keys — предел ключей в одном запросе.
+    """
+
+    def __init__(self, endpoint: str, token: Optional[str] = None, max_keys: int = 256, timeout: float = 10.0):
+        self.endpoint = endpoint
+        self.token = token
+        self.max_keys = max_keys
+        self.timeout = timeout
+
+    def purge_pages(self, page_ids: Sequence[int]) -> None:
+        page_ids = list(page_ids)
+        for start in range(0, len(page_ids), self.max_keys):
+            chunk = page_ids[start:start + self.max_keys]
+            self._post({"keys": [surrogate_key(pk) for pk in chunk], "urls": [page_url(pk) for pk in chunk]})
+
+    def _post(self, payload: dict) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        # ошибка HTTP — исключение: пачка outbox остаётся и будет очищена повторно
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def get_backend() -> BasePurgeBackend:
+    backend = import_string(getattr(settings, "CDN_PURGE_BACKEND", "content.purge.NullPurgeBackend"))
+    return backend(**getattr(settings, "CDN_PURGE_OPTIONS", {}))
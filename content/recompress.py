@@ -0,0 +1,83 @@
+"""
+Фоновое сжатие существующих строк CompressedTextField.
+
+После миграции 0008 старые тела лежат в колонке несжатыми (UTF-8 без
+маркера). Проход идёт по первичному ключу порциями: порция читается
+SELECT … FOR UPDATE и перезаписывается в той же короткой транзакции,
+поэтому параллельная правка строки не теряется, а блокировки держатся
+только на время порции. Уже сжатые строки пропускаются; при явном
+algorithm строки, сжатые другим алгоритмом, пережимаются.
+"""
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from django.db import transaction
+
+from content.compression import ALGORITHMS, MARKER, CompressedText, compress, stored_size
+from content.fields import CompressedTextField
+from content.models import get_content_models
+
+
+def compressed_fields() -> Iterator[Tuple[type, str]]:
+    for model in get_content_models().values():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, CompressedTextField):
+                yield model, field.attname
+
+
+def _encode(value, algorithm: Optional[str]) -> Optional[bytes]:
+    """Новое хранимое значение или None, если строку трогать не нужно."""
+    if isinstance(value, CompressedText):
+        if algorithm is None or value.payload[1:2] == ALGORITHMS[algorithm]:
+            return None
+        value = value.text
+    stored = compress(value, algorithm)
+    return stored if stored.startswith(MARKER) else None
+
+
+def compress_existing(
+    batch_size: int = 500,
+    max_batches: Optional[int] = None,
+    pause: float = 0.0,
+    dry_run: bool = False,
+    algorithm: Optional[str] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """Сжимает несжатые строки всех CompressedTextField. Возвращает счётчики и объём до/после."""
+    log = log or (lambda message: None)
+    report = {"rows": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0, "batches": 0, "complete": True}
+    for model, name in compressed_fields():
+        label = f"{model._meta.label_lower}.{name}"
+        last = 0
+        while True:
+            if max_batches is not None and report["batches"] >= max_batches:
+                report["complete"] = False
+                return report
+            with transaction.atomic():
+                rows = list(
+                    model._base_manager.select_for_update()
+                    .filter(pk__gt=last)
+                    .exclude(**{f"{name}__isnull": True})
+                    .order_by("pk")
+                    .values_list("pk", name)[:batch_size]
+                )
+                if not rows:
+                    break
+                last = rows[-1][0]
+                changed = []
+                for pk, value in rows:
+                    before = stored_size(value)
+                    stored = _encode(value, algorithm)
+                    report["rows"] += 1
+                    report["bytes_before"] += before
+                    report["bytes_after"] += len(stored) if stored is not None else before
+                    if stored is not None:
+                        changed.append(model(pk=pk, **{name: CompressedText(stored)}))
+                if changed and not dry_run:
+                    model._base_manager.bulk_update(changed, [name])
+                report["compressed"] += len(changed)
+            report["batches"] += 1
+            log(f"{label}: до id={last}, сжато {len(changed)} из {len(rows)}")
+            if pause:
+                time.sleep(pause)
+    return report
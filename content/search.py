@@ -0,0 +1,245 @@
+"""
+Полнотекстовый поиск по всем наследникам BaseContent.
+
+Индекс хранится в отдельной теневой таблице ``content_search_index``:
+
+- PostgreSQL: обычная таблица с колонкой ``document tsvector`` и GIN-индексом;
+- SQLite: виртуальная таблица FTS5.
+
+Индекс обновляется инкрементально (сигналы post_save/post_delete, см. content/signals.py),
+поэтому поиск никогда не сканирует сами таблицы Video/Audio/Text через LIKE.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+
+SEARCH_TABLE = "content_search_index"
+
+# rowid в FTS5 кодирует пару (content_type_id, object_id)
+_SQLITE_ROWID_SHIFT = 40
+
+
+def _search_config() -> str:
+    return getattr(settings, "CONTENT_SEARCH_CONFIG", "simple")
+
+
+# ---------------- Схема ----------------
+def create_search_table(schema_editor) -> None:
+    """Создаёт теневую таблицу индекса под текущую СУБД (используется миграцией)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            " content_type_id integer NOT NULL,"
+            " object_id bigint NOT NULL,"
+            " document tsvector NOT NULL,"
+            " PRIMARY KEY (content_type_id, object_id))"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_gin "
+            f"ON {SEARCH_TABLE} USING gin (document)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_table(schema_editor) -> None:
+    if schema_editor.connection.vendor in ("postgresql", "sqlite"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def is_supported() -> bool:
+    return connection.vendor in ("postgresql", "sqlite")
+
+
+# ---------------- Обновление индекса ----------------
+def _sqlite_rowid(ct_id: int, object_id: int) -> int:
+    return (ct_id << _SQLITE_ROWID_SHIFT) | object_id
+
+
+def _sqlite_key(rowid: int) -> Tuple[int, int]:
+    return rowid >> _SQLITE_ROWID_SHIFT, rowid & ((1 << _SQLITE_ROWID_SHIFT) - 1)
+
+
+def index_documents(rows: Iterable[Tuple[int, int, str, str]]) -> None:
+    """
+    Записывает (content_type_id, object_id, title, body) в индекс (upsert).
+    Весь пакет уходит одним executemany.
+    """
+    rows = list(rows)
+    if not rows or not is_supported():
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            config = _search_config()
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (content_type_id, object_id, document) "
+                "VALUES (%s, %s, setweight(to_tsvector(%s::regconfig, %s), 'A')"
+                " || setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+                "ON CONFLICT (content_type_id, object_id) DO UPDATE SET document = EXCLUDED.document",
+                [(ct_id, obj_id, config, title, config, body) for ct_id, obj_id, title, body in rows],
+            )
+        else:
+            rowids = [(_sqlite_rowid(ct_id, obj_id),) for ct_id, obj_id, _, _ in rows]
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", rowids)
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [(_sqlite_rowid(ct_id, obj_id), title, body) for ct_id, obj_id, title, body in rows],
+            )
+
+
+def index_objects(objs: Iterable) -> None:
+    """Индексирует объекты контента (наследники BaseContent)."""
+    rows = []
+    for obj in objs:
+        ct = ContentType.objects.get_for_model(obj)
+        title, body = obj.get_search_document()
+        rows.append((ct.pk, obj.pk, title, body))
+    index_documents(rows)
+
+
+def remove_objects(keys: Iterable[Tuple[int, int]]) -> None:
+    """Удаляет из индекса пары (content_type_id, object_id)."""
+    keys = list(keys)
+    if not keys or not is_supported():
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE content_type_id = %s AND object_id = %s", keys
+            )
+        else:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+                [(_sqlite_rowid(ct_id, obj_id),) for ct_id, obj_id in keys],
+            )
+
+
+def rebuild_index(batch_size: int = 1000) -> int:
+    """Полная переиндексация всех моделей контента. Возвращает число документов."""
+    from content.models import get_content_models
+
+    total = 0
+    for model in get_content_models().values():
+        batch = []
+        for obj in model.objects.order_by("pk").iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index_objects(batch)
+                total += len(batch)
+                batch = []
+        index_objects(batch)
+        total += len(batch)
+    return total
+
+
+# ---------------- Поиск ----------------
+def _fts5_query(query: str) -> str:
+    """
+    Превращает пользовательскую строку в безопасный запрос FTS5:
+    каждый терм — в кавычках (AND), последний — префиксный.
+    """
+    terms = [t.replace('"', '""') for t in query.split() if t.strip('"')]
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(query: str, limit: int = 20) -> List[Tuple[int, int, float]]:
+    """
+    Возвращает [(content_type_id, object_id, rank), ...], отсортированные
+    по убыванию релевантности (чем больше rank, тем лучше).
+    """
+    query = (query or "").strip()
+    if not query or not is_supported():
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT content_type_id, object_id, ts_rank_cd(document, q) AS rank "
+                f"FROM {SEARCH_TABLE}, websearch_to_tsquery(%s::regconfig, %s) q "
+                "WHERE document @@ q ORDER BY rank DESC LIMIT %s",
+                [_search_config(), query, limit],
+            )
+            return [(ct_id, obj_id, float(rank)) for ct_id, obj_id, rank in cursor.fetchall()]
+
+        match = _fts5_query(query)
+        if not match:
+            return []
+        # bm25: меньше — лучше, заголовок весит больше тела
+        cursor.execute(
+            f"SELECT rowid, bm25({SEARCH_TABLE}, 10.0, 1.0) AS score "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY score LIMIT %s",
+            [match, limit],
+        )
+        return [(*_sqlite_key(rowid), -float(score)) for rowid, score in cursor.fetchall()]
+
+
+def search_content(query: str, limit: int = 20) -> Dict[str, list]:
+    """
+    Поиск с гидрацией результатов:
+
+    - 1 запрос к индексу;
+    - N запросов (по одному на тип контента) за заголовками найденных объектов;
+    - 1 запрос за страницами, на которых размещены найденные объекты.
+
+    Страницы ранжируются суммой рангов найденного на них контента.
+    """
+    from content.models import ContentOnPage
+    from content.where_used import keys_filter
+
+    hits = search(query, limit=limit)
+    if not hits:
+        return {"results": [], "pages": []}
+
+    ids_by_ct: Dict[int, List[int]] = {}
+    for ct_id, obj_id, _ in hits:
+        ids_by_ct.setdefault(ct_id, []).append(obj_id)
+
+    objects: Dict[Tuple[int, int], object] = {}
+    for ct_id, ids in ids_by_ct.items():
+        model_class = ContentType.objects.get_for_id(ct_id).model_class()
+        if model_class is None:
+            continue
+        for obj in model_class.objects.filter(pk__in=ids).only("id", "title"):
+            objects[(ct_id, obj.pk)] = obj
+
+    pages_by_key: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+    page_rows = (
+        ContentOnPage.objects.filter(keys_filter(objects))
+        .values_list("content__content_type_id", "content___object_id", "page_id", "page__title")
+        .order_by("page_id")
+        .distinct()
+    )
+    for ct_id, obj_id, page_id, page_title in page_rows:
+        pages_by_key.setdefault((ct_id, obj_id), []).append((page_id, page_title))
+
+    results = []
+    page_rank: Dict[int, Dict] = {}
+    for ct_id, obj_id, rank in hits:
+        obj: Optional[object] = objects.get((ct_id, obj_id))
+        if obj is None:
+            # объект удалён, а индекс ещё не догнал — пропускаем
+            continue
+        pages = pages_by_key.get((ct_id, obj_id), [])
+        results.append({
+            "type": obj.__class__.__name__,
+            "id": obj.pk,
+            "title": obj.title,
+            "rank": rank,
+            "pages": [{"id": page_id, "title": title} for page_id, title in pages],
+        })
+        for page_id, title in pages:
+            entry = page_rank.setdefault(page_id, {"id": page_id, "title": title, "rank": 0.0})
+            entry["rank"] += rank
+
+    ranked_pages = sorted(page_rank.values(), key=lambda p: (-p["rank"], p["id"]))
+    return {"results": results, "pages": ranked_pages}
@@ -0,0 +1,204 @@
+"""
+Генератор синтетических данных в форме продакшена: миллионы объектов
+контента, страницы с тысячами элементов и Zipf-перекос повторного
+использования контента между страницами.
+
+Запись идёт мимо ORM: COPY на PostgreSQL и пакетный executemany на
+остальных СУБД. Первичные ключи назначаются явно (продолжая текущий
+максимум), поэтому обёртки Contents и элементы страниц ссылаются на
+объекты без чтения id обратно; последовательности сбрасываются в конце.
+"""
+import io
+import random
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from content.compression import compress
+from content.distributions import ScatteredZipfSampler, lognormal_size
+from content.models import ContentOnPage, Contents, Page, get_content_models
+from content.ordering import ORDER_GAP
+
+_WORDS = (
+    "контент страница видео аудио текст заголовок история новости обзор интервью "
+    "лекция подкаст статья репортаж выпуск эпизод сезон архив данные запись"
+).split()
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        # bytea в hex-формате (обратная косая черта экранируется для COPY)
+        return "\\\\x" + value.hex()
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+class BulkWriter:
+    """
+    Буферизованная запись строк в одну таблицу: COPY FROM STDIN на
+    PostgreSQL (psycopg2 и psycopg 3), executemany на остальных СУБД.
+    """
+
+    def __init__(self, model, columns: Sequence[str], batch_size: int = 10000):
+        qn = connection.ops.quote_name
+        self.table = qn(model._meta.db_table)
+        self.columns = list(columns)
+        self.quoted = ", ".join(qn(c) for c in self.columns)
+        self.batch_size = batch_size
+        self.rows: List[tuple] = []
+        self.written = 0
+        self.use_copy = connection.vendor == "postgresql"
+
+    def add(self, row: tuple) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                self._copy(cursor.cursor)
+            else:
+                placeholders = ", ".join(["%s"] * len(self.columns))
+                cursor.executemany(
+                    f"INSERT INTO {self.table} ({self.quoted}) VALUES ({placeholders})", self.rows
+                )
+        self.written += len(self.rows)
+        self.rows = []
+
+    def _copy(self, raw_cursor) -> None:
+        payload = "".join("\t".join(_copy_value(v) for v in row) + "\n" for row in self.rows)
+        sql = f"COPY {self.table} ({self.quoted}) FROM STDIN"
+        if hasattr(raw_cursor, "copy"):
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(payload)
+        else:
+            raw_cursor.copy_expert(sql, io.StringIO(payload))
+
+
+def _next_id(model) -> int:
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def seed(
+    contents: int = 100_000,
+    mix: Optional[Dict[str, float]] = None,
+    pages: int = 1_000,
+    items_mean: float = 50,
+    items_sigma: float = 1.0,
+    items_max: int = 5_000,
+    zipf: float = 1.1,
+    body_size: int = 2_000,
+    batch_size: int = 10_000,
+    seed_value: Optional[int] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, int]:
+    """
+    Генерирует данные и возвращает число созданных строк по таблицам.
+
+    contents    — общее число объектов контента (делится по mix, например {"video": 0.5, ...});
+    pages       — число страниц;
+    items_*     — логнормальное распределение размера страницы (среднее, sigma, максимум);
+    zipf        — показатель Zipf для выбора контента на страницы (0 — равномерно);
+    body_size   — примерный размер Text.body / Audio.transcript в символах.
+    """
+    rng = random.Random(seed_value)
+    progress = progress or (lambda message: None)
+    models = get_content_models()
+    mix = mix or {name: 1 / len(models) for name in models}
+    unknown = set(mix) - set(models)
+    if unknown:
+        raise ValueError(f"Неизвестные типы контента: {', '.join(sorted(unknown))}")
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    # тела сразу в формате CompressedTextField
+    bodies = [
+        compress(" ".join(rng.choice(_WORDS) for _ in range(max(1, body_size // 8)))) for _ in range(64)
+    ]
+    counts: Dict[str, int] = {}
+
+    with transaction.atomic():
+        # ---- контент и обёртки Contents (одна обёртка на объект) ----
+        wrapper_start = _next_id(Contents)
+        wrappers = BulkWriter(Contents, ["id", "content_type_id", "object_id"], batch_size)
+        wrapper_index = 0
+        total_weight = sum(mix.values())
+        for name, weight in mix.items():
+            model = models[name]
+            amount = int(contents * weight / total_weight)
+            ct_id = ContentType.objects.get_for_model(model).pk
+            base_columns = ["id", "title", "counter", "created_at"]
+            extra = [f.column for f in model._meta.concrete_fields if f.column not in base_columns]
+            writer = BulkWriter(model, [*base_columns, *extra], batch_size)
+            start = _next_id(model)
+            for offset in range(amount):
+                pk = start + offset
+                values = []
+                for column in extra:
+                    if column in ("body", "transcript"):
+                        values.append(bodies[pk % len(bodies)])
+                    elif column == "video_url":
+                        values.append(f"https://cdn.example.com/video/{pk}.mp4")
+                    else:
+                        values.append(None)
+                writer.add((pk, f"{model.__name__} {pk}", 0, now, *values))
+                wrappers.add((wrapper_start + wrapper_index, ct_id, pk))
+                wrapper_index += 1
+            writer.flush()
+            counts[model._meta.label_lower] = writer.written
+            progress(f"{model._meta.label_lower}: {writer.written}")
+        wrappers.flush()
+        counts["content.contents"] = wrappers.written
+        progress(f"content.contents: {wrappers.written}")
+
+        # ---- страницы и элементы со Zipf-переиспользованием контента ----
+        total_wrappers = wrapper_index
+        page_start = _next_id(Page)
+        page_writer = BulkWriter(Page, ["id", "title", "created_at", "content_changed_at"], batch_size)
+        item_writer = BulkWriter(ContentOnPage, ["page_id", "content_id", "order", "alias"], batch_size)
+        pick = ScatteredZipfSampler(total_wrappers, zipf, rng) if total_wrappers else None
+        for offset in range(pages):
+            page_id = page_start + offset
+            page_writer.add((page_id, f"Page {page_id}", now, now))
+            if pick is None:
+                continue
+            size = lognormal_size(rng, items_mean, items_sigma, min(items_max, total_wrappers))
+            chosen = set()
+            attempts = 0
+            while len(chosen) < size and attempts < size * 4:
+                chosen.add(pick())
+                attempts += 1
+            while len(chosen) < size:
+                # хвост Zipf исчерпан повторами — добираем равномерно
+                chosen.add(rng.randrange(total_wrappers))
+            for position, index in enumerate(chosen, start=1):
+                item_writer.add((page_id, wrapper_start + index, position * ORDER_GAP, None))
+            if (offset + 1) % 1000 == 0:
+                progress(f"content.page: {offset + 1}, content.contentonpage: {item_writer.written}")
+        page_writer.flush()
+        item_writer.flush()
+        counts["content.page"] = page_writer.written
+        counts["content.contentonpage"] = item_writer.written
+
+        # явные id — сдвигаем последовательности
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), [*models.values(), Contents, Page, ContentOnPage]
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+    return counts
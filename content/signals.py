@@ -0,0 +1,154 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal
+from django.utils import timezone
+
+from content import search
+from content.models import ContentOnPage, Contents, Page, get_content_models
+from content.where_used import page_ids_for_objects, pages_for_keys, pages_queryset
+
+# Состав или порядок элементов страниц изменён в обход сигналов моделей
+# (bulk-операции, UPDATE order, INSERT … SELECT). Аргумент: page_ids.
+# Отправляется внутри транзакции изменения (запись в outbox — в ней же).
+pages_changed = Signal()
+
+
+def notify_pages_changed(page_ids, sender=None) -> None:
+    page_ids = set(page_ids)
+    if page_ids:
+        pages_changed.send(sender=sender, page_ids=page_ids)
+
+
+# ---------------- Пакетные удаления ----------------
+# Приёмники удаления отдельных объектов ищут страницы каждого объекта своим
+# запросом. Пакетные удаления (delete_wrappers, delete_content) находят
+# страницы всей пачки одним запросом и сообщают о них один раз — на время
+# такого удаления приёмники отключаются (bulk_deletion).
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_deletion():
+    _bulk.depth = getattr(_bulk, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _bulk.depth -= 1
+
+
+def in_bulk_deletion() -> bool:
+    return getattr(_bulk, "depth", 0) > 0
+
+
+def delete_wrappers(wrappers) -> Dict[str, int]:
+    """
+    Удаляет обёртки Contents из queryset вместе с их элементами страниц:
+    страницы пачки — один запрос, pages_changed — один раз. Возвращает
+    число удалённых строк по моделям (как QuerySet.delete).
+    """
+    with transaction.atomic(), bulk_deletion():
+        ids = list(wrappers.order_by().values_list("pk", flat=True))
+        page_ids = ContentOnPage.objects.filter(content_id__in=ids).values_list("page_id", flat=True)
+        page_ids = set(page_ids.order_by().distinct())
+        _, deleted = Contents.objects.filter(pk__in=ids).delete()
+        notify_pages_changed(page_ids, sender=Contents)
+    return deleted
+
+
+def delete_content(objects) -> Dict[str, int]:
+    """
+    Удаляет объекты контента одного типа из queryset (каскадом — их обёртки и
+    элементы страниц): страницы и записи поискового индекса — пачкой.
+    """
+    model = objects.model
+    ct = ContentType.objects.get_for_model(model)
+    with transaction.atomic(), bulk_deletion():
+        keys = [(ct.pk, pk) for pk in objects.order_by().values_list("pk", flat=True)]
+        page_ids = {page_id for ids in pages_for_keys(keys).values() for page_id in ids}
+        _, deleted = model.objects.filter(pk__in=[pk for _, pk in keys]).delete()
+        search.remove_objects(keys)
+        notify_pages_changed(page_ids, sender=model)
+    return deleted
+
+
+# ---------------- Приёмники ----------------
+def _wrapper_changed(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Обёртка Contents удаляется (каскадом уходят её элементы страниц) или
+    перенаправлена на другой объект: её страницы — одним запросом по индексу
+    (content, page) — получают pages_changed (outbox, кеш, content_changed_at).
+    """
+    if raw or created or in_bulk_deletion():
+        # у новой обёртки элементов ещё нет; пакетное удаление сообщает о страницах само
+        return
+    notify_pages_changed(
+        ContentOnPage.objects.filter(content_id=instance.pk).values_list("page_id", flat=True),
+        sender=Contents,
+    )
+
+
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Инкрементальное обновление полнотекстового индекса при сохранении контента."""
+    if raw:
+        # loaddata: индекс перестраивается отдельно (rebuild_search_index)
+        return
+    search.index_objects([instance])
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    if in_bulk_deletion():
+        return
+    ct = ContentType.objects.get_for_model(instance)
+    search.remove_objects([(ct.pk, instance.pk)])
+
+
+def touch_pages(page_ids) -> None:
+    """Отмечает изменение содержимого страниц (инкрементальный экспорт снимков)."""
+    Page.objects.filter(pk__in=list(page_ids)).update(content_changed_at=timezone.now())
+
+
+def _pages_changed(sender, page_ids, **kwargs):
+    touch_pages(page_ids)
+
+
+def _item_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_pages([instance.page_id])
+
+
+def _content_saved(sender, instance, raw=False, **kwargs):
+    """Объект контента сохранён: один UPDATE страниц через подзапрос where-used."""
+    if raw or instance.pk is None:
+        return
+    ct = ContentType.objects.get_for_model(instance)
+    pages_queryset(ct.pk, instance.pk).update(content_changed_at=timezone.now())
+
+
+def _content_deleted(sender, instance, **kwargs):
+    """
+    Объект контента удаляется: страницы (после удаления обёртки их не найти) —
+    один запрос, pages_changed получают outbox, кеш и content_changed_at.
+    """
+    if not in_bulk_deletion():
+        notify_pages_changed(page_ids_for_objects([instance]), sender=sender)
+
+
+def connect_signals():
+    from content import outbox
+
+    outbox.connect_signals()
+    pages_changed.connect(_pages_changed, dispatch_uid="touch_pages_changed")
+    post_save.connect(_wrapper_changed, sender=Contents, dispatch_uid="pages_changed_wrapper_save")
+    # pre_delete: после каскадного удаления элементов страниц уже не найти
+    pre_delete.connect(_wrapper_changed, sender=Contents, dispatch_uid="pages_changed_wrapper_delete")
+    post_save.connect(_item_saved, sender=ContentOnPage, dispatch_uid="touch_pages_item_save")
+    for model in get_content_models().values():
+        post_save.connect(update_search_index, sender=model, dispatch_uid=f"search_save_{model._meta.label}")
+        post_delete.connect(remove_from_search_index, sender=model, dispatch_uid=f"search_delete_{model._meta.label}")
+        post_save.connect(_content_saved, sender=model, dispatch_uid=f"touch_pages_save_{model._meta.label}")
+        pre_delete.connect(_content_deleted, sender=model, dispatch_uid=f"pages_changed_delete_{model._meta.label}")
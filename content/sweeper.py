@@ -0,0 +1,83 @@
+"""
+Очистка осиротевших обёрток Contents и элементов страниц.
+
+Сирота — Contents, чей объект контента удалён в обход ORM (сырой SQL,
+старые данные до каскада через GenericRelation) или чей тип контента
+больше не существует. Вместе с обёрткой удаляются её ContentOnPage.
+
+Поиск — анти-join (NOT EXISTS) по типам контента, порциями по batch_size
+с курсором по id, поэтому каждый проход читает таблицу один раз, а каждая
+порция удаляется в своей короткой транзакции (блокировки держатся только
+на строках порции). Перед удалением условие сиротства проверяется повторно.
+"""
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef
+
+from content.models import ContentOnPage, Contents
+from content.signals import delete_wrappers
+
+
+def _orphan_querysets() -> Iterator[Tuple[str, object]]:
+    """(метка, queryset сирот) по каждому типу контента, на который ссылаются обёртки."""
+    ct_ids = Contents.objects.order_by().values_list("content_type_id", flat=True).distinct()
+    for ct_id in ct_ids:
+        ct = ContentType.objects.get_for_id(ct_id)
+        model = ct.model_class()
+        wrappers = Contents.objects.filter(content_type_id=ct_id)
+        if model is None:
+            # модель удалена из кода — все обёртки этого типа сироты
+            yield f"{ct.app_label}.{ct.model}", wrappers
+        else:
+            alive = model._base_manager.filter(pk=OuterRef("_object_id"))
+            yield model._meta.label_lower, wrappers.filter(~Exists(alive))
+
+
+def _delete_batch(orphans, ids: List[int]) -> Tuple[int, int]:
+    # повторная проверка (объект мог появиться) — в том же запросе, что выбирает id для удаления;
+    # страницы порции и pages_changed — один раз, число запросов не зависит от размера порции
+    deleted = delete_wrappers(orphans.filter(pk__in=ids))
+    return deleted.get(Contents._meta.label, 0), deleted.get(ContentOnPage._meta.label, 0)
+
+
+def sweep_orphans(
+    batch_size: int = 1000,
+    max_batches: Optional[int] = None,
+    dry_run: bool = False,
+    pause: float = 0.0,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """
+    Удаляет сирот порциями. max_batches ограничивает работу одного вызова
+    (периодическая задача продолжит в следующий раз), pause — пауза между
+    порциями для снижения нагрузки. Возвращает число удалённых строк.
+    """
+    log = log or (lambda message: None)
+    report: Dict[str, object] = {"contents": 0, "page_items": 0, "batches": 0, "by_type": {}, "complete": True}
+    for label, orphans in _orphan_querysets():
+        last_id = 0
+        while True:
+            if max_batches is not None and report["batches"] >= max_batches:
+                report["complete"] = False
+                return report
+            ids = list(
+                orphans.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            report["batches"] += 1
+            if dry_run:
+                wrappers = len(ids)
+                items = ContentOnPage.objects.filter(content_id__in=ids).count()
+            else:
+                wrappers, items = _delete_batch(orphans, ids)
+            report["contents"] += wrappers
+            report["page_items"] += items
+            report["by_type"][label] = report["by_type"].get(label, 0) + wrappers
+            log(f"{label}: обёрток {wrappers}, элементов страниц {items}")
+            if pause:
+                time.sleep(pause)
+    return report
@@ -2,7 +2,7 @@
 from celery import shared_task
 from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
-from content.models import Page, BaseContent, ContentOnPage
+from content.models import BaseContent, ContentOnPage
 
 
 @shared_task
@@ -12,36 +12,28 @@ def increment_page_content_counters(page_id):
     всех контент-объектов, привязанных к странице.
     
     Логика:
-        - Получаем все ContentOnPage для страницы
+        - Получаем пары (тип, id) всех ContentOnPage страницы одним запросом
         - Группируем объекты по типу контента
         - Для каждого типа выполняем массовое обновление через F expression
         - Атомарность гарантируется на уровне базы данных
     """
-    try:
-        page = Page.objects.prefetch_related('content_items').get(id=page_id)
-    except Page.DoesNotExist:
-        return
+    # Один запрос: пары (тип контента, id объекта) всех элементов страницы
+    rows = ContentOnPage.objects.filter(page_id=page_id).values_list(
+        'content__content_type_id', 'content___object_id'
+    )
 
     # Группируем ID объектов по их типам контента
     content_ids_by_type = {}
-    for item in page.content_items.all():
-        content_obj = item.content.content_object
-        if not content_obj:
-            continue
-
-        content_type_id = item.content.content_type_id
-        object_id = item.content.object_id
-
-        if content_type_id not in content_ids_by_type:
-            content_ids_by_type[content_type_id] = []
-        content_ids_by_type[content_type_id].append(object_id)
+    for content_type_id, object_id in rows:
+        content_ids_by_type.setdefault(content_type_id, set()).add(object_id)
 
     # Массовое атомарное обновление для каждого типа контента
+    # (удалённые объекты просто не попадут под фильтр id__in)
     for content_type_id, object_ids in content_ids_by_type.items():
         try:
-            content_type = ContentType.objects.get(id=content_type_id)
+            content_type = ContentType.objects.get_for_id(content_type_id)
             model_class = content_type.model_class()
-            
+
             if model_class and issubclass(model_class, BaseContent):
                 # Атомарное увеличение счетчиков через F
                 model_class.objects.filter(id__in=object_ids).update(counter=F('counter') + 1)
@@ -49,3 +41,49 @@ def increment_page_content_counters(page_id):
         except (ContentType.DoesNotExist, AttributeError):
             # Пропускаем невалидные типы
             continue
+
+
+@shared_task
+def rebalance_page_order(page_id):
+    """
+    Фоновая перенумерация элементов страницы с шагом ORDER_GAP,
+    когда промежутки между соседними order исчерпаны.
+    """
+    from content.ordering import rebalance_page
+
+    return rebalance_page(page_id)
+
+
+@shared_task
+def sweep_orphaned_contents(batch_size=1000, max_batches=50):
+    """
+    Периодическая очистка обёрток Contents на удалённые объекты и их элементов
+    страниц. За один запуск — не больше max_batches порций, остальное — в следующий.
+    """
+    from content.sweeper import sweep_orphans
+
+    report = sweep_orphans(batch_size=batch_size, max_batches=max_batches)
+    return {key: report[key] for key in ("contents", "page_items", "complete")}
+
+
+@shared_task
+def drain_page_outbox(batch_size=1000, max_batches=20):
+    """
+    Периодический разбор outbox изменений страниц: очистка CDN пачками,
+    одна страница — один раз на пачку, сколько бы событий её ни касалось.
+    """
+    from content.outbox import drain_outbox
+
+    report = drain_outbox(batch_size=batch_size, max_batches=max_batches)
+    return {key: report[key] for key in ("events", "pages", "purges", "complete")}
+
+
+@shared_task
+def reconcile_counters():
+    """
+    Периодический перенос накопленных в Redis приращений счётчиков в
+    BaseContent.counter (RedisCounterBackend; для остальных бэкендов — ничего).
+    """
+    from content.counters import get_counter_backend
+
+    return get_counter_backend().reconcile()
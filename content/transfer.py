@@ -0,0 +1,202 @@
+"""
+Потоковый экспорт/импорт страниц и контента в NDJSON.
+
+Одна строка — одна запись вида
+    {"model": "content.video", "pk": 1, "fields": {...}}
+
+Экспорт идёт в порядке зависимостей (Video/Audio/Text → Contents → Page →
+ContentOnPage) через .values().iterator(), поэтому память не зависит от
+объёма данных. Импорт пишет пакетами через bulk_create и переназначает
+первичные ключи: generic-ссылки Contents._object_id и FK ContentOnPage
+переводятся на новые id через таблицы соответствия (единственное, что
+растёт с объёмом данных: пара int на запись).
+"""
+import json
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from content import search
+from content.compression import CompressedText
+from content.models import BaseContent, ContentOnPage, Contents, Page, get_content_models
+
+
+def export_models() -> List[type]:
+    """Модели в порядке зависимостей."""
+    return [*get_content_models().values(), Contents, Page, ContentOnPage]
+
+
+def _field_names(model) -> List[str]:
+    return [f.attname for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+# ---------------- Экспорт ----------------
+def iter_records(batch_size: int = 2000) -> Iterator[Dict]:
+    """Поток записей всех моделей в порядке зависимостей."""
+    ct_keys: Dict[int, List[str]] = {}
+    for model in export_models():
+        label = _label(model)
+        fields = _field_names(model)
+        rows = model.objects.order_by("pk").values("pk", *fields).iterator(chunk_size=batch_size)
+        for row in rows:
+            pk = row.pop("pk")
+            for name, value in row.items():
+                if isinstance(value, CompressedText):
+                    row[name] = value.text
+            if model is Contents:
+                ct_id = row.pop("content_type_id")
+                if ct_id not in ct_keys:
+                    ct_keys[ct_id] = list(ContentType.objects.get_for_id(ct_id).natural_key())
+                row["content_type"] = ct_keys[ct_id]
+            yield {"model": label, "pk": pk, "fields": row}
+
+
+def export_ndjson(stream: IO[str], batch_size: int = 2000) -> Dict[str, int]:
+    """Пишет NDJSON в stream. Возвращает число записей по моделям."""
+    counts: Dict[str, int] = {}
+    for record in iter_records(batch_size=batch_size):
+        stream.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False))
+        stream.write("\n")
+        counts[record["model"]] = counts.get(record["model"], 0) + 1
+    return counts
+
+
+# ---------------- Импорт ----------------
+class NDJSONImporter:
+    """
+    Импорт NDJSON пакетами. Записи одной модели собираются в пакеты по
+    batch_size и вставляются bulk_create; при workers > 1 пакеты одной
+    модели вставляются параллельно (каждый поток — своё соединение с БД).
+    Между моделями — барьер: зависимые записи ждут таблиц соответствия id.
+    """
+
+    def __init__(self, batch_size: int = 2000, workers: int = 1, log: Optional[Callable[[str], None]] = None):
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.log = log or (lambda message: None)
+        self.models = {_label(model): model for model in export_models()}
+        # label модели -> {старый pk: новый pk}
+        self.id_maps: Dict[str, Dict[int, int]] = {label: {} for label in self.models}
+        self.created: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+        self._ct_cache: Dict[Tuple[str, str], int] = {}
+
+    # ---- разбор записей ----
+    def _content_type_id(self, natural_key) -> int:
+        key = tuple(natural_key)
+        if key not in self._ct_cache:
+            self._ct_cache[key] = ContentType.objects.get_by_natural_key(*key).pk
+        return self._ct_cache[key]
+
+    def _build(self, model, fields: Dict) -> Optional[object]:
+        """Создаёт несохранённый объект с переназначенными ссылками (None — ссылка не найдена)."""
+        if model is Contents:
+            app_label, model_name = fields.pop("content_type")
+            object_id = self.id_maps.get(f"{app_label}.{model_name}", {}).get(fields["_object_id"])
+            if object_id is None:
+                return None
+            fields["content_type_id"] = self._content_type_id((app_label, model_name))
+            fields["_object_id"] = object_id
+        elif model is ContentOnPage:
+            fields["page_id"] = self.id_maps["content.page"].get(fields["page_id"])
+            fields["content_id"] = self.id_maps["content.contents"].get(fields["content_id"])
+            if fields["page_id"] is None or fields["content_id"] is None:
+                return None
+        return model(**fields)
+
+    # ---- запись пакета ----
+    @staticmethod
+    def _write_batch(model, objs: List) -> List[int]:
+        """bulk_create пакета; created_at восстанавливается отдельным bulk_update."""
+        timestamps = [getattr(obj, "created_at", None) for obj in objs]
+        with transaction.atomic():
+            model.objects.bulk_create(objs)
+            if any(timestamps):
+                for obj, created_at in zip(objs, timestamps):
+                    obj.created_at = created_at
+                model.objects.bulk_update(objs, ["created_at"])
+        if issubclass(model, BaseContent):
+            # bulk_create не шлёт post_save — индекс поиска обновляем явно
+            search.index_objects(objs)
+        return [obj.pk for obj in objs]
+
+    def _flush(self, executor, pending, label: str, old_pks: List[int], objs: List) -> None:
+        model = self.models[label]
+        if executor is None:
+            self._merge(label, old_pks, self._write_batch(model, objs))
+            return
+        # ограничиваем число пакетов в полёте — память остаётся постоянной
+        while len(pending) >= self.workers * 2:
+            self._drain(pending, return_when=FIRST_COMPLETED)
+        future = executor.submit(self._threaded_write, model, objs)
+        pending[future] = (label, old_pks)
+
+    @classmethod
+    def _threaded_write(cls, model, objs: List) -> List[int]:
+        try:
+            return cls._write_batch(model, objs)
+        finally:
+            connection.close()
+
+    def _drain(self, pending, return_when=ALL_COMPLETED) -> None:
+        if not pending:
+            return
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            label, old_pks = pending.pop(future)
+            self._merge(label, old_pks, future.result())
+
+    def _merge(self, label: str, old_pks: List[int], new_pks: List[int]) -> None:
+        self.id_maps[label].update(zip(old_pks, new_pks))
+        self.created[label] = self.created.get(label, 0) + len(new_pks)
+        self.log(f"{label}: {self.created[label]}")
+
+    # ---- основной цикл ----
+    def run(self, lines: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pending: Dict = {}
+        current_label: Optional[str] = None
+        old_pks: List[int] = []
+        objs: List = []
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                label = record["model"]
+                if label not in self.models:
+                    raise ValueError(f"Неизвестная модель в файле: {label}")
+
+                if label != current_label:
+                    if objs:
+                        self._flush(executor, pending, current_label, old_pks, objs)
+                        old_pks, objs = [], []
+                    # барьер: следующая модель может ссылаться на id предыдущих
+                    self._drain(pending)
+                    current_label = label
+
+                obj = self._build(self.models[label], record["fields"])
+                if obj is None:
+                    self.skipped[label] = self.skipped.get(label, 0) + 1
+                    continue
+                old_pks.append(record["pk"])
+                objs.append(obj)
+                if len(objs) >= self.batch_size:
+                    self._flush(executor, pending, label, old_pks, objs)
+                    old_pks, objs = [], []
+
+            if objs:
+                self._flush(executor, pending, current_label, old_pks, objs)
+            self._drain(pending)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        return {"created": self.created, "skipped": self.skipped}
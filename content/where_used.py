@@ -0,0 +1,75 @@
+"""
+Where-used: на каких страницах размещён объект контента.
+
+Путь (content_type, object_id) → Contents → ContentOnPage → page_id
+идёт по индексам Contents(content_type, _object_id) и
+ContentOnPage(content, page) (покрывающий, page_id читается из индекса).
+Пакетные функции принимают сразу много объектов и выполняют один запрос
+(на каждые CHUNK_SIZE id): условие строится как OR по типам, поэтому
+лишних пар (тип A, id объекта типа B) не бывает. Дубликаты обёрток
+Contents на один объект схлопываются DISTINCT.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from content.models import ContentOnPage, Page
+
+Key = Tuple[int, int]  # (content_type_id, object_id)
+CHUNK_SIZE = 5000
+
+
+def object_keys(objs: Iterable) -> List[Key]:
+    """(content_type_id, pk) для экземпляров моделей контента."""
+    return [(ContentType.objects.get_for_model(obj).pk, obj.pk) for obj in objs]
+
+
+def keys_filter(keys: Iterable[Key], prefix: str = "content__") -> Q:
+    """Q-условие «обёртка указывает на один из объектов keys» (OR по типам)."""
+    ids_by_ct: Dict[int, Set[int]] = {}
+    for ct_id, obj_id in keys:
+        ids_by_ct.setdefault(ct_id, set()).add(obj_id)
+    condition = Q(pk__in=[])
+    for ct_id, ids in ids_by_ct.items():
+        condition |= Q(**{f"{prefix}content_type_id": ct_id, f"{prefix}_object_id__in": sorted(ids)})
+    return condition
+
+
+def _chunks(keys: List[Key]):
+    for start in range(0, len(keys), CHUNK_SIZE):
+        yield keys[start:start + CHUNK_SIZE]
+
+
+def pages_for_keys(keys: Iterable[Key]) -> Dict[Key, List[int]]:
+    """{(content_type_id, object_id): [page_id, ...]} — только для объектов, размещённых хоть где-то."""
+    keys = list(dict.fromkeys(keys))
+    result: Dict[Key, List[int]] = {}
+    for chunk in _chunks(keys):
+        rows = (
+            ContentOnPage.objects.filter(keys_filter(chunk))
+            .values_list("content__content_type_id", "content___object_id", "page_id")
+            .order_by()
+            .distinct()
+        )
+        for ct_id, obj_id, page_id in rows:
+            result.setdefault((ct_id, obj_id), []).append(page_id)
+    for page_ids in result.values():
+        page_ids.sort()
+    return result
+
+
+def pages_for_objects(objs: Iterable) -> Dict[Key, List[int]]:
+    """Пакетный where-used для экземпляров моделей контента."""
+    return pages_for_keys(object_keys(objs))
+
+
+def page_ids_for_objects(objs: Iterable) -> Set[int]:
+    """Все страницы, на которых есть хотя бы один из объектов (для инвалидации кеша/CDN)."""
+    return {page_id for page_ids in pages_for_objects(objs).values() for page_id in page_ids}
+
+
+def pages_queryset(ct_id: int, object_id: int):
+    """Страницы с объектом — QuerySet для API (пагинация, сортировка)."""
+    items = ContentOnPage.objects.filter(content__content_type_id=ct_id, content___object_id=object_id)
+    return Page.objects.filter(pk__in=items.values("page_id"))
@@ -0,0 +1,57 @@
+"""
+Метрики задач Celery через сигналы: время выполнения и задержка от
+постановки в очередь до начала выполнения (метка enqueued_at в заголовках
+сообщения ставится при публикации).
+"""
+import time
+
+from celery import signals
+
+from monitoring.metrics import REGISTRY, TASK_LAG_SECONDS, TASK_SECONDS
+from monitoring.slow_queries import current_source
+
+ENQUEUED_HEADER = "enqueued_at"
+_started = {}
+
+
+def _on_publish(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers[ENQUEUED_HEADER] = time.time()
+
+
+def _enqueued_at(task):
+    request = task.request
+    value = getattr(request, ENQUEUED_HEADER, None)
+    if value is None:
+        value = (getattr(request, "headers", None) or {}).get(ENQUEUED_HEADER)
+    return value
+
+
+def _on_prerun(task_id=None, task=None, **kwargs):
+    _started[task_id] = (time.perf_counter(), current_source.set(f"task:{task.name}"))
+    if task.request.is_eager:
+        return
+    enqueued_at = _enqueued_at(task)
+    if enqueued_at is not None:
+        TASK_LAG_SECONDS.observe(max(0.0, time.time() - float(enqueued_at)), task=task.name)
+
+
+def _on_postrun(task_id=None, task=None, state=None, **kwargs):
+    entry = _started.pop(task_id, None)
+    if entry is not None:
+        started, token = entry
+        current_source.reset(token)
+        TASK_SECONDS.observe(time.perf_counter() - started, task=task.name, state=state or "")
+
+
+def _on_process_shutdown(**kwargs):
+    # prefork-процессы завершаются через os._exit, atexit не срабатывает
+    if REGISTRY.directory():
+        REGISTRY.flush()
+
+
+def connect_signals():
+    signals.before_task_publish.connect(_on_publish, weak=False, dispatch_uid="monitoring.publish")
+    signals.task_prerun.connect(_on_prerun, weak=False, dispatch_uid="monitoring.prerun")
+    signals.task_postrun.connect(_on_postrun, weak=False, dispatch_uid="monitoring.postrun")
+    signals.worker_process_shutdown.connect(_on_process_shutdown, weak=False, dispatch_uid="monitoring.shutdown")
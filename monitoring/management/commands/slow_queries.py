@@ -0,0 +1,61 @@
+import glob
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.slow_queries import summarize
+
+
+def log_files(path: str):
+    """Файл журнала и его ротированные копии (path.1, path.2, ...)."""
+    return [path, *sorted(glob.glob(f"{glob.escape(path)}.[0-9]*"))]
+
+
+def read_lines(paths):
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as stream:
+                yield from stream
+        except FileNotFoundError:
+            continue
+
+
+class Command(BaseCommand):
+    help = "Худшие медленные запросы из журнала SLOW_QUERY_LOG, сгруппированные по нормализованному SQL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Файлы журнала (по умолчанию SLOW_QUERY_LOG и его ротации)")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--sort", choices=["total", "count", "max", "mean"], default="total")
+        parser.add_argument("--plans", action="store_true", help="Показать план самого медленного выполнения")
+        parser.add_argument("--json", action="store_true", help="Вывести сводку в JSON")
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        if not paths:
+            if not settings.SLOW_QUERY_LOG:
+                raise CommandError("Укажите файл журнала или задайте SLOW_QUERY_LOG")
+            paths = log_files(settings.SLOW_QUERY_LOG)
+
+        groups = summarize(read_lines(paths), top=options["top"], sort=options["sort"])
+        if options["json"]:
+            self.stdout.write(json.dumps(groups, ensure_ascii=False, indent=2))
+            return
+        if not groups:
+            self.stdout.write("Медленных запросов нет")
+            return
+        for group in groups:
+            sources = ", ".join(
+                f"{name} ×{count}" for name, count in sorted(group["sources"].items(), key=lambda item: -item[1])[:3]
+            )
+            self.stdout.write(self.style.WARNING(
+                f"[{group['fingerprint']}] n={group['count']} total={group['total_ms']:.0f} мс "
+                f"mean={group['mean_ms']:.1f} мс max={group['max_ms']:.1f} мс"
+            ))
+            self.stdout.write(f"  источники: {sources}")
+            self.stdout.write(f"  {group['normalized'][:500]}")
+            if options["plans"] and group["worst_plan"]:
+                for line in group["worst_plan"].splitlines():
+                    self.stdout.write(f"    {line}")
+            self.stdout.write("")
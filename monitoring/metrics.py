@@ -0,0 +1,415 @@
+"""
+Минимальный реестр метрик в формате экспозиции Prometheus.
+
+Счётчики и гистограммы живут в памяти процесса (наблюдение — несколько
+операций со словарём под блокировкой). Для агрегации между процессами
+(gunicorn-воркеры, prefork-процессы Celery) задаётся METRICS_MULTIPROC_DIR:
+каждый процесс периодически (не чаще METRICS_FLUSH_INTERVAL) и при выходе
+сбрасывает снимок своих значений в <dir>/<pid>.json, а /metrics суммирует
+снимки всех процессов. Снимок пишется во временный файл (mkstemp) и
+атомарно заменяет прежний; сбросы потоков одного процесса сериализованы.
+Снимки завершившихся процессов при сборе /metrics переносятся в
+<dir>/archive.json (под файловой блокировкой) и удаляются — суммы остаются
+монотонными, а каталог не растёт с каждым перезапуском воркеров.
+"""
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = Tuple[str, ...]
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[LabelKey, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self.registry.prepare()
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+
+class Histogram(Metric):
+    """Значение по меткам: [счётчики по бакетам (не кумулятивные)..., сумма, количество]."""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        self.registry.prepare()
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+        self.registry.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Metric] = {}
+        # функции, дописывающие строки экспозиции в момент запроса /metrics (gauges)
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+        self._last_flush = 0.0
+        self._owner_pid = os.getpid()
+        self._adopted = False
+        # один сброс снимка за раз на процесс (потоки web-сервера)
+        self._flush_lock = threading.Lock()
+
+    # ---- объявление метрик ----
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self.metrics[metric.name] = metric
+        return metric
+
+    # ---- мультипроцессный режим ----
+    @staticmethod
+    def directory() -> Optional[str]:
+        return getattr(settings, "METRICS_MULTIPROC_DIR", None) or None
+
+    def _path(self, directory: str) -> str:
+        return os.path.join(directory, f"{os.getpid()}.json")
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def _adopt_previous(self, directory: str) -> None:
+        """
+        Привязка значений к текущему процессу: после fork дочерний процесс
+        сбрасывает унаследованные значения (они учтены в файле родителя);
+        процесс с тем же pid (перезапуск) продолжает с сохранённых значений.
+        """
+        pid = os.getpid()
+        if self._owner_pid == pid and self._adopted:
+            return
+        if self._owner_pid != pid:
+            with self.lock:
+                for metric in self.metrics.values():
+                    metric.values.clear()
+            self._owner_pid = pid
+            self._last_flush = 0.0
+        self._adopted = True
+        try:
+            with open(self._path(directory), encoding="utf-8") as stream:
+                previous = json.load(stream)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for name, samples in previous.items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    for key, value in samples:
+                        _merge_value(metric.values, tuple(key), value)
+
+    def flush(self, blocking: bool = True) -> None:
+        directory = self.directory()
+        if not directory:
+            return
+        if not self._flush_lock.acquire(blocking=blocking):
+            # снимок уже пишет другой поток — этот сброс не нужен
+            return
+        try:
+            self._adopt_previous(directory)
+            os.makedirs(directory, exist_ok=True)
+            _write_json(self._path(directory), self.snapshot())
+            self._last_flush = time.monotonic()
+        finally:
+            self._flush_lock.release()
+
+    def prepare(self) -> None:
+        """Перед изменением значений: отделиться от родителя после fork."""
+        if self._owner_pid != os.getpid() or not self._adopted:
+            directory = self.directory()
+            if directory:
+                self._adopt_previous(directory)
+
+    def maybe_flush(self) -> None:
+        directory = self.directory()
+        if not directory:
+            return
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+        if time.monotonic() - self._last_flush >= interval:
+            try:
+                self.flush(blocking=False)
+            except OSError:
+                pass
+
+    def collect(self) -> Dict[str, Dict[LabelKey, object]]:
+        """Значения всех метрик: этого процесса или суммарно по всем процессам."""
+        directory = self.directory()
+        if not directory:
+            with self.lock:
+                return {name: dict(metric.values) for name, metric in self.metrics.items()}
+        self.flush()
+        try:
+            archive_dead_snapshots(directory)
+        except OSError:
+            pass
+        merged: Dict[str, Dict[LabelKey, object]] = {name: {} for name in self.metrics}
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding="utf-8") as stream:
+                    data = json.load(stream)
+            except (OSError, ValueError):
+                continue
+            for name, samples in data.items():
+                if name in merged:
+                    for key, value in samples:
+                        _merge_value(merged[name], tuple(key), value)
+        return merged
+
+    # ---- экспозиция ----
+    def exposition(self) -> str:
+        values = self.collect()
+        lines: List[str] = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.get(name, {}).items()):
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip((*metric.buckets, float("inf")), value):
+                        cumulative += count
+                        labels = _labels_text(metric.labelnames, key, ("le", _format_value(bound)))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _labels_text(metric.labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_format_value(value[-2])}")
+                    lines.append(f"{name}_count{labels} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_labels_text(metric.labelnames, key)} {_format_value(value)}")
+        for collector in self.collectors:
+            try:
+                lines.extend(collector())
+            except Exception:  # сбор gauge не должен ронять весь /metrics
+                continue
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+
+def _write_json(path: str, data) -> None:
+    """Атомарная запись: уникальный временный файл в том же каталоге и os.replace."""
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as stream:
+            json.dump(data, stream)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+ARCHIVE = "archive.json"
+
+
+def archive_dead_snapshots(directory: str) -> int:
+    """
+    Переносит снимки завершившихся процессов в archive.json и удаляет их.
+    Под flock на <dir>/.lock: параллельные сборы не учтут снимок дважды.
+    Возвращает число перенесённых снимков.
+    """
+    dead = [
+        name for name in os.listdir(directory)
+        if name.endswith(".json") and name[:-5].isdigit() and not _pid_alive(int(name[:-5]))
+    ]
+    if not dead:
+        return 0
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE)
+        try:
+            with open(archive_path, encoding="utf-8") as stream:
+                stored = json.load(stream)
+            archive = {name: {tuple(key): value for key, value in samples} for name, samples in stored.items()}
+        except (OSError, ValueError):
+            archive = {}
+        moved = []
+        for name in dead:
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as stream:
+                    data = json.load(stream)
+            except FileNotFoundError:
+                continue  # уже перенесён другим процессом
+            except ValueError:
+                data = {}
+            for metric, samples in data.items():
+                for key, value in samples:
+                    _merge_value(archive.setdefault(metric, {}), tuple(key), value)
+            moved.append(name)
+        if moved:
+            _write_json(archive_path, {
+                name: [[list(key), value] for key, value in samples.items()] for name, samples in archive.items()
+            })
+            for name in moved:
+                os.unlink(os.path.join(directory, name))
+    return len(moved)
+
+
+def _merge_value(target: Dict, key: LabelKey, value) -> None:
+    current = target.get(key)
+    if current is None:
+        target[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        target[key] = [a + b for a, b in zip(current, value)]
+    else:
+        target[key] = current + value
+
+
+REGISTRY = Registry()
+atexit.register(lambda: REGISTRY.directory() and REGISTRY.flush())
+
+# ---------------- Метрики проекта ----------------
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Время обработки запроса по view", ("view", "method", "status")
+)
+DB_QUERIES = REGISTRY.histogram(
+    "http_request_db_queries", "Число SQL-запросов на HTTP-запрос", ("view",), buckets=COUNT_BUCKETS
+)
+DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_duration_seconds", "Суммарное время SQL на HTTP-запрос", ("view",)
+)
+SERIALIZER_SECONDS = REGISTRY.histogram(
+    "serializer_duration_seconds", "Время сериализации ответа", ("view",)
+)
+PAGE_ITEMS = REGISTRY.histogram(
+    "page_items", "Число элементов контента на отданной странице", buckets=COUNT_BUCKETS
+)
+PAGE_CONTENT_TYPES = REGISTRY.histogram(
+    "page_content_types", "Число типов контента на отданной странице", buckets=(1, 2, 3, 4, 5, 10)
+)
+PAGE_CACHE_REQUESTS = REGISTRY.counter(
+    "page_cache_requests_total",
+    "Обращения к кешу /api/pages/<id>/: hit, stale (отдан устаревший), refresh (пересборка устаревшего), "
+    "miss (рендер), coalesced (дождались чужого рендера), timeout (не дождались, рендер сами)",
+    ("result",),
+)
+VIEW_DEDUP_EVENTS = REGISTRY.counter(
+    "view_dedup_events_total", "Просмотры страниц после фильтра повторов: passed (учтён), suppressed (повтор)",
+    ("result",),
+)
+TASK_SECONDS = REGISTRY.histogram(
+    "celery_task_duration_seconds", "Время выполнения задачи Celery", ("task", "state")
+)
+TASK_LAG_SECONDS = REGISTRY.histogram(
+    "celery_task_lag_seconds", "Задержка от постановки задачи в очередь до начала выполнения", ("task",),
+    buckets=LAG_BUCKETS,
+)
+
+
+def queue_depth() -> Iterable[str]:
+    """Длина очередей Celery на брокере (gauge, считается при каждом запросе /metrics)."""
+    queues = getattr(settings, "METRICS_CELERY_QUEUES", ())
+    if not queues:
+        return []
+    from config.celery import app
+
+    lines = [
+        "# HELP celery_queue_length Сообщений в очереди брокера",
+        "# TYPE celery_queue_length gauge",
+    ]
+    with app.connection_for_read() as conn:
+        conn.ensure_connection(max_retries=1)  # недоступный брокер не должен подвешивать скрейп
+        channel = conn.default_channel
+        for queue in queues:
+            _, messages, _ = channel.queue_declare(queue=queue, passive=True)
+            lines.append(f'celery_queue_length{{queue="{_escape(queue)}"}} {messages}')
+    return lines
+
+
+REGISTRY.collectors.append(queue_depth)
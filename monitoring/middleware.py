@@ -0,0 +1,57 @@
+import time
+
+from django.db import connection
+
+from monitoring.metrics import DB_QUERIES, DB_SECONDS, HTTP_REQUEST_SECONDS
+from monitoring.slow_queries import current_source
+
+
+class QueryCounter:
+    """execute_wrapper: число и суммарное время SQL-запросов в пределах запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def view_label(request) -> str:
+    """Имя маршрута (api:page-detail), а не путь — число рядов метрик ограничено числом view."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unnamed"
+
+
+class MetricsMiddleware:
+    """
+    Гистограммы времени ответа по view, числа и времени SQL на запрос.
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        token = current_source.set(request)  # источник для журнала медленных запросов
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            current_source.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = view_label(request)
+        HTTP_REQUEST_SECONDS.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(queries.count, view=view)
+        DB_SECONDS.observe(queries.seconds, view=view)
+        return response
@@ -0,0 +1,185 @@
+"""
+Профилирование отдельного запроса по требованию (только staff).
+
+Включается заголовком X-Profile или параметром ?profile=<режим>:
+    1 / text   — cProfile, текстовый отчёт (top функций по cumulative) и все SQL с временем;
+    pstats     — cProfile, бинарный дамп pstats (snakeviz, python -m pstats);
+    collapsed  — сэмплирующий профилировщик, стеки в collapsed-формате
+                 (flamegraph.pl, speedscope, inferno).
+Вместо обычного ответа возвращается профиль. Если задан PROFILING_DIR,
+профиль и список SQL (<id>.sql.json) дополнительно сохраняются, id — в X-Profile-Id.
+
+Выключено по умолчанию: без PROFILING_ENABLED=True (dev/staging) middleware
+исключается из цепочки целиком (MiddlewareNotUsed). Когда включено, без
+заголовка/параметра делает две проверки словаря.
+"""
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+
+from monitoring.middleware import view_label
+
+HEADER = "HTTP_X_PROFILE"
+PARAM = "profile"
+MODES = {"1": "text", "text": "text", "pstats": "pstats", "collapsed": "collapsed"}
+
+
+class SQLRecorder:
+    """execute_wrapper: текст, параметры и время каждого SQL-запроса."""
+
+    def __init__(self):
+        self.queries: List[Dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "sql": sql,
+                "params": repr(params)[:500],
+                "many": many,
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик одного потока: фоновый поток раз в interval
+    снимает стек целевого потока через sys._current_frames(). Фактическое
+    разрешение ограничено интервалом переключения GIL (sys.getswitchinterval()).
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(names))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def requested_mode(request) -> Optional[str]:
+    value = request.META.get(HEADER) or request.GET.get(PARAM)
+    if not value:
+        return None
+    return MODES.get(value.lower())
+
+
+def text_report(profiler: cProfile.Profile, queries: List[Dict], elapsed: float, view: str, limit: int = 60) -> str:
+    out = io.StringIO()
+    sql_ms = sum(q["ms"] for q in queries)
+    out.write(f"view: {view}\ntotal: {elapsed * 1000:.1f} ms, SQL: {len(queries)} запросов, {sql_ms:.1f} ms\n\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    out.write("\n---- SQL ----\n")
+    for number, query in enumerate(queries, start=1):
+        out.write(f"[{number}] {query['ms']:.3f} ms{' (many)' if query['many'] else ''}\n{query['sql']}\n\n")
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Ставится после AuthenticationMiddleware: профилирование доступно только is_staff."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        user = getattr(request, "user", None)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+        return self._profile(request, mode)
+
+    def _profile(self, request, mode: str):
+        recorder = SQLRecorder()
+        profiler = sampler = None
+        started = time.perf_counter()
+        if mode == "collapsed":
+            with connection.execute_wrapper(recorder), StackSampler() as sampler:
+                self.get_response(request)
+        else:
+            profiler = cProfile.Profile()
+            with connection.execute_wrapper(recorder):
+                profiler.enable()
+                try:
+                    self.get_response(request)
+                finally:
+                    profiler.disable()
+        elapsed = time.perf_counter() - started
+        view = view_label(request)
+
+        if mode == "text":
+            response = HttpResponse(text_report(profiler, recorder.queries, elapsed, view),
+                                    content_type="text/plain; charset=utf-8")
+        elif mode == "pstats":
+            response = HttpResponse(_pstats_bytes(profiler), content_type="application/octet-stream")
+            response["Content-Disposition"] = 'attachment; filename="profile.prof"'
+        else:
+            response = HttpResponse(sampler.collapsed(), content_type="text/plain; charset=utf-8")
+
+        directory = getattr(settings, "PROFILING_DIR", "")
+        if directory:
+            response["X-Profile-Id"] = _store(directory, mode, profiler, sampler, recorder.queries, elapsed, view)
+        response["X-Profile-SQL-Count"] = str(len(recorder.queries))
+        return response
+
+
+def _pstats_bytes(profiler: cProfile.Profile) -> bytes:
+    # dump_stats пишет только в файл; формат — marshal словаря stats
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def _store(directory: str, mode: str, profiler, sampler, queries: List[Dict], elapsed: float, view: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(directory, profile_id)
+    if profiler is not None:
+        profiler.dump_stats(f"{base}.prof")
+    else:
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as stream:
+            stream.write(sampler.collapsed())
+    with open(f"{base}.sql.json", "w", encoding="utf-8") as stream:
+        json.dump({"view": view, "mode": mode, "elapsed_ms": round(elapsed * 1000, 3), "queries": queries},
+                  stream, ensure_ascii=False, indent=2)
+    return profile_id
@@ -0,0 +1,179 @@
+"""
+Журнал медленных SQL-запросов с автоматическим EXPLAIN.
+
+Обёртка execute (ставится на каждое новое соединение через сигнал
+connection_created) пропускает запросы быстрее SLOW_QUERY_MS без
+дополнительной работы. Медленный запрос пишется в логгер
+monitoring.slow_queries одной JSON-строкой: текст, отпечаток, время,
+источник (view или задача Celery) и план. План — EXPLAIN того же запроса
+с теми же параметрами; с вероятностью SLOW_QUERY_ANALYZE_RATE для SELECT —
+EXPLAIN ANALYZE (запрос выполняется повторно, поэтому только чтение).
+Ротация — RotatingFileHandler в LOGGING (SLOW_QUERY_LOG).
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("monitoring.slow_queries")
+
+# Источник текущих запросов: HttpRequest (view определяется после резолва URL) или строка "task:<имя>"
+current_source: contextvars.ContextVar = contextvars.ContextVar("slow_query_source", default=None)
+_explaining: contextvars.ContextVar = contextvars.ContextVar("slow_query_explaining", default=False)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """Нормализованный SQL: литералы и плейсхолдеры → ?, списки IN (...) схлопнуты."""
+    text = _STRING.sub("?", sql)
+    text = text.replace("%s", "?")
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def describe_source() -> str:
+    source = current_source.get()
+    if source is None:
+        return "-"
+    if isinstance(source, str):
+        return source
+    from monitoring.middleware import view_label
+
+    return f"view:{view_label(source)}"
+
+
+def _explain_prefix(vendor: str, analyze: bool) -> Optional[str]:
+    if vendor == "postgresql":
+        return "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    if vendor == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    if vendor == "mysql":
+        return "EXPLAIN ANALYZE " if analyze else "EXPLAIN "
+    return None
+
+
+def _is_read_only(sql: str) -> bool:
+    head = sql.lstrip().upper()
+    return head.startswith("SELECT") and " FOR UPDATE" not in head
+
+
+def explain(connection, sql: str, params, analyze: bool) -> Optional[str]:
+    prefix = _explain_prefix(connection.vendor, analyze)
+    if prefix is None or (connection.vendor == "sqlite" and not _is_read_only(sql)):
+        # EXPLAIN QUERY PLAN в SQLite для INSERT/UPDATE бесполезен (планы триггеров/проверок)
+        return None
+    token = _explaining.set(True)
+    try:
+        # точка сохранения: ошибка EXPLAIN не должна прерывать транзакцию вызывающего кода
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as exc:  # план — вспомогательная информация, сбой не должен влиять на запрос
+        return f"EXPLAIN failed: {type(exc).__name__}: {exc}"
+    finally:
+        _explaining.reset(token)
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+class SlowQueryWrapper:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = getattr(settings, "SLOW_QUERY_MS", None)
+        if threshold is None or _explaining.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= threshold:
+            self.record(sql, params, many, elapsed_ms)
+        return result
+
+    def record(self, sql, params, many, elapsed_ms: float) -> None:
+        analyze = (
+            not many
+            and _is_read_only(sql)
+            and random.random() < getattr(settings, "SLOW_QUERY_ANALYZE_RATE", 0.0)
+        )
+        # EXPLAIN не выполняет запрос; ANALYZE — только для SELECT. В прерванной
+        # транзакции (PostgreSQL) план получить нельзя — пропускаем.
+        plan = None
+        if not many and not self.connection.needs_rollback:
+            plan = explain(self.connection, sql, params, analyze)
+        normalized = fingerprint(sql)
+        logger.warning(json.dumps({
+            "ts": round(time.time(), 3),
+            "ms": round(elapsed_ms, 3),
+            "source": describe_source(),
+            "fingerprint": fingerprint_id(normalized),
+            "normalized": normalized,
+            "sql": sql,
+            "params": repr(params)[:1000],
+            "many": many,
+            "analyze": analyze,
+            "plan": plan,
+            "database": self.connection.alias,
+        }, ensure_ascii=False))
+
+
+def install(sender=None, connection=None, **kwargs) -> None:
+    """Обработчик connection_created: одна обёртка на соединение."""
+    if not any(isinstance(wrapper, SlowQueryWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryWrapper(connection))
+
+
+def connect_signals() -> None:
+    connection_created.connect(install, weak=False, dispatch_uid="monitoring.slow_queries")
+
+
+# ---------------- Сводка по журналу ----------------
+def summarize(lines, top: int = 20, sort: str = "total"):
+    """Агрегаты по отпечатку: число, суммарное/среднее/максимальное время, источники, худший план."""
+    groups = {}
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        group = groups.setdefault(record["fingerprint"], {
+            "fingerprint": record["fingerprint"],
+            "normalized": record["normalized"],
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "sources": {},
+            "worst_sql": None,
+            "worst_plan": None,
+        })
+        group["count"] += 1
+        group["total_ms"] += record["ms"]
+        group["sources"][record["source"]] = group["sources"].get(record["source"], 0) + 1
+        if record["ms"] >= group["max_ms"]:
+            group["max_ms"] = record["ms"]
+            group["worst_sql"] = record["sql"]
+            group["worst_plan"] = record.get("plan")
+    for group in groups.values():
+        group["mean_ms"] = group["total_ms"] / group["count"]
+    key = {"total": "total_ms", "count": "count", "max": "max_ms", "mean": "mean_ms"}[sort]
+    return sorted(groups.values(), key=lambda group: group[key], reverse=True)[:top]
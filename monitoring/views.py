@@ -0,0 +1,32 @@
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from monitoring.metrics import REGISTRY
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_allowed(request) -> bool:
+    """
+    Доступ к /metrics: заголовок Authorization: Bearer <METRICS_TOKEN> или
+    адрес (REMOTE_ADDR) из METRICS_ALLOWED_IPS (адреса и сети CIDR).
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False)
+               for network in getattr(settings, "METRICS_ALLOWED_IPS", ()))
+
+
+def metrics_view(request):
+    """Экспозиция метрик в текстовом формате Prometheus (суммарно по процессам)."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
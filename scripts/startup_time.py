@@ -0,0 +1,101 @@
+"""
+Замер времени холодного старта процессов web и Celery-воркера.
+
+Каждый замер — отдельный интерпретатор (как при старте контейнера);
+печатается медиана по --runs запускам и число загруженных модулей.
+
+    poetry run python scripts/startup_time.py --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# код, выполняемый в дочернем процессе; печатает JSON с замерами
+PROBES = {
+    # то, что делает `celery -A config worker` до приёма задач: setup Django и импорт модулей задач
+    "worker": """
+import time, sys, json
+started = time.perf_counter()
+from config.celery import app
+import django
+django.setup()
+app.loader.import_default_modules()
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": len(sys.modules)}))
+""",
+    # WSGI-приложение и полный URLconf (как после первого запроса)
+    "web": """
+import time, sys, json
+started = time.perf_counter()
+from config.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": len(sys.modules)}))
+""",
+    # первый запрос /api/schema/ в свежем процессе
+    "schema": """
+import time, sys, json
+from config.wsgi import application
+from django.test import Client
+started = time.perf_counter()
+response = Client().get("/api/schema/")
+assert response.status_code == 200, response.status_code
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": len(sys.modules)}))
+""",
+}
+
+PROFILES = [
+    ("worker", "config.settings", {}),
+    ("worker", "config.settings_worker", {}),
+    ("web", "config.settings", {}),
+    ("schema", "config.settings", {"OPENAPI_SCHEMA_FILE": ""}),
+    ("schema", "config.settings", {}),
+]
+
+
+def measure(probe: str, settings_module: str, extra_env: dict, runs: int) -> dict:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module, **extra_env}
+    env.setdefault("SECRET_KEY", "startup-report")
+    env.setdefault("ALLOWED_HOSTS", "testserver")
+    samples, modules = [], 0
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBES[probe]], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        modules = result["modules"]
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1),
+            "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    report = []
+    for probe, settings_module, extra_env in PROFILES:
+        label = f"{probe} [{settings_module}]"
+        if probe == "schema":
+            label += " (генерация)" if extra_env.get("OPENAPI_SCHEMA_FILE") == "" else " (готовый файл)"
+            schema_file = ROOT / "openapi-schema.yml"
+            if "OPENAPI_SCHEMA_FILE" not in extra_env and not schema_file.is_file():
+                print(f"{label}: пропущено, нет {schema_file.name} (manage.py spectacular --file {schema_file.name})")
+                continue
+        result = measure(probe, settings_module, extra_env, args.runs)
+        report.append({"probe": label, **result})
+        print(f"{label:<52} медиана {result['median_ms']:>8.1f} мс  мин {result['min_ms']:>8.1f} мс  "
+              f"модулей {result['modules']}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Инфраструктура бенчмарков горячих путей.
+
+Фикстура bench измеряет время (медиана по повторам), число SQL-запросов и
+пиковую аллокацию памяти (tracemalloc), сверяет их с явными бюджетами и
+падает при превышении. Результаты всех бенчмарков сессии пишутся в JSON,
+если задана переменная окружения BENCHMARK_JSON (путь к файлу), — так
+прогоны можно сравнивать между собой.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Audio, Contents, ContentOnPage, Page, Text, Video
+from content.ordering import ORDER_GAP
+
+RESULTS = []
+
+CONTENT_FACTORIES = (
+    lambda i: Video(title=f"Video {i}", video_url=f"https://cdn.example.com/{i}.mp4"),
+    lambda i: Audio(title=f"Audio {i}", transcript="транскрипт " * 50),
+    lambda i: Text(title=f"Text {i}", body="текст " * 200),
+)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = os.getenv("BENCHMARK_JSON")
+    if not path or not RESULTS:
+        return
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": connection.vendor,
+        "results": RESULTS,
+    }
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def bench_page():
+    """Фабрика страниц для бенчмарков: bench_page(size, types=3)."""
+    return build_page
+
+
+def build_page(size, types=3):
+    """Страница из size элементов, контент чередуется по types типам (всё через bulk_create)."""
+    page = Page.objects.create(title=f"Bench {size}")
+    objects = [None] * size
+    for offset, factory in enumerate(CONTENT_FACTORIES[:types]):
+        indexes = range(offset, size, types)
+        created = type(factory(0)).objects.bulk_create([factory(i) for i in indexes])
+        for index, obj in zip(indexes, created):
+            objects[index] = obj
+    wrappers = Contents.objects.bulk_create([Contents(content_object=obj) for obj in objects])
+    ContentOnPage.objects.bulk_create([
+        ContentOnPage(page=page, content=wrapper, order=(i + 1) * ORDER_GAP)
+        for i, wrapper in enumerate(wrappers)
+    ])
+    return page
+
+
+@pytest.fixture
+def bench(request):
+    """
+    bench(name, func, queries=None, ms=None, kib=None, params=None, repeat=5, setup=None)
+
+    queries/ms/kib — бюджет: максимум SQL-запросов, миллисекунд (медиана)
+    и КиБ пиковой памяти; None — без ограничения. func вызывается один раз для прогрева, затем repeat раз для замера времени;
+    запросы и память считаются на отдельном прогоне. setup (если задан)
+    вызывается перед каждым прогоном — например, для сброса кэшей.
+    """
+    def run(name, func, queries=None, ms=None, kib=None, params=None, repeat=5, setup=None):
+        setup = setup or (lambda: None)
+        params = params or {}
+        budget = {"queries": queries, "ms": ms, "kib": kib}
+
+        setup()
+        func()  # прогрев: кэши ContentType, импорт модулей и т.п.
+
+        setup()
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        executed = len(ctx.captured_queries)
+
+        setup()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings = []
+        for _ in range(repeat):
+            setup()
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        result = {
+            "name": name,
+            "test": request.node.nodeid,
+            "params": params,
+            "queries": executed,
+            "ms_median": round(statistics.median(timings), 3),
+            "ms_max": round(max(timings), 3),
+            "peak_kib": round(peak / 1024, 1),
+            "budget": budget,
+        }
+        RESULTS.append(result)
+
+        failures = []
+        if queries is not None and executed > queries:
+            failures.append(f"запросов {executed} > {queries}")
+        if ms is not None and result["ms_median"] > ms:
+            failures.append(f"время {result['ms_median']} мс > {ms} мс")
+        if kib is not None and result["peak_kib"] > kib:
+            failures.append(f"память {result['peak_kib']} КиБ > {kib} КиБ")
+        if failures:
+            sql = "\n".join(q["sql"] for q in ctx.captured_queries[:20])
+            pytest.fail(f"{name} {params}: бюджет превышен — {'; '.join(failures)}\n{sql}")
+        return result
+
+    return run
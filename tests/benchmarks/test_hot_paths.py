@@ -0,0 +1,96 @@
+"""
+Бенчмарки горячих путей с бюджетами по запросам, времени и памяти.
+
+Запуск только бенчмарков с выгрузкой результатов:
+    BENCHMARK_JSON=bench.json poetry run pytest tests/benchmarks
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.serializers import PageDetailSerializer
+from content.models import Page, Video
+from content.tasks import increment_page_content_counters
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+PAGE_SIZES = [10, 100, 1000]
+TYPES = 3
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_page_detail_serializer(bench, bench_page, size):
+    """PageDetailSerializer: страница + 1 запрос на элементы + 1 на каждый тип контента."""
+    page = bench_page(size, TYPES)
+
+    def render():
+        PageDetailSerializer(Page.objects.get(pk=page.pk)).data
+
+    bench("page_detail_serializer", render,
+          queries=2 + TYPES, ms=5 + size * 0.5, kib=64 + size * 8, params={"size": size})
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_get_ordered_contents(bench, bench_page, size):
+    """Page.get_ordered_contents: 1 запрос на элементы + 1 на каждый тип."""
+    page = bench_page(size, TYPES)
+    bench("get_ordered_contents", page.get_ordered_contents,
+          queries=1 + TYPES, ms=5 + size * 0.3, kib=64 + size * 8, params={"size": size})
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_page_detail_view(bench, bench_page, size):
+    """GET /api/pages/<pk>/: ≤ 2 + #types запросов (постановка задачи счётчиков замокана)."""
+    page = bench_page(size, TYPES)
+    client = APIClient()
+
+    def request():
+        cache.clear()
+        with mock.patch("content.tasks.increment_page_content_counters.delay"):
+            assert client.get(f"/api/pages/{page.pk}/").status_code == 200
+
+    bench("page_detail_view", request,
+          queries=2 + TYPES, ms=10 + size * 0.6, kib=128 + size * 12, params={"size": size})
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_page_detail_view_cached(bench, bench_page, size):
+    """GET /api/pages/<pk>/ из кеша: без SQL-запросов."""
+    page = bench_page(size, TYPES)
+    client = APIClient()
+
+    def request():
+        with mock.patch("content.tasks.increment_page_content_counters.delay"):
+            assert client.get(f"/api/pages/{page.pk}/").status_code == 200
+
+    request()
+    bench("page_detail_view_cached", request,
+          queries=0, ms=5 + size * 0.1, kib=128 + size * 12, params={"size": size})
+
+
+@pytest.mark.parametrize("pages", PAGE_SIZES)
+def test_page_list_view(bench, pages):
+    """GET /api/pages/: COUNT + одна страница выборки, независимо от числа страниц."""
+    Page.objects.bulk_create([Page(title=f"Page {i}") for i in range(pages)])
+    client = APIClient()
+
+    def request():
+        assert client.get("/api/pages/").status_code == 200
+
+    bench("page_list_view", request, queries=2, ms=30, kib=256, params={"pages": pages})
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_increment_page_content_counters(bench, bench_page, size):
+    """Задача счётчиков: 1 запрос на элементы + 1 UPDATE на каждый тип."""
+    page = bench_page(size, TYPES)
+    bench("increment_page_content_counters", lambda: increment_page_content_counters(page.pk),
+          queries=1 + TYPES, ms=5 + size * 0.1, kib=64 + size * 2, params={"size": size})
+
+
+def test_increment_counter(bench):
+    """BaseContent.increment_counter: ровно один UPDATE."""
+    video = Video.objects.create(title="Video", video_url="http://video.url")
+    bench("increment_counter", video.increment_counter, queries=1, ms=5, kib=32)
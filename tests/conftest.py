@@ -0,0 +1,38 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from content.models import ContentOnPage, Contents, Page, Video
+
+
+@pytest.fixture
+def admin_client():
+    """APIClient, аутентифицированный как staff-пользователь."""
+    user = get_user_model().objects.create_user("admin", password="x", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш (LocMem) общий для всего процесса тестов — каждый тест начинает с пустого."""
+    cache.clear()
+
+
+@pytest.fixture
+def page_factory():
+    """Фабрика страниц: page_factory(*objs, title=...) размещает объекты контента в порядке objs."""
+    def make(*objs, title="Page"):
+        page = Page.objects.create(title=title)
+        for obj in objs:
+            ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=obj))
+        return page
+    return make
+
+
+@pytest.fixture
+def page(page_factory):
+    """Страница с одним Video."""
+    return page_factory(Video.objects.create(title="Video", video_url="http://video.url"))
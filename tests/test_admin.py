@@ -0,0 +1,92 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from content.models import Page, Contents, Video, Text, ContentOnPage
+
+
+@pytest.fixture
+def superuser_client():
+    client = Client()
+    client.force_login(get_user_model().objects.create_superuser("root", password="x"))
+    return client
+
+
+def make_page(items):
+    page = Page.objects.create(title=f"Page {Page.objects.count()}")
+    for n in range(items):
+        obj = Video.objects.create(title=f"V{n}", video_url="http://video.url") if n % 2 else Text.objects.create(title=f"T{n}", body="b")
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=obj))
+    return page
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries), response
+
+
+@pytest.mark.django_db
+def test_changelists_query_count_does_not_grow(superuser_client):
+    """
+    Число запросов changelist страниц и обёрток не зависит от числа строк.
+    """
+    make_page(2)
+    small_pages, _ = count_queries(superuser_client, "/admin/content/page/")
+    small_contents, _ = count_queries(superuser_client, "/admin/content/contents/")
+    for _ in range(6):
+        make_page(4)
+    large_pages, response = count_queries(superuser_client, "/admin/content/page/")
+    large_contents, _ = count_queries(superuser_client, "/admin/content/contents/")
+
+    assert large_pages == small_pages
+    assert large_contents == small_contents
+    assert '<td class="field-contents_count">4</td>' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_page_change_form_is_paginated_and_batched(superuser_client):
+    """
+    Форма страницы показывает 50 элементов на странице inline, число запросов не растёт с числом элементов.
+    """
+    small = make_page(4)
+    large = make_page(60)
+    small_queries, _ = count_queries(superuser_client, f"/admin/content/page/{small.pk}/change/")
+    large_queries, response = count_queries(superuser_client, f"/admin/content/page/{large.pk}/change/")
+    html = response.content.decode()
+
+    assert large_queries <= small_queries + 1  # +1: COUNT для пагинатора inline
+    assert 'name="content_items-INITIAL_FORMS" value="50"' in html
+    assert "из 60" in html
+
+    _, response = count_queries(superuser_client, f"/admin/content/page/{large.pk}/change/?items_page=2")
+    assert 'name="content_items-INITIAL_FORMS" value="10"' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_paginated_inline_saves_second_page(superuser_client):
+    """
+    POST со второй страницы inline сопоставляет формы с элементами этой страницы.
+    """
+    page = make_page(55)
+    items = list(page.content_items.order_by("order")[50:])
+    data = {
+        "title": page.title,
+        "content_items-TOTAL_FORMS": str(len(items)),
+        "content_items-INITIAL_FORMS": str(len(items)),
+        "content_items-MIN_NUM_FORMS": "0",
+        "content_items-MAX_NUM_FORMS": "1000",
+    }
+    for i, item in enumerate(items):
+        data[f"content_items-{i}-id"] = str(item.pk)
+        data[f"content_items-{i}-page"] = str(page.pk)
+        data[f"content_items-{i}-content"] = str(item.content_id)
+        data[f"content_items-{i}-order"] = str(item.order + (1 if i == 0 else 0))
+    response = superuser_client.post(f"/admin/content/page/{page.pk}/change/?items_page=2", data)
+
+    assert response.status_code == 302
+    items[0].refresh_from_db()
+    assert items[0].order == int(data["content_items-0-order"])
+    assert page.content_items.count() == 55
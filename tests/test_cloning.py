@@ -0,0 +1,91 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from content import ordering
+from content.cloning import clone_page
+from content.models import Page, Contents, Video, ContentOnPage
+
+
+def make_page(title, n):
+    page = Page.objects.create(title=title)
+    for i in range(n):
+        video = Video.objects.create(title=f"{title} {i}", video_url="http://video.url")
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video), alias=f"v{i}")
+    return page
+
+
+def snapshot(page):
+    return [(i.content_id, i.alias) for i in page.get_ordered_items()]
+
+
+@pytest.mark.django_db
+def test_clone_uses_constant_number_of_queries():
+    """
+    Число запросов клонирования не зависит от размера страницы и числа копий.
+    """
+    small, big = make_page("Small", 2), make_page("Big", 30)
+
+    with CaptureQueriesContext(connection) as small_ctx:
+        clone_page(small)
+    with CaptureQueriesContext(connection) as big_ctx:
+        result = clone_page(big, count=5)
+
+    assert len(big_ctx.captured_queries) == len(small_ctx.captured_queries)
+    assert result['items'] == 150
+    for page_id in result['pages']:
+        assert snapshot(Page.objects.get(pk=page_id)) == snapshot(big)
+
+
+@pytest.mark.django_db
+def test_clone_into_existing_targets_appends_and_skips_duplicates():
+    """
+    Клон в существующие страницы дописывает элементы в конец и пропускает уже размещённый контент.
+    """
+    source = make_page("Source", 3)
+    target = make_page("Target", 1)
+    shared = source.get_ordered_items()[0]
+    ContentOnPage.objects.create(page=target, content=shared.content)
+
+    result = clone_page(source, count=0, target_ids=[target.pk])
+    assert result['items'] == 2
+
+    content_ids = [i.content_id for i in target.get_ordered_items()]
+    assert len(content_ids) == len(set(content_ids)) == 4
+    assert content_ids[-2:] == [i.content_id for i in source.get_ordered_items()[1:]]
+
+
+@pytest.mark.django_db
+def test_clone_api(admin_client):
+    """
+    API клонирования возвращает id новых страниц.
+    """
+    source = make_page("Api Source", 2)
+    response = admin_client.post(f"/api/pages/{source.id}/clone/", {"count": 2, "title": "Copy"}, format="json")
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data['pages']) == 2 and data['items'] == 4
+    assert set(Page.objects.filter(pk__in=data['pages']).values_list("title", flat=True)) == {"Copy"}
+
+    response = admin_client.post(f"/api/pages/{source.id}/clone/", {"count": 0, "targets": [999]}, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_clone_into_full_target_rebalances_or_rejects(monkeypatch):
+    """
+    Копия, order которой вышел бы за MAX_ORDER, сначала перенумеровывает страницы; без места — ошибка.
+    """
+    source = make_page("Source", 2)
+    target = make_page("Target", 1)
+    ContentOnPage.objects.filter(page=target).update(order=ordering.MAX_ORDER - 10)
+
+    clone_page(source, count=0, target_ids=[target.pk])
+    orders = [i.order for i in target.get_ordered_items()]
+    assert orders == sorted(orders) and max(orders) <= ordering.MAX_ORDER
+    assert [i.alias for i in target.get_ordered_items()] == ["v0", "v0", "v1"]
+
+    monkeypatch.setattr(ordering, "MAX_ORDER", 4 * ordering.ORDER_GAP)
+    with pytest.raises(ValidationError):
+        clone_page(make_page("Other", 2), count=0, target_ids=[target.pk])
+    assert ContentOnPage.objects.filter(page=target).count() == 3
@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from content.models import Page, Contents, Video, Audio, Text, ContentOnPage
+
+
+def contents_url(page):
+    return f"/api/pages/{page.id}/contents/"
+
+
+@pytest.mark.django_db
+def test_put_builds_page_from_scratch(admin_client):
+    """
+    PUT собирает страницу из пустой: обёртки Contents создаются пакетно.
+    """
+    page = Page.objects.create(title="Compose Page")
+    video = Video.objects.create(title="Video 1", video_url="http://video.url")
+    text = Text.objects.create(title="Text 1", body="Body")
+
+    response = admin_client.put(contents_url(page), [
+        {"type": "text", "id": text.id, "alias": "intro"},
+        {"type": "video", "id": video.id},
+    ], format="json")
+    assert response.status_code == 200
+    assert response.json()['created'] == 2
+
+    items = page.get_ordered_items()
+    assert [i.content.content_object for i in items] == [text, video]
+    assert items[0].alias == "intro"
+
+
+@pytest.mark.django_db
+def test_put_applies_minimal_diff(admin_client):
+    """
+    Повторная сборка трогает только изменившиеся строки: лишние удаляются,
+    переставленный элемент получает новый order, остальные не меняются.
+    """
+    page = Page.objects.create(title="Diff Page")
+    videos = [Video.objects.create(title=f"Video {i}", video_url="http://video.url") for i in range(4)]
+    for video in videos:
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video))
+    audio = Audio.objects.create(title="Audio", transcript="")
+
+    payload = [
+        {"type": "video", "id": videos[0].id},
+        {"type": "video", "id": videos[2].id},
+        {"type": "audio", "id": audio.id},
+        {"type": "video", "id": videos[1].id},
+    ]
+    response = admin_client.put(contents_url(page), payload, format="json")
+    data = response.json()
+    assert (data['created'], data['updated'], data['deleted'], data['unchanged']) == (1, 1, 1, 2)
+
+    titles = [i.content.content_object.title for i in page.get_ordered_items()]
+    assert titles == ["Video 0", "Video 2", "Audio", "Video 1"]
+
+    # повтор того же состава — ничего не меняется и не пишется
+    with CaptureQueriesContext(connection) as ctx:
+        data = admin_client.put(contents_url(page), payload, format="json").json()
+    assert (data['created'], data['updated'], data['deleted']) == (0, 0, 0)
+    assert not [q for q in ctx.captured_queries if q['sql'].startswith(("INSERT", "UPDATE", "DELETE"))]
+
+
+@pytest.mark.django_db
+def test_patch_keeps_unlisted_items(admin_client):
+    """
+    PATCH ставит перечисленные элементы в начало и сохраняет остальные.
+    """
+    page = Page.objects.create(title="Patch Page")
+    first = Video.objects.create(title="First", video_url="http://video.url")
+    second = Video.objects.create(title="Second", video_url="http://video.url")
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=first))
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=second))
+
+    response = admin_client.patch(contents_url(page), [{"type": "video", "id": second.id}], format="json")
+    assert response.json()['deleted'] == 0
+    assert [i.content.content_object.title for i in page.get_ordered_items()] == ["Second", "First"]
+
+
+@pytest.mark.django_db
+def test_compose_validation_errors(admin_client):
+    """
+    Несуществующие объекты и дубликаты отклоняются целиком, страница не меняется.
+    """
+    page = Page.objects.create(title="Invalid Page")
+    video = Video.objects.create(title="Video", video_url="http://video.url")
+
+    response = admin_client.put(contents_url(page), [
+        {"type": "video", "id": video.id},
+        {"type": "video", "id": video.id},
+        {"type": "text", "id": 999},
+    ], format="json")
+    assert response.status_code == 400
+    assert len(response.json()) == 2
+    assert not page.content_items.exists()
+
+    assert APIClient().put(contents_url(page), [], format="json").status_code == 403
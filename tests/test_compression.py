@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+
+from content import compression, fields
+from content.compression import CompressedText
+from content.models import Audio, ContentOnPage, Contents, Page, Text
+from content.recompress import compress_existing
+
+LONG = "Интервью о квантовой механике. " * 200
+
+
+def stored(model, pk, column):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {column} FROM {model._meta.db_table} WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_long_text_stored_compressed_and_read_back():
+    """
+    Длинное тело хранится сжатым с маркером формата, короткое — как UTF-8; чтение прозрачно.
+    """
+    text = Text.objects.create(title="Long", body=LONG)
+    audio = Audio.objects.create(title="Short", transcript="Коротко")
+
+    raw = bytes(stored(Text, text.pk, "body"))
+    assert raw.startswith(b"\xffz") and len(raw) < len(LONG.encode("utf-8")) // 10
+    assert Text.objects.get(pk=text.pk).body == LONG
+    assert Audio.objects.get(pk=audio.pk).transcript == "Коротко"
+    assert Audio.objects.create(title="Empty").transcript is None
+
+
+@pytest.mark.django_db
+def test_decompression_is_lazy(monkeypatch):
+    """
+    Загрузка объекта не распаковывает тело; распаковка — при обращении к атрибуту, один раз.
+    Нетронутое тело при сохранении не пережимается (распаковывает его только поисковый индекс).
+    """
+    text = Text.objects.create(title="Long", body=LONG)
+    calls = []
+    original = compression.decompress
+    monkeypatch.setattr(compression, "decompress", lambda payload: calls.append(1) or original(payload))
+
+    loaded = Text.objects.get(pk=text.pk)
+    assert isinstance(loaded.__dict__["body"], CompressedText) and calls == []
+
+    loaded.title = "Renamed"
+    monkeypatch.setattr(fields, "compress", lambda *args, **kwargs: pytest.fail("повторное сжатие"))
+    loaded.save()
+    assert calls == [1]
+    assert loaded.body == LONG and loaded.body == LONG
+    assert calls == [1]
+
+    Text.objects.get(pk=text.pk).title
+    assert calls == [1]
+
+
+@pytest.mark.django_db
+def test_compress_content_command_compresses_legacy_rows():
+    """
+    Строки, записанные до миграции (UTF-8 без маркера), сжимаются командой порциями; API отдаёт то же тело.
+    """
+    texts = [Text.objects.create(title=f"T{n}", body="коротко") for n in range(3)]
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE content_text SET body = %s", [LONG])
+    page = Page.objects.create(title="Page")
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=texts[0]))
+    assert Text.objects.get(pk=texts[0].pk).body == LONG
+
+    dry = compress_existing(batch_size=2, dry_run=True)
+    assert (dry["rows"], dry["compressed"]) == (3, 3) and dry["bytes_after"] < dry["bytes_before"]
+    assert not isinstance(stored(Text, texts[0].pk, "body"), bytes)
+
+    call_command("compress_content", "--batch-size", "2")
+    assert all(bytes(stored(Text, t.pk, "body")).startswith(b"\xffz") for t in texts)
+    assert compress_existing()["compressed"] == 0
+    assert APIClient().get(f"/api/pages/{page.pk}/").json()["contents"][0]["body"] == LONG
@@ -0,0 +1,38 @@
+import pytest
+from content.contention import COUNTER_STRATEGIES, create_targets, drop_targets, read_counters, run_benchmark
+from content.models import ContentOnPage, Page, Video
+
+
+@pytest.mark.django_db
+def test_targets_share_objects_between_neighbour_pages():
+    """
+    Соседние страницы делят долю overlap объектов; drop_targets удаляет всё созданное.
+    """
+    targets = create_targets(pages=3, per_page=4, overlap=0.5, seed=1)
+    assert [len(ids) for _, ids in targets] == [4, 4, 4]
+    assert len(set(targets[0][1]) & set(targets[1][1])) == 2
+    assert not set(targets[0][1]) & set(targets[2][1])
+    assert ContentOnPage.objects.filter(page_id=targets[0][0]).count() == 4
+
+    drop_targets(targets)
+    assert not Page.objects.exists() and not Video.objects.exists()
+
+
+@pytest.mark.django_db
+def test_every_strategy_accounts_for_all_increments():
+    """
+    Каждая стратегия без конкуренции даёт ровно ожидаемый прирост: ни потерь, ни задвоений.
+    """
+    targets = create_targets(pages=4, per_page=5, overlap=0.4, seed=2)
+    report = run_benchmark(targets, list(COUNTER_STRATEGIES), [1], operations=10)
+
+    assert [row["strategy"] for row in report] == list(COUNTER_STRATEGIES)
+    for row in report:
+        assert row["operations"] == 10
+        assert row["increments"] == 50
+        assert (row["lost"], row["duplicated"], row["errors"]) == (0, 0, {})
+    # базовый прогон + уровень 1 на каждую стратегию
+    assert sum(read_counters(targets).values()) == 2 * 50 * len(COUNTER_STRATEGIES)
+
+    with pytest.raises(ValueError):
+        run_benchmark(targets, ["missing"], [1], operations=1)
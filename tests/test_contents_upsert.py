@@ -0,0 +1,60 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+from content.models import Contents, Video, Audio, Text
+
+
+@pytest.mark.django_db
+def test_ensure_for_objects_is_idempotent_and_constant():
+    """
+    Обёртки для сотен объектов разных типов — фиксированное число запросов; повторный вызов не создаёт дублей.
+    """
+    objs = [Video.objects.create(title=f"V{n}", video_url="http://video.url") for n in range(100)]
+    objs += [Audio.objects.create(title=f"A{n}") for n in range(100)]
+    objs += [Text.objects.create(title=f"T{n}", body="b") for n in range(100)]
+    existing = Contents.objects.create(content_object=objs[0])
+
+    with CaptureQueriesContext(connection) as ctx:
+        wrappers = Contents.objects.ensure_for_objects(objs)
+    assert len(ctx.captured_queries) <= 3  # INSERT … ON CONFLICT + SELECT (+ служебный запрос ContentType)
+    assert len(wrappers) == 300
+    key = (ContentType.objects.get_for_model(Video).pk, objs[0].pk)
+    assert wrappers[key].pk == existing.pk
+
+    again = Contents.objects.ensure_for_objects(reversed(objs))
+    assert {k: w.pk for k, w in again.items()} == {k: w.pk for k, w in wrappers.items()}
+    assert Contents.objects.count() == 300
+
+    with pytest.raises(IntegrityError):
+        Contents.objects.create(content_object=objs[1])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_merges_duplicate_wrappers():
+    """
+    Миграция 0005 переводит элементы страниц на самую старую обёртку, удаляет дубли и лишние элементы.
+    """
+    executor = MigrationExecutor(connection)
+    executor.migrate([("content", "0004_where_used_index")])
+    apps = executor.loader.project_state([("content", "0004_where_used_index")]).apps
+    Page = apps.get_model("content", "Page")
+    HVideo = apps.get_model("content", "Video")
+    HContents = apps.get_model("content", "Contents")
+    HContentOnPage = apps.get_model("content", "ContentOnPage")
+    ct = ContentType.objects.get_for_model(Video)
+
+    video = HVideo.objects.create(title="Video", video_url="http://video.url")
+    first, second = Page.objects.create(title="First"), Page.objects.create(title="Second")
+    keep, dup1, dup2 = (HContents.objects.create(content_type_id=ct.pk, _object_id=video.pk) for _ in range(3))
+    HContentOnPage.objects.create(page=first, content=keep, order=1)
+    HContentOnPage.objects.create(page=first, content=dup1, order=2)   # та же страница — удаляется
+    HContentOnPage.objects.create(page=second, content=dup2, order=1)  # переводится на keep
+
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    assert list(Contents.objects.values_list("pk", flat=True)) == [keep.pk]
+    assert sorted(Contents.objects.get().page_items.values_list("page_id", flat=True)) == [first.pk, second.pk]
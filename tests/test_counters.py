@@ -0,0 +1,118 @@
+from unittest import mock
+
+import fakeredis
+import pytest
+from rest_framework.test import APIClient
+
+from content.counters import RedisCounterBackend
+from content.models import Audio, CounterTransfer, Video
+from content.tasks import reconcile_counters
+
+
+@pytest.fixture
+def redis_backend(settings):
+    client = fakeredis.FakeRedis()
+    settings.CONTENT_COUNTER_BACKEND = "content.counters.RedisCounterBackend"
+    settings.CONTENT_COUNTER_OPTIONS = {"client": client}
+    return RedisCounterBackend(client=client)
+
+
+@pytest.fixture
+def page(page_factory):
+    return page_factory(
+        Video.objects.create(title="Video", video_url="http://video.url", counter=10),
+        Audio.objects.create(title="Audio"),
+    )
+
+
+def counters(response):
+    return [(item["type"], item["counter"]) for item in response.json()["contents"]]
+
+
+@pytest.mark.django_db
+def test_views_counted_in_redis_and_served_live(redis_backend, page, django_assert_num_queries):
+    """
+    Просмотр — HINCRBY в Redis без записи в БД; ответ (и из кеша) показывает живые значения.
+    Повторный просмотр (count=False) счётчик не меняет.
+    """
+    client = APIClient()
+    assert counters(client.get(f"/api/pages/{page.pk}/")) == [("Video", 11), ("Audio", 1)]
+    with django_assert_num_queries(0):
+        response = client.get(f"/api/pages/{page.pk}/")
+    assert counters(response) == [("Video", 12), ("Audio", 2)]
+    assert Video.objects.get().counter == 10
+
+    video = Video.objects.get()
+    assert redis_backend.live_deltas("video", [video.pk]) == {video.pk: 2}
+    # повтор (content.dedup) не учитывается, но живые значения отдаются
+    data = {"id": page.pk, "contents": [{"type": "Video", "id": video.pk, "counter": 10}]}
+    replay = redis_backend.record_view(data, count=False)
+    assert replay["contents"][0]["counter"] == 12
+    assert redis_backend.live_deltas("video", [video.pk]) == {video.pk: 2}
+
+
+@pytest.mark.django_db
+def test_reconcile_moves_deltas_to_database(redis_backend, page):
+    """
+    Перенос пишет приращения в БД сгруппированными UPDATE и очищает Redis;
+    ответ из кеша (с counter до переноса) показывает те же живые значения.
+    """
+    client = APIClient()
+    for _ in range(3):
+        client.get(f"/api/pages/{page.pk}/")
+    other = Audio.objects.create(title="Other")
+    redis_backend.client.hincrby(redis_backend.key("audio"), other.pk, 3)
+
+    report = reconcile_counters()
+    # video +3, два объекта audio с delta 3 — один UPDATE на (тип, delta)
+    assert report == {"objects": 3, "views": 9, "updates": 2}
+    assert Video.objects.get().counter == 13
+    assert set(Audio.objects.values_list("counter", flat=True)) == {3}
+    assert reconcile_counters()["objects"] == 0
+    assert counters(client.get(f"/api/pages/{page.pk}/")) == [("Video", 14), ("Audio", 4)]
+
+
+@pytest.mark.django_db
+def test_reconcile_resumes_interrupted_run(redis_backend, page):
+    """
+    Хеш, переименованный прерванным до записи в БД запуском, переносится следующим; новые просмотры не теряются.
+    """
+    video = Video.objects.get()
+    redis_backend.client.hincrby(redis_backend.key("video"), video.pk, 5)
+    redis_backend.client.rename(redis_backend.key("video"), redis_backend.pending_key("video"))
+    redis_backend.client.hincrby(redis_backend.key("video"), video.pk, 2)
+    assert redis_backend.live_deltas("video", [video.pk]) == {video.pk: 7}
+
+    redis_backend.reconcile()
+    assert Video.objects.get().counter == 15
+    redis_backend.reconcile()
+    assert Video.objects.get().counter == 17
+
+
+@pytest.mark.django_db
+def test_reconcile_applies_deltas_once_after_failure(redis_backend, page):
+    """
+    Сбой после коммита UPDATE (хеш не удалён) не переносит приращения повторно;
+    сбой до коммита откатывает и токен — следующий запуск переносит заново.
+    """
+    video = Video.objects.get()
+    redis_backend.client.hincrby(redis_backend.key("video"), video.pk, 5)
+    with mock.patch.object(RedisCounterBackend, "_finish", side_effect=ConnectionError):
+        with pytest.raises(ConnectionError):
+            redis_backend.reconcile()
+    assert Video.objects.get().counter == 15
+    assert redis_backend.client.exists(redis_backend.pending_key("video"))
+
+    assert redis_backend.reconcile() == {"objects": 0, "views": 0, "updates": 0}
+    assert Video.objects.get().counter == 15
+    assert redis_backend.live_deltas("video", [video.pk]) == {video.pk: 0}
+    assert int(redis_backend.client.hget(redis_backend.base_key("video"), video.pk)) == 15
+    assert not CounterTransfer.objects.exists()
+
+    redis_backend.client.hincrby(redis_backend.key("video"), video.pk, 2)
+    # сбой после UPDATE, до коммита: откатываются и UPDATE, и токен
+    with mock.patch("django.db.models.query.QuerySet.values_list", side_effect=ConnectionError):
+        with pytest.raises(ConnectionError):
+            redis_backend.reconcile()
+    assert redis_backend.reconcile()["views"] == 2
+    assert Video.objects.get().counter == 17
@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.test import APIClient
+
+from content.models import Audio, Text, Video
+
+
+@pytest.fixture
+def page(page_factory):
+    objs = [
+        Video.objects.create(title="Video", video_url="http://video.url", counter=5),
+        Text.objects.create(title="Text", body="Длинное тело " * 500, counter=7),
+        Audio.objects.create(title="Audio", transcript="Транскрипт", counter=1),
+    ]
+    return page_factory(*objs), objs
+
+
+@pytest.mark.django_db
+def test_page_counters_one_query_per_type(page, django_assert_num_queries):
+    """
+    ?page= отдаёт только [type, id, counter] в порядке страницы: элементы + один запрос на тип.
+    """
+    page, (video, text, audio) = page
+    with django_assert_num_queries(4):
+        response = APIClient().get(f"/api/counters/?page={page.pk}")
+    assert response.json() == {"counters": [["video", video.pk, 5], ["text", text.pk, 7], ["audio", audio.pk, 1]]}
+    assert APIClient().get("/api/counters/?page=999999").status_code == 404
+
+
+@pytest.mark.django_db
+def test_item_counters_cached_with_etag(page, settings, django_assert_num_queries):
+    """
+    ?items= в порядке запроса; повтор — из кеша без SQL, If-None-Match с тем же ETag — 304 без тела.
+    """
+    _, (video, text, _) = page
+    client = APIClient()
+    url = f"/api/counters/?items=text:{text.pk},video:{video.pk},video:999999"
+    first = client.get(url)
+    assert first.json()["counters"] == [["text", text.pk, 7], ["video", video.pk, 5]]
+    assert first["Cache-Control"] == f"max-age={settings.COUNTERS_CACHE_TIMEOUT}"
+
+    with django_assert_num_queries(0):
+        cached = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert cached.status_code == 304 and not cached.content
+    assert client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "page=1&items=video:1", "items=photo:1", "items=video:x", "items=,"])
+def test_counters_query_validation(query):
+    """
+    Нужен ровно один из page/items; items — список type:id известных типов.
+    """
+    assert APIClient().get(f"/api/counters/?{query}").status_code == 400
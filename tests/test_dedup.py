@@ -0,0 +1,93 @@
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from content.dedup import LocalViewDedup, RedisViewDedup, bloom_size, client_address
+from monitoring.metrics import REGISTRY
+
+
+def test_rotating_filter_forgets_after_window():
+    """
+    Повтор подавляется в пределах окна и снова учитывается, когда его сегменты вытеснены.
+    """
+    dedup = LocalViewDedup(window=60, generations=3, capacity=1000, fpr=0.01)
+    with mock.patch("content.dedup.time.time", return_value=1000.0):
+        assert not dedup.seen("client", 1)
+        assert dedup.seen("client", 1)
+        assert not dedup.seen("client", 2) and not dedup.seen("other", 1)
+    with mock.patch("content.dedup.time.time", return_value=1000.0 + 60):
+        # ровно через окно ещё повтор (и запись продлевает его)
+        assert dedup.seen("client", 1)
+    with mock.patch("content.dedup.time.time", return_value=1000.0 + 60 + 90):
+        assert not dedup.seen("client", 1)
+    assert len(dedup._filters) <= 3
+
+
+def test_false_positive_rate_estimate():
+    """
+    Оценка доли ложных срабатываний по заполненности близка к целевой при расчётной нагрузке и к наблюдаемой.
+    """
+    capacity, fpr = 2000, 0.01
+    dedup = LocalViewDedup(window=3600, generations=2, capacity=capacity, fpr=fpr)
+    assert bloom_size(capacity, fpr) == (dedup.bits, dedup.hashes) == (19171, 7)
+    for n in range(capacity):
+        dedup.seen(f"client-{n}", 1)
+    estimate = dedup.false_positive_rate()
+    (bloom,) = dedup._filters.values()
+    # проверка без записи: доля новых элементов, все биты которых уже стоят
+    observed = sum(
+        all(bloom[p >> 3] & (1 << (p & 7)) for p in dedup.positions(f"new-{n}:1")) for n in range(5000)
+    ) / 5000
+    assert 0.005 < estimate < 0.02
+    assert abs(observed - estimate) < 0.01
+    assert dedup.stats()["memory_bytes"] == 2 * 2397
+
+
+@pytest.mark.django_db
+def test_repeat_views_not_counted(settings, page):
+    """
+    Повторный просмотр страницы тем же клиентом не ставит задачу счётчиков; другой клиент — ставит.
+    """
+    settings.VIEW_DEDUP_BACKEND = "content.dedup.LocalViewDedup"
+    settings.VIEW_DEDUP_OPTIONS = {"window": 600, "capacity": 1000}
+    REGISTRY.reset()
+    with mock.patch("content.tasks.increment_page_content_counters.delay") as delay:
+        for address in ("10.0.0.1", "10.0.0.1", "10.0.0.1", "10.0.0.2"):
+            assert APIClient(REMOTE_ADDR=address).get(f"/api/pages/{page.pk}/").status_code == 200
+    assert delay.call_count == 2
+    text = REGISTRY.exposition()
+    assert 'view_dedup_events_total{result="suppressed"} 2' in text
+    assert "view_dedup_false_positive_rate " in text
+
+
+def test_client_address_ignores_client_supplied_forwarded_for(settings):
+    """
+    Адрес клиента — запись X-Forwarded-For, дописанная доверенным прокси; подделанное начало заголовка не влияет.
+    """
+    request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="1.2.3.4, 203.0.113.7", REMOTE_ADDR="10.0.0.1")
+    settings.VIEW_DEDUP_PROXY_HOPS = 0
+    assert client_address(request) == "10.0.0.1"
+    settings.VIEW_DEDUP_PROXY_HOPS = 1
+    assert client_address(request) == "203.0.113.7"
+    settings.VIEW_DEDUP_PROXY_HOPS = 3
+    assert client_address(request) == "10.0.0.1"
+
+
+def test_redis_filter_shared_between_instances(settings, capsys):
+    """
+    Фильтр в Redis общий для процессов: повтор, записанный одним экземпляром, виден другому.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    first, second = (RedisViewDedup(client=client, window=60, capacity=1000) for _ in range(2))
+    assert not first.seen("client", 1)
+    assert second.seen("client", 1)
+    assert 0 < second.stats()["fill"][-1] < 0.01
+
+    settings.VIEW_DEDUP_BACKEND = "content.dedup.RedisViewDedup"
+    settings.VIEW_DEDUP_OPTIONS = {"client": client, "window": 60, "capacity": 1000}
+    call_command("view_dedup_stats")
+    assert "Оценка доли ложных повторов" in capsys.readouterr().out
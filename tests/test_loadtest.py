@@ -0,0 +1,51 @@
+import fakeredis
+import pytest
+from api.loadtest import CounterProbe, latency_summary
+from content.models import Page, Contents, Video, Text, ContentOnPage
+
+
+def test_latency_summary_percentiles():
+    """
+    Перцентили считаются по отсортированной выборке.
+    """
+    summary = latency_summary([float(v) for v in range(100, 0, -1)])
+    assert summary['count'] == 100
+    assert (summary['p50_ms'], summary['p95_ms'], summary['p99_ms'], summary['max_ms']) == (51.0, 95.0, 99.0, 100.0)
+    assert latency_summary([])['p50_ms'] is None
+
+
+@pytest.mark.django_db
+def test_counter_probe_expected_increments():
+    """
+    Ожидаемый прирост на просмотр учитывает только существующие объекты; сумма счётчиков — без дублей между страницами.
+    """
+    video = Video.objects.create(title="Shared", video_url="http://video.url", counter=5)
+    text = Text.objects.create(title="Text", body="Body", counter=2)
+    first, second = Page.objects.create(title="First"), Page.objects.create(title="Second")
+    shared = Contents.objects.create(content_object=video)
+    ContentOnPage.objects.create(page=first, content=shared)
+    ContentOnPage.objects.create(page=second, content=shared)
+    ContentOnPage.objects.create(page=first, content=Contents.objects.create(content_object=text))
+    # обёртка на удалённый объект не даёт инкремента
+    ContentOnPage.objects.create(page=second, content=Contents.objects.create(content_type=shared.content_type, _object_id=999))
+
+    probe = CounterProbe([first.pk, second.pk])
+    assert probe.per_view == {first.pk: 2, second.pk: 1}
+    assert probe.total() == 7
+
+
+@pytest.mark.django_db
+def test_counter_probe_adds_live_deltas(settings):
+    """
+    Сумма счётчиков включает приращения, ещё не перенесённые из Redis в БД.
+    """
+    client = fakeredis.FakeRedis()
+    settings.CONTENT_COUNTER_BACKEND = "content.counters.RedisCounterBackend"
+    settings.CONTENT_COUNTER_OPTIONS = {"client": client}
+    video = Video.objects.create(title="Video", video_url="http://video.url", counter=5)
+    page = Page.objects.create(title="Page")
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video))
+
+    probe = CounterProbe([page.pk])
+    client.hincrby(probe.backend.key("video"), video.pk, 3)
+    assert probe.total() == 8
@@ -0,0 +1,119 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from rest_framework.test import APIClient
+from content.models import Page, Contents, Video, Text, ContentOnPage
+from monitoring.metrics import REGISTRY, Registry
+
+
+@pytest.fixture
+def registry():
+    """Пустой реестр с одним счётчиком и одной гистограммой."""
+    reg = Registry()
+    reg.counter("jobs_total", "Jobs", ("kind",))
+    reg.histogram("job_seconds", "Job time", buckets=(0.1, 1.0))
+    return reg
+
+
+def test_exposition_format(registry):
+    """
+    Гистограмма отдаётся кумулятивными бакетами с +Inf, _sum и _count.
+    """
+    registry.metrics["jobs_total"].inc(kind='a"b')
+    for value in (0.05, 0.5, 5):
+        registry.metrics["job_seconds"].observe(value)
+
+    text = registry.exposition()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="a\\"b"} 1' in text
+    assert 'job_seconds_bucket{le="0.1"} 1' in text
+    assert 'job_seconds_bucket{le="1"} 2' in text
+    assert 'job_seconds_bucket{le="+Inf"} 3' in text
+    assert 'job_seconds_count 3' in text
+
+
+def test_multiprocess_snapshots_are_summed(registry, settings, tmp_path):
+    """
+    В мультипроцессном режиме /metrics суммирует снимки всех процессов, включая завершившиеся.
+    """
+    settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+    (tmp_path / "1.json").write_text('{"jobs_total": [[["a"], 5]], "job_seconds": [[[], [1, 0, 0, 0.05, 1]]]}')
+    registry.metrics["jobs_total"].inc(2, kind="a")
+    registry.metrics["job_seconds"].observe(0.5)
+
+    text = registry.exposition()
+    assert 'jobs_total{kind="a"} 7' in text
+    assert 'job_seconds_bucket{le="1"} 2' in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_dead_process_snapshots_archived(registry, settings, tmp_path):
+    """
+    Снимки завершившихся процессов сворачиваются в archive.json: суммы не меняются, файлы удаляются.
+    """
+    settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_pid = int(dead.stdout)
+    (tmp_path / f"{dead_pid}.json").write_text('{"jobs_total": [[["a"], 5]]}')
+    (tmp_path / "archive.json").write_text('{"jobs_total": [[["a"], 1]]}')
+    registry.metrics["jobs_total"].inc(2, kind="a")
+
+    assert 'jobs_total{kind="a"} 8' in registry.exposition()
+    assert not (tmp_path / f"{dead_pid}.json").exists()
+    assert json.loads((tmp_path / "archive.json").read_text()) == {"jobs_total": [[["a"], 6]]}
+    assert 'jobs_total{kind="a"} 8' in registry.exposition()
+
+
+def test_concurrent_flushes_keep_snapshot_valid(registry, settings, tmp_path):
+    """
+    Одновременные сбросы из потоков не портят снимок и не оставляют временных файлов.
+    """
+    settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+    settings.METRICS_FLUSH_INTERVAL = 0
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: registry.metrics["jobs_total"].inc(kind="a"), range(400)))
+    registry.flush()
+    assert json.loads((tmp_path / f"{os.getpid()}.json").read_text())["jobs_total"] == [[["a"], 400]]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_restricted(settings):
+    """
+    /metrics — только с разрешённых адресов или с токеном.
+    """
+    settings.METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+    settings.METRICS_TOKEN = "secret"
+    assert APIClient(REMOTE_ADDR="10.1.2.3").get("/metrics").status_code == 200
+    assert APIClient(REMOTE_ADDR="192.0.2.1").get("/metrics").status_code == 403
+    assert APIClient(REMOTE_ADDR="192.0.2.1").get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 403
+    assert APIClient(REMOTE_ADDR="192.0.2.1").get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code == 200
+
+
+@pytest.mark.django_db
+def test_page_detail_request_metrics():
+    """
+    Запрос детальной страницы попадает в гистограммы времени, SQL, элементов страницы и выполнения задачи.
+    """
+    REGISTRY.reset()
+    page = Page.objects.create(title="Page")
+    video = Video.objects.create(title="Video", video_url="http://video.url")
+    text = Text.objects.create(title="Text", body="Body")
+    for order, obj in enumerate((video, text), start=1):
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=obj), order=order)
+
+    client = APIClient()
+    assert client.get(f"/api/pages/{page.pk}/").status_code == 200
+    text = client.get("/metrics").content.decode()
+
+    assert 'http_request_duration_seconds_count{view="api:page-detail",method="GET",status="200"} 1' in text
+    assert 'http_request_db_queries_count{view="api:page-detail"} 1' in text
+    assert 'serializer_duration_seconds_count{view="api:page-detail"} 1' in text
+    assert 'page_items_bucket{le="2"} 1' in text
+    assert 'page_content_types_bucket{le="1"} 0' in text
+    assert 'page_content_types_bucket{le="2"} 1' in text
+    assert 'celery_task_duration_seconds_count{task="content.tasks.increment_page_content_counters",state="SUCCESS"} 1' in text
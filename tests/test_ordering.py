@@ -0,0 +1,142 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from content import ordering
+from content.models import Page, Contents, Video, ContentOnPage
+from content.ordering import MAX_ORDER, ORDER_GAP
+
+
+def make_page(n):
+    page = Page.objects.create(title="Order Page")
+    items = []
+    for i in range(n):
+        video = Video.objects.create(title=f"Video {i}", video_url="http://video.url")
+        items.append(ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video)))
+    return page, items
+
+
+@pytest.mark.django_db
+def test_append_uses_gaps():
+    """
+    Добавление в конец выдаёт order с шагом ORDER_GAP.
+    """
+    _, items = make_page(3)
+    assert [i.order for i in items] == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+
+
+@pytest.mark.django_db
+def test_append_at_max_order_rebalances_page():
+    """
+    Добавление в конец, когда order упёрся в MAX_ORDER, перенумеровывает страницу, а не переполняет поле.
+    """
+    page, items = make_page(2)
+    ContentOnPage.objects.filter(pk=items[1].pk).update(order=MAX_ORDER - 10)
+    video = Video.objects.create(title="Last", video_url="http://video.url")
+    item = ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video))
+
+    assert item.order == 3 * ORDER_GAP
+    assert [i.pk for i in page.get_ordered_items()] == [items[0].pk, items[1].pk, item.pk]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_spreads_orders_by_rank():
+    """
+    Миграция 0003 нумерует элементы страницы по рангу: порядок сохраняется и при очень больших order.
+    """
+    executor = MigrationExecutor(connection)
+    executor.migrate([("content", "0002_search_index")])
+    apps = executor.loader.project_state([("content", "0002_search_index")]).apps
+    HPage = apps.get_model("content", "Page")
+    HVideo = apps.get_model("content", "Video")
+    HContents = apps.get_model("content", "Contents")
+    HContentOnPage = apps.get_model("content", "ContentOnPage")
+    ct = ContentType.objects.get_for_model(Video)
+
+    page = HPage.objects.create(title="Mixed")
+    items = []
+    for order in (5, MAX_ORDER // ORDER_GAP + 1000, 1):
+        video = HVideo.objects.create(title=f"Video {order}", video_url="http://video.url")
+        wrapper = HContents.objects.create(content_type_id=ct.pk, _object_id=video.pk)
+        items.append(HContentOnPage.objects.create(page=page, content=wrapper, order=order).pk)
+
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    orders = dict(ContentOnPage.objects.values_list("pk", "order"))
+    assert [orders[pk] for pk in items] == [2 * ORDER_GAP, 3 * ORDER_GAP, ORDER_GAP]
+
+
+@pytest.mark.django_db
+def test_move_touches_single_row():
+    """
+    Перемещение элемента — блокировка страницы, чтение target и соседа, один UPDATE
+    одной строки, запись в outbox и отметка изменения страницы.
+    """
+    page, items = make_page(5)
+    with CaptureQueriesContext(connection) as ctx:
+        items[4].move_before(items[1])
+    writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "content_contentonpage"')]
+    assert len(writes) == 1
+    assert len(ctx.captured_queries) == 6
+    assert ctx.captured_queries[0]['sql'].startswith('SELECT "content_page"."id" FROM "content_page"')
+    assert any("content_pagechange" in q['sql'] for q in ctx.captured_queries)
+
+    ordered = [i.pk for i in page.get_ordered_items()]
+    assert ordered == [items[0].pk, items[4].pk, items[1].pk, items[2].pk, items[3].pk]
+
+
+@pytest.mark.django_db
+def test_move_rebalances_when_gap_runs_out():
+    """
+    Когда промежуток исчерпан, страница перенумеровывается и перемещение всё равно выполняется.
+    """
+    page, items = make_page(3)
+    ContentOnPage.objects.filter(pk=items[0].pk).update(order=1)
+    ContentOnPage.objects.filter(pk=items[1].pk).update(order=2)
+    items[0].refresh_from_db()
+    items[1].refresh_from_db()
+
+    items[2].move_after(items[0])
+
+    ordered = page.get_ordered_items()
+    assert [i.pk for i in ordered] == [items[0].pk, items[2].pk, items[1].pk]
+    orders = [i.order for i in ordered]
+    assert all(b - a > 1 for a, b in zip(orders, orders[1:]))
+
+
+@pytest.mark.django_db
+def test_move_retries_once_after_rebalance(monkeypatch):
+    """
+    Если и после перенумерации места нет, перемещение падает с ValidationError, а не повторяется бесконечно.
+    """
+    page, items = make_page(3)
+    calls = []
+    monkeypatch.setattr(ordering, "order_between", lambda lo, hi: None)
+    monkeypatch.setattr(ordering, "rebalance_page", calls.append)
+
+    with pytest.raises(ValidationError), transaction.atomic():
+        items[2].move_before(items[0])
+
+    assert calls == [page.pk]
+    assert [i.pk for i in page.get_ordered_items()] == [i.pk for i in items]
+
+
+@pytest.mark.django_db
+def test_move_api(admin_client):
+    """
+    API перемещения: after/before и ошибки валидации.
+    """
+    page, items = make_page(3)
+    url = f"/api/pages/{page.id}/items/{items[0].id}/move/"
+
+    response = admin_client.post(url, {"after": items[2].id}, format="json")
+    assert response.status_code == 200
+    assert [i.pk for i in page.get_ordered_items()] == [items[1].pk, items[2].pk, items[0].pk]
+
+    assert admin_client.post(url, {}, format="json").status_code == 400
+    assert APIClient().post(url, {"before": items[1].id}, format="json").status_code == 403
@@ -0,0 +1,170 @@
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from content.composition import compose_page
+from content.models import Page, PageChange, Contents, Video, Text, ContentOnPage
+from content.outbox import drain_outbox
+from content.signals import delete_content
+from content.purge import LocalPurgeBackend
+from content.tasks import drain_page_outbox
+
+
+@pytest.fixture
+def purged(settings):
+    settings.CDN_PURGE_BACKEND = "content.purge.LocalPurgeBackend"
+    LocalPurgeBackend.reset()
+    yield LocalPurgeBackend.calls
+    LocalPurgeBackend.reset()
+
+
+def place(obj, pages):
+    wrapper, _ = Contents.objects.get_or_create_for_object(obj)
+    for page in pages:
+        ContentOnPage.objects.create(page=page, content=wrapper)
+
+
+@pytest.mark.django_db
+def test_video_change_purges_all_embedding_pages_at_once(purged):
+    """
+    Изменение одного Video — одна строка outbox и один вызов очистки со всеми его страницами.
+    """
+    video = Video.objects.create(title="Shared", video_url="http://video.url")
+    pages = [Page.objects.create(title=f"Page {i}") for i in range(3)]
+    place(video, pages)
+    place(Text.objects.create(title="Other", body="Body"), [Page.objects.create(title="Unrelated")])
+    drain_outbox()
+    LocalPurgeBackend.reset()
+
+    video.title = "Renamed"
+    video.save()
+    assert PageChange.objects.count() == 1
+
+    report = drain_page_outbox()
+    assert LocalPurgeBackend.calls == [sorted(page.pk for page in pages)]
+    assert report["events"] == 1 and report["purges"] == 1
+    assert not PageChange.objects.exists()
+
+
+@pytest.mark.django_db
+def test_duplicate_page_events_coalesced(purged):
+    """
+    Несколько изменений одной страницы в пачке — страница очищается один раз.
+    """
+    page = Page.objects.create(title="Page")
+    videos = [Video.objects.create(title=f"V{i}", video_url="http://video.url") for i in range(3)]
+    compose_page(page, [{"type": "video", "id": video.pk} for video in videos])
+    first, *_, last = page.get_ordered_items()
+    last.move_before(first)
+    page.title = "Retitled"
+    page.save()
+
+    report = drain_outbox()
+    assert report["events"] > 3
+    assert LocalPurgeBackend.calls == [[page.pk]]
+
+
+@pytest.mark.django_db
+def test_outbox_written_in_same_transaction():
+    """
+    Откат изменения откатывает и событие outbox.
+    """
+    page = Page.objects.create(title="Page")
+    PageChange.objects.all().delete()
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            page.title = "Rolled back"
+            page.save()
+            assert PageChange.objects.filter(page_id=page.pk).exists()
+            raise RuntimeError
+    assert not PageChange.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_purge_keeps_events(purged):
+    """
+    Ошибка бэкенда очистки оставляет события в outbox для повторной попытки.
+    """
+    class Failing(LocalPurgeBackend):
+        def purge_pages(self, page_ids):
+            raise OSError("CDN недоступен")
+
+    page = Page.objects.create(title="Page")
+    with pytest.raises(OSError):
+        drain_outbox(backend=Failing())
+    assert PageChange.objects.filter(page_id=page.pk).exists()
+
+    drain_outbox()
+    assert LocalPurgeBackend.calls == [[page.pk]]
+
+
+@pytest.mark.django_db
+def test_deleted_content_purges_its_pages(purged):
+    """
+    Удаление объекта контента очищает страницы, на которых он был размещён.
+    """
+    video = Video.objects.create(title="Gone", video_url="http://video.url")
+    page = Page.objects.create(title="Page")
+    place(video, [page])
+    drain_outbox()
+    LocalPurgeBackend.reset()
+
+    video.delete()
+    drain_outbox()
+    assert LocalPurgeBackend.calls == [[page.pk]]
+
+
+@pytest.mark.django_db
+def test_page_detail_cdn_headers(settings):
+    """
+    Ответ страницы помечен Surrogate-Key; при CDN_PAGE_MAX_AGE — s-maxage для CDN.
+    """
+    settings.CDN_PAGE_MAX_AGE = 3600
+    page = Page.objects.create(title="Page")
+    response = APIClient().get(f"/api/pages/{page.pk}/")
+    assert response["Surrogate-Key"] == f"page-{page.pk}"
+    assert "s-maxage=3600" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_deleted_or_repointed_wrapper_purges_its_pages(purged):
+    """
+    Удаление обёртки Contents (каскадом уходят элементы) и смена её объекта очищают страницы.
+    """
+    video = Video.objects.create(title="Video", video_url="http://video.url")
+    other = Video.objects.create(title="Other", video_url="http://video.url")
+    pages = [Page.objects.create(title=f"Page {i}") for i in range(2)]
+    place(video, pages)
+    drain_outbox()
+    LocalPurgeBackend.reset()
+
+    wrapper = Contents.objects.for_object(video).get()
+    wrapper.object_id = other.pk
+    wrapper.save()
+    drain_outbox()
+    assert LocalPurgeBackend.calls == [sorted(page.pk for page in pages)]
+
+    LocalPurgeBackend.reset()
+    wrapper.delete()
+    assert not ContentOnPage.objects.exists()
+    drain_outbox()
+    assert LocalPurgeBackend.calls == [sorted(page.pk for page in pages)]
+
+
+@pytest.mark.django_db
+def test_bulk_content_delete_purges_pages_with_constant_queries(purged, django_assert_max_num_queries):
+    """
+    Пакетное удаление объектов контента: страницы всей пачки — одним запросом, одна очистка CDN.
+    """
+    pages = [Page.objects.create(title=f"Page {i}") for i in range(2)]
+    videos = [Video.objects.create(title=f"V{i}", video_url="http://video.url") for i in range(20)]
+    for video in videos:
+        place(video, pages)
+    drain_outbox()
+    LocalPurgeBackend.reset()
+
+    with django_assert_max_num_queries(15):
+        deleted = delete_content(Video.objects.filter(pk__in=[video.pk for video in videos]))
+    assert deleted["content.Video"] == 20 and not ContentOnPage.objects.exists()
+    drain_outbox()
+    assert LocalPurgeBackend.calls == [sorted(page.pk for page in pages)]
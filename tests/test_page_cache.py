@@ -0,0 +1,210 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.cache import cached_page_ids, get_page_data, invalidate_pages, lock_key, page_key, store_pages
+from api.warming import top_pages, warm_pages
+from content.composition import compose_page
+from content.models import Page, Contents, Video, Text, ContentOnPage
+
+
+@pytest.fixture
+def page(page_factory):
+    videos = [Video.objects.create(title=f"Video {i}", video_url="http://video.url") for i in range(2)]
+    return page_factory(*videos, title="Cached")
+
+
+def get_page(page):
+    with mock.patch("content.tasks.increment_page_content_counters.delay"):
+        response = APIClient().get(f"/api/pages/{page.pk}/")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_page_detail_served_from_cache(page, django_assert_num_queries):
+    """
+    Повторный GET /api/pages/<id>/ отдаётся из кеша без SQL-запросов.
+    """
+    first = get_page(page)
+    with django_assert_num_queries(0):
+        assert get_page(page) == first
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_page_changes(page):
+    """
+    Изменение состава (bulk-сборка), порядка, самого объекта контента и страницы сбрасывает кеш.
+    """
+    get_page(page)
+    text = Text.objects.create(title="Text", body="Body")
+    compose_page(page, [{"type": "text", "id": text.pk}], partial=True)
+    assert [item["title"] for item in get_page(page)["contents"]][0] == "Text"
+
+    first, *_, last = page.get_ordered_items()
+    last.move_before(first)
+    assert get_page(page)["contents"][0]["title"] != "Text"
+
+    text.title = "Renamed"
+    text.save()
+    assert "Renamed" in [item["title"] for item in get_page(page)["contents"]]
+
+    page.title = "Retitled"
+    page.save()
+    assert get_page(page)["title"] == "Retitled"
+
+
+@pytest.mark.django_db
+def test_deleted_page_not_served_from_cache(page):
+    """
+    Удалённая страница — 404, даже если её ответ был в кеше.
+    """
+    get_page(page)
+    page.delete()
+    assert APIClient().get(f"/api/pages/{page.pk}/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_wrapper_changes(page):
+    """
+    Удаление обёртки Contents (элемент уходит каскадом) и смена её объекта сбрасывают кеш.
+    """
+    get_page(page)
+    first, second = page.get_ordered_items()
+    other = Text.objects.create(title="Other", body="Body")
+    second.content.content_object = other
+    second.content.save()
+    assert [item["title"] for item in get_page(page)["contents"]] == ["Video 0", "Other"]
+
+    first.content.delete()
+    assert [item["title"] for item in get_page(page)["contents"]] == ["Other"]
+
+
+@pytest.mark.django_db
+def test_top_pages_by_content_views():
+    """
+    top_pages сортирует страницы по сумме счётчиков контента всех типов.
+    """
+    pages = [Page.objects.create(title=f"Page {i}") for i in range(3)]
+    for page, counters in zip(pages, [(1, 1), (10, 0), (3, 4)]):
+        video = Video.objects.create(title="V", video_url="http://video.url", counter=counters[0])
+        text = Text.objects.create(title="T", body="Body", counter=counters[1])
+        for obj in (video, text):
+            ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=obj))
+    Page.objects.create(title="Never viewed")
+
+    assert top_pages(10) == [pages[1].pk, pages[2].pk, pages[0].pk]
+    assert top_pages(1) == [pages[1].pk]
+
+
+@pytest.mark.django_db
+def test_warm_pages_fills_cache(page, django_assert_max_num_queries):
+    """
+    Прогрев рендерит пачку страниц постоянным числом запросов, уже прогретые пропускает.
+    """
+    other = Page.objects.create(title="Other")
+    with django_assert_max_num_queries(3):
+        report = warm_pages([page.pk, other.pk, 999999], workers=4, batch_size=10)
+    assert report["warmed"] == 2 and report["missing"] == 1
+    assert cached_page_ids([page.pk, other.pk]) == [page.pk, other.pk]
+
+    report = warm_pages([page.pk, other.pk])
+    assert report["skipped"] == 2 and report["warmed"] == 0
+
+
+@pytest.mark.django_db
+def test_warm_pages_command(page, capsys):
+    """
+    warm_pages --pages прогревает явный список страниц.
+    """
+    call_command("warm_pages", "--pages", str(page.pk), "--workers", "1", "--rate", "0")
+    assert "Прогрето 1 из 1" in capsys.readouterr().out
+    assert cached_page_ids([page.pk]) == [page.pk]
+    assert page_key(page.pk).endswith(str(page.pk))
+
+
+def slow_render(calls, delay=0.2):
+    def render(page_ids):
+        calls.append(list(page_ids))
+        time.sleep(delay)
+        return {pk: {"id": pk, "contents": []} for pk in page_ids}
+    return render
+
+
+def test_concurrent_misses_render_once():
+    """
+    Одновременные промахи по одной странице в процессе рендерят её один раз, остальные ждут результат.
+    """
+    calls = []
+    with mock.patch("api.cache.render_pages", side_effect=slow_render(calls)):
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: get_page_data(42), range(8)))
+    assert calls == [[42]]
+    assert all(result == {"id": 42, "contents": []} for result in results)
+
+
+def test_miss_waits_for_other_process_render(settings):
+    """
+    Блокировку рендера держит другой процесс: запрос дожидается его записи в кеш и сам не рендерит.
+    """
+    settings.PAGE_CACHE_WAIT = 2
+    cache.add(lock_key(7), 1)
+    threading.Timer(0.1, store_pages, [{7: {"id": 7, "contents": []}}]).start()
+    with mock.patch("api.cache.render_pages") as render:
+        assert get_page_data(7) == {"id": 7, "contents": []}
+    render.assert_not_called()
+
+
+def test_stale_served_while_one_request_refreshes(settings):
+    """
+    Устаревший ответ отдаётся, пока его пересобирает запрос, взявший блокировку; без блокировки — пересборка.
+    """
+    settings.PAGE_CACHE_TIMEOUT = 0.01
+    store_pages({5: {"id": 5, "title": "old", "contents": []}})
+    time.sleep(0.05)
+    assert cached_page_ids([5]) == []
+
+    cache.add(lock_key(5), 1)
+    with mock.patch("api.cache.render_pages") as render:
+        assert get_page_data(5)["title"] == "old"
+    render.assert_not_called()
+
+    cache.delete(lock_key(5))
+    settings.PAGE_CACHE_TIMEOUT = 300
+    calls = []
+    with mock.patch("api.cache.render_pages", side_effect=slow_render(calls, delay=0)):
+        assert get_page_data(5) == {"id": 5, "contents": []}
+    assert calls == [[5]] and cached_page_ids([5]) == [5]
+
+
+@pytest.mark.django_db
+def test_render_overtaken_by_invalidation_not_stored():
+    """
+    Рендер, прочитавший данные до изменения и закончивший после инвалидации, не кладёт их в кеш.
+    """
+    def render(page_ids):
+        invalidate_pages(page_ids)  # изменение закоммичено во время рендера
+        return {pk: {"id": pk, "title": "old", "contents": []} for pk in page_ids}
+
+    with mock.patch("api.cache.render_pages", side_effect=render):
+        assert get_page_data(3)["title"] == "old"
+    assert cache.get(page_key(3)) is None and cached_page_ids([3]) == []
+
+
+def test_expired_lock_of_other_owner_not_released():
+    """
+    Блокировка истекла во время рендера и досталась другому — рендер её не снимает.
+    """
+    def render(page_ids):
+        cache.set(lock_key(9), "other-owner")
+        return {pk: {"id": pk, "contents": []} for pk in page_ids}
+
+    with mock.patch("api.cache.render_pages", side_effect=render):
+        get_page_data(9)
+    assert cache.get(lock_key(9)) == "other-owner"
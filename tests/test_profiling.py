@@ -0,0 +1,72 @@
+import marshal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+
+@pytest.fixture(autouse=True)
+def profiling_enabled(settings):
+    """Профилирование выключено по умолчанию — в этих тестах включаем (middleware читает настройку при создании клиента)."""
+    settings.PROFILING_ENABLED = True
+
+
+@pytest.fixture
+def staff_client():
+    """Django Client с сессией staff-пользователя (профилирование проверяет request.user в middleware)."""
+    client = Client()
+    client.force_login(get_user_model().objects.create_user("staff", password="x", is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+def test_profile_text_report_with_sql(staff_client, page, settings, tmp_path):
+    """
+    ?profile=1 возвращает отчёт cProfile и все SQL запроса; при PROFILING_DIR профиль сохраняется.
+    """
+    settings.PROFILING_DIR = str(tmp_path)
+    response = staff_client.get(f"/api/pages/{page.pk}/?profile=1")
+    report = response.content.decode()
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert "view: api:page-detail" in report
+    assert "cumulative" in report
+    assert "---- SQL ----" in report and "content_page" in report
+    profile_id = response["X-Profile-Id"]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    assert (tmp_path / f"{profile_id}.sql.json").exists()
+
+
+@pytest.mark.django_db
+def test_profile_pstats_and_collapsed_modes(staff_client, page):
+    """
+    Заголовок X-Profile выбирает режим: pstats (marshal-дамп) или collapsed-стеки.
+    """
+    response = staff_client.get(f"/api/pages/{page.pk}/", HTTP_X_PROFILE="pstats")
+    stats = marshal.loads(response.content)
+    assert any(func[2] == "retrieve" for func in stats)
+
+    response = staff_client.get(f"/api/pages/{page.pk}/", HTTP_X_PROFILE="collapsed")
+    assert response.status_code == 200
+    assert int(response["X-Profile-SQL-Count"]) >= 1
+
+
+@pytest.mark.django_db
+def test_profiling_ignored_for_anonymous(page):
+    """
+    Не-staff получает обычный ответ: параметр профилирования игнорируется.
+    """
+    response = Client().get(f"/api/pages/{page.pk}/?profile=1")
+    assert response["Content-Type"] == "application/json"
+    assert response.json()["title"] == "Page"
+
+
+@pytest.mark.django_db
+def test_profiling_off_by_default(staff_client, page, settings):
+    """
+    Без PROFILING_ENABLED=True даже staff получает обычный ответ — middleware не в цепочке.
+    """
+    del settings.PROFILING_ENABLED
+    response = staff_client.get(f"/api/pages/{page.pk}/?profile=1")
+    assert response["Content-Type"] == "application/json"
@@ -0,0 +1,52 @@
+import pytest
+from rest_framework.test import APIClient
+from content.models import Page, Contents, Video, Audio, Text, ContentOnPage
+
+
+@pytest.mark.django_db
+def test_search_finds_body_and_transcript():
+    """
+    Поиск находит совпадения в Text.body и Audio.transcript, а не только в заголовках.
+    """
+    client = APIClient()
+    text = Text.objects.create(title="Заметка", body="Про квантовую механику")
+    audio = Audio.objects.create(title="Подкаст", transcript="Интервью: квантовую запутанность")
+    Video.objects.create(title="Ролик", video_url="http://video.url")
+
+    response = client.get("/api/search/", {"q": "квантовую"})
+    assert response.status_code == 200
+    found = {(r['type'], r['id']) for r in response.json()['results']}
+    assert found == {("Text", text.id), ("Audio", audio.id)}
+
+
+@pytest.mark.django_db
+def test_search_returns_containing_pages_and_follows_updates():
+    """
+    Результат содержит страницы с найденным контентом; индекс обновляется при сохранении и удалении.
+    """
+    client = APIClient()
+    page = Page.objects.create(title="Search Page")
+    video = Video.objects.create(title="Old title", video_url="http://video.url")
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video), order=1)
+
+    assert client.get("/api/search/", {"q": "Fresh"}).json()['results'] == []
+
+    video.title = "Fresh title"
+    video.save()
+    data = client.get("/api/search/", {"q": "fresh"}).json()
+    assert [r['id'] for r in data['results']] == [video.id]
+    assert data['results'][0]['pages'] == [{"id": page.id, "title": "Search Page"}]
+    assert [p['id'] for p in data['pages']] == [page.id]
+
+    video.delete()
+    assert client.get("/api/search/", {"q": "fresh"}).json()['results'] == []
+
+
+@pytest.mark.django_db
+def test_search_requires_query():
+    """
+    Пустой запрос — ошибка валидации.
+    """
+    client = APIClient()
+    response = client.get("/api/search/")
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from content.distributions import ScatteredZipfSampler, ZipfSampler
+from content.models import Page, Contents, Video, Audio, Text, ContentOnPage
+
+
+def test_zipf_sampler_is_skewed_and_bounded():
+    """
+    Zipf-сэмплер остаётся в диапазоне и отдаёт первому рангу заметную долю выборок.
+    """
+    sample = ZipfSampler(1000, 1.1)
+    values = [sample() for _ in range(5000)]
+    assert 0 <= min(values) and max(values) < 1000
+    assert values.count(0) > 5000 / 1000 * 20
+
+    scattered = ScatteredZipfSampler(1000, 1.1)
+    assert all(0 <= scattered() < 1000 for _ in range(1000))
+
+
+@pytest.mark.django_db
+def test_seed_content_builds_consistent_dataset():
+    """
+    seed_content создаёт контент, обёртки и страницы с валидными ссылками; обычные вставки после него работают.
+    """
+    call_command(
+        "seed_content", contents=300, mix={"video": 1, "audio": 1, "text": 1},
+        pages=20, items_mean=10, items_max=50, seed=1, batch_size=64, stdout=io.StringIO(),
+    )
+    assert Video.objects.count() == Audio.objects.count() == Text.objects.count() == 100
+    assert Contents.objects.count() == 300
+    assert Page.objects.count() == 20
+
+    # каждая обёртка ведёт на существующий объект
+    assert all(c.content_object is not None for c in Contents.objects.all())
+    sizes = ContentOnPage.objects.values("page").annotate(n=Count("id")).values_list("n", flat=True)
+    assert max(sizes) <= 50
+
+    # последовательности сдвинуты за явно назначенные id
+    video = Video.objects.create(title="After seed", video_url="http://video.url")
+    assert video.pk > 100
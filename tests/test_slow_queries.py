@@ -0,0 +1,54 @@
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from content.models import Page
+from monitoring.slow_queries import fingerprint, summarize
+
+
+def test_fingerprint_normalizes_literals_and_in_lists():
+    """
+    Литералы, плейсхолдеры и списки IN сводятся к одному отпечатку.
+    """
+    first = fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'  LIMIT 10")
+    second = fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND name = %s LIMIT %s')
+    assert first == second == "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?"
+
+
+@pytest.mark.django_db
+def test_slow_query_logged_with_view_and_plan(settings, caplog, tmp_path, capsys):
+    """
+    Запрос выше порога пишется с источником-view и планом; команда slow_queries группирует по отпечатку.
+    """
+    Page.objects.create(title="Page")
+    settings.SLOW_QUERY_MS = 0
+    with caplog.at_level(logging.WARNING, logger="monitoring.slow_queries"):
+        assert APIClient().get("/api/pages/").status_code == 200
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "monitoring.slow_queries"]
+    listing = [r for r in records if "content_page" in r["sql"] and "COUNT" in r["sql"].upper()]
+    assert listing and listing[0]["source"] == "view:api:page-list"
+    assert listing[0]["plan"] and "EXPLAIN failed" not in listing[0]["plan"]
+
+    log = tmp_path / "slow.jsonl"
+    log.write_text("".join(r.getMessage() + "\n" for r in caplog.records), encoding="utf-8")
+    groups = summarize(log.read_text(encoding="utf-8").splitlines())
+    assert sum(group["count"] for group in groups) == len(records)
+
+    call_command("slow_queries", str(log), "--top", "1", "--sort", "count", "--plans")
+    out = capsys.readouterr().out
+    assert out.startswith("[") and "источники: view:api:page-list" in out
+
+
+@pytest.mark.django_db
+def test_slow_query_log_disabled_by_default(settings, caplog):
+    """
+    Без SLOW_QUERY_MS обёртка ничего не пишет.
+    """
+    settings.SLOW_QUERY_MS = None
+    with caplog.at_level(logging.WARNING, logger="monitoring.slow_queries"):
+        Page.objects.create(title="Page")
+        list(Page.objects.all())
+    assert not [r for r in caplog.records if r.name == "monitoring.slow_queries"]
@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+import pytest
+from rest_framework.test import APIClient
+
+from api import snapshots
+from api.snapshots import export_snapshots, load_manifest
+from content.models import Page, Contents, Video, ContentOnPage
+
+
+@pytest.fixture
+def pages():
+    result = []
+    for i in range(3):
+        page = Page.objects.create(title=f"Page {i}")
+        video = Video.objects.create(title=f"Video {i}", video_url="http://video.url")
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video))
+        result.append(page)
+    return result
+
+
+@pytest.fixture
+def no_overlap(monkeypatch):
+    monkeypatch.setattr(snapshots, "OVERLAP", timedelta(0))
+
+
+def read(directory, page_id, suffix=""):
+    with open(os.path.join(directory, "pages", f"{page_id}.json{suffix}"), "rb") as stream:
+        return stream.read()
+
+
+@pytest.mark.django_db
+def test_export_matches_api_response(pages, tmp_path):
+    """
+    Снимок страницы (и его .gz) совпадает с ответом /api/pages/<id>/, манифест ссылается на версию.
+    """
+    report = export_snapshots(str(tmp_path), workers=1, batch_size=2)
+    assert report["rendered"] == report["written"] == 3
+
+    page = pages[0]
+    expected = APIClient().get(f"/api/pages/{page.pk}/").json()
+    assert json.loads(read(tmp_path, page.pk)) == expected
+    assert gzip.decompress(read(tmp_path, page.pk, ".gz")) == read(tmp_path, page.pk)
+
+    entry = load_manifest(str(tmp_path))["pages"][str(page.pk)]
+    assert os.path.realpath(tmp_path / "pages" / f"{page.pk}.json") == str(tmp_path / entry["path"])
+
+
+@pytest.mark.django_db
+def test_incremental_export_renders_only_changed_pages(pages, tmp_path, no_overlap):
+    """
+    Повторный прогон рендерит только изменённые страницы и убирает удалённые.
+    """
+    export_snapshots(str(tmp_path), workers=1)
+    old_path = load_manifest(str(tmp_path))["pages"][str(pages[1].pk)]["path"]
+
+    assert export_snapshots(str(tmp_path), workers=1)["rendered"] == 0
+
+    video = pages[1].content_items.get().content.content_object
+    video.title = "Renamed"
+    video.save()
+    pages[2].delete()
+    report = export_snapshots(str(tmp_path), workers=1)
+
+    assert report["rendered"] == report["written"] == 1
+    assert report["removed"] == 1 and report["pages"] == 2
+    assert json.loads(read(tmp_path, pages[1].pk))["contents"][0]["title"] == "Renamed"
+    # предыдущая версия сохраняется для клиентов со старым манифестом
+    assert (tmp_path / old_path).exists()
+    assert not (tmp_path / "pages" / f"{pages[2].pk}.json").exists()
+    assert str(pages[2].pk) not in load_manifest(str(tmp_path))["pages"]
+
+
+@pytest.mark.django_db
+def test_incremental_export_picks_up_wrapper_changes(pages, tmp_path, no_overlap):
+    """
+    Удаление обёртки Contents или смена её объекта отмечает страницу изменённой — снимок пересобирается.
+    """
+    export_snapshots(str(tmp_path), workers=1)
+    other = Video.objects.create(title="Other", video_url="http://video.url")
+
+    wrapper = pages[0].content_items.get().content
+    wrapper.object_id = other.pk
+    wrapper.save()
+    pages[1].content_items.get().content.delete()
+    report = export_snapshots(str(tmp_path), workers=1)
+
+    assert report["rendered"] == report["written"] == 2
+    assert json.loads(read(tmp_path, pages[0].pk))["contents"][0]["title"] == "Other"
+    assert json.loads(read(tmp_path, pages[1].pk))["contents"] == []
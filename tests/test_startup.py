@@ -0,0 +1,50 @@
+import pytest
+from django.test import Client
+
+from config import schema, settings_worker
+
+
+@pytest.fixture
+def schema_file(settings, tmp_path):
+    path = tmp_path / "openapi-schema.yml"
+    path.write_text("openapi: 3.0.3\ninfo:\n  title: pregenerated\n", encoding="utf-8")
+    settings.OPENAPI_SCHEMA_FILE = str(path)
+    schema._pregenerated_schema.cache_clear()
+    yield path
+    schema._pregenerated_schema.cache_clear()
+
+
+@pytest.mark.django_db
+def test_schema_served_from_pregenerated_file(schema_file):
+    """
+    /api/schema/ отдаёт файл, сгенерированный при сборке; с параметрами — генерирует схему.
+    """
+    response = Client().get("/api/schema/")
+    assert response.status_code == 200
+    assert b"title: pregenerated" in response.content
+
+    response = Client().get("/api/schema/?format=json")
+    assert response.status_code == 200
+    assert "/api/pages/" in response.json()["paths"]
+
+
+@pytest.mark.django_db
+def test_schema_generated_without_file(settings):
+    """
+    Без готового файла схема генерируется drf_spectacular, как раньше.
+    """
+    settings.OPENAPI_SCHEMA_FILE = ""
+    schema._pregenerated_schema.cache_clear()
+    response = Client().get("/api/schema/")
+    assert response.status_code == 200
+    assert b"/api/pages/" in response.content
+
+
+def test_worker_profile_skips_web_apps():
+    """
+    Профиль воркера содержит приложения с моделями и задачами, но не admin/auth/DRF.
+    """
+    apps = settings_worker.INSTALLED_APPS
+    assert {"content", "api", "monitoring", "django.contrib.contenttypes"} <= set(apps)
+    assert not {"django.contrib.admin", "django.contrib.auth", "rest_framework", "drf_spectacular"} & set(apps)
+    assert settings_worker.MIDDLEWARE == []
@@ -0,0 +1,75 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from content.models import Page, Contents, Video, Text, ContentOnPage
+from content.sweeper import sweep_orphans
+from content.tasks import sweep_orphaned_contents
+
+
+@pytest.fixture
+def orphaned_page():
+    """Страница с живым видео и тремя текстами, удалёнными в обход ORM (без каскада)."""
+    page = Page.objects.create(title="Page")
+    video = Video.objects.create(title="Alive", video_url="http://video.url")
+    ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=video))
+    texts = [Text.objects.create(title=f"Dead {n}", body="b") for n in range(3)]
+    for text in texts:
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=text))
+    Text.objects.filter(pk__in=[t.pk for t in texts])._raw_delete(Text.objects.db)
+    return page
+
+
+@pytest.mark.django_db
+def test_sweep_removes_orphans_in_batches(orphaned_page):
+    """
+    Сироты удаляются порциями вместе с элементами страниц; живые обёртки не трогаются.
+    """
+    assert APIClient().get(f"/api/pages/{orphaned_page.pk}/").json()["contents"][0]["title"] == "Alive"
+
+    dry = sweep_orphans(batch_size=2, dry_run=True)
+    assert (dry["contents"], dry["page_items"]) == (3, 3)
+    assert Contents.objects.count() == 4
+
+    partial = sweep_orphans(batch_size=2, max_batches=1)
+    assert (partial["contents"], partial["complete"]) == (2, False)
+
+    rest = sweep_orphaned_contents(batch_size=2)
+    assert rest == {"contents": 1, "page_items": 1, "complete": True}
+    assert Contents.objects.count() == 1
+    assert ContentOnPage.objects.filter(page=orphaned_page).count() == 1
+
+
+@pytest.mark.django_db
+def test_sweep_removes_wrappers_of_unknown_types(orphaned_page):
+    """
+    Обёртки на тип контента без модели (модель удалена из кода) тоже сироты.
+    """
+    stale = ContentType.objects.create(app_label="content", model="podcast")
+    Contents.objects.create(content_type=stale, _object_id=1)
+
+    report = sweep_orphans()
+    assert report["by_type"] == {"content.text": 3, "content.podcast": 1}
+
+
+def make_orphans(page, n):
+    texts = [Text.objects.create(title=f"Dead {i}", body="b") for i in range(n)]
+    for text in texts:
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=text))
+    Text.objects.filter(pk__in=[t.pk for t in texts])._raw_delete(Text.objects.db)
+
+
+@pytest.mark.django_db
+def test_sweep_batch_queries_do_not_grow_with_batch_size():
+    """
+    Порция удаляется постоянным числом запросов: страницы — один запрос на порцию, без запроса на обёртку.
+    """
+    counts = []
+    for n in (10, 100):
+        make_orphans(Page.objects.create(title=f"Page {n}"), n)
+        with CaptureQueriesContext(connection) as ctx:
+            report = sweep_orphans(batch_size=1000)
+        assert report["contents"] == report["page_items"] == n
+        counts.append(len(ctx.captured_queries))
+    assert counts[0] == counts[1]
@@ -0,0 +1,74 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from content.models import Page, Contents, Video, Audio, Text, ContentOnPage
+
+
+def build_dataset():
+    page = Page.objects.create(title="Export Page")
+    video = Video.objects.create(title="Video", video_url="http://video.url", counter=7)
+    audio = Audio.objects.create(title="Audio", transcript="Транскрипт")
+    text = Text.objects.create(title="Text", body="Body")
+    for obj, alias in ((text, "intro"), (video, None), (audio, None)):
+        ContentOnPage.objects.create(page=page, content=Contents.objects.create(content_object=obj), alias=alias)
+    return page
+
+
+def page_shape(page):
+    return [
+        (i.alias, i.order, type(i.content.content_object).__name__, i.content.content_object.title,
+         i.content.content_object.counter)
+        for i in page.get_ordered_items()
+    ]
+
+
+@pytest.mark.django_db
+def test_export_writes_ndjson_in_dependency_order(tmp_path):
+    """
+    Экспорт пишет по одной JSON-записи на строку, контент раньше обёрток и страниц.
+    """
+    build_dataset()
+    path = tmp_path / "dump.ndjson"
+    call_command("export_content", output=str(path))
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    models = [r['model'] for r in records]
+    assert models.index("content.contents") > models.index("content.text")
+    assert models.index("content.contentonpage") > models.index("content.page")
+    wrapper = next(r for r in records if r['model'] == "content.contents")
+    assert wrapper['fields']['content_type'][0] == "content"
+
+
+@pytest.mark.django_db
+def test_export_to_stdout_is_valid_ndjson():
+    """
+    Экспорт в stdout — ровно одна строка на запись, без пустых строк.
+    """
+    build_dataset()
+    stdout = io.StringIO()
+    call_command("export_content", stdout=stdout)
+
+    output = stdout.getvalue()
+    assert output.endswith("}\n") and "\n\n" not in output
+    assert len([json.loads(line) for line in output.splitlines()]) == 3 + 3 + 1 + 3
+
+
+@pytest.mark.django_db
+def test_import_remaps_ids(tmp_path):
+    """
+    Импорт создаёт копию данных с новыми id и корректными generic-ссылками.
+    """
+    page = build_dataset()
+    expected = page_shape(page)
+    path = tmp_path / "dump.ndjson"
+    call_command("export_content", output=str(path))
+
+    # сдвигаем id: повторный импорт в ту же БД создаёт новые строки
+    call_command("import_content", str(path), batch_size=2, stdout=io.StringIO())
+
+    pages = list(Page.objects.order_by("pk"))
+    assert len(pages) == 2 and pages[1].pk != page.pk
+    assert page_shape(pages[1]) == expected
+    assert Contents.objects.count() == 6
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from content.models import Page, Contents, Video, Audio, ContentOnPage
+from content.where_used import page_ids_for_objects, pages_for_objects
+
+
+@pytest.fixture
+def placed():
+    """Видео на двух страницах, аудио с тем же id — на третьей."""
+    video = Video.objects.create(title="Video", video_url="http://video.url")
+    audio = Audio.objects.create(title="Audio")
+    first, second, third = (Page.objects.create(title=t) for t in ("First", "Second", "Third"))
+    wrapper = Contents.objects.create(content_object=video)
+    ContentOnPage.objects.create(page=first, content=wrapper)
+    ContentOnPage.objects.create(page=second, content=wrapper)
+    ContentOnPage.objects.create(page=third, content=Contents.objects.create(content_object=audio))
+    return video, audio, (first, second, third)
+
+
+@pytest.mark.django_db
+def test_bulk_where_used_is_one_query(placed):
+    """
+    Пакетный where-used — один запрос, без перекрёстных пар тип/id.
+    """
+    video, audio, (first, second, third) = placed
+    lonely = Video.objects.create(title="Lonely", video_url="http://video.url")
+
+    with CaptureQueriesContext(connection) as ctx:
+        result = pages_for_objects([video, audio, lonely])
+    assert len(ctx.captured_queries) == 1
+
+    assert result == {
+        (Contents.objects.for_object(video).first().content_type_id, video.pk): [first.pk, second.pk],
+        (Contents.objects.for_object(audio).first().content_type_id, audio.pk): [third.pk],
+    }
+    assert page_ids_for_objects([video]) == {first.pk, second.pk}
+
+
+@pytest.mark.django_db
+def test_content_pages_endpoint(placed):
+    """
+    GET /api/content/<type>/<id>/pages/ отдаёт страницы объекта; неизвестный тип — 404.
+    """
+    video, _, (first, second, _) = placed
+    client = APIClient()
+
+    response = client.get(f"/api/content/video/{video.pk}/pages/")
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    assert {p["id"] for p in response.json()["results"]} == {first.pk, second.pk}
+
+    assert client.get(f"/api/content/video/{video.pk + 100}/pages/").json()["count"] == 0
+    assert client.get(f"/api/content/podcast/{video.pk}/pages/").status_code == 404